@@ -0,0 +1,312 @@
+""" end-to-end load test against a local tapioca application
+
+    python -m benchmarks.loadtest --concurrency 20 --duration 10
+    python -m benchmarks.loadtest --rate 500 --duration 10 \\
+            --mix list=10,get=60,create=10,update=10,delete=10
+
+The sample application keeps its comments in memory and runs in a child
+process, so the load generator does not share the IOLoop with it.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import signal
+import logging
+from optparse import OptionParser
+
+import tornado.web
+import tornado.netutil
+from tornado.ioloop import IOLoop
+from tornado.httpserver import HTTPServer
+from tornado.httpclient import AsyncHTTPClient
+
+from tapioca import TornadoRESTful, ResourceHandler, ResourceDoesNotExist
+
+
+DEFAULT_MIX = 'list=10,get=60,create=10,update=10,delete=10'
+
+
+class CommentsResource(ResourceHandler):
+    store = {}
+    next_id = [0]
+
+    @classmethod
+    def populate(cls, count):
+        cls.store.clear()
+        cls.next_id[0] = 0
+        for i in range(count):
+            cls.create({'text': 'comment {0}'.format(i)})
+
+    @classmethod
+    def create(cls, model):
+        cls.next_id[0] += 1
+        model['id'] = cls.next_id[0]
+        cls.store[model['id']] = model
+        return model
+
+    def find(self, cid):
+        try:
+            return self.store[int(cid)]
+        except (KeyError, ValueError):
+            raise ResourceDoesNotExist()
+
+    def get_collection(self, callback):
+        callback(list(self.store.values())[:20])
+
+    def get_model(self, cid, callback):
+        callback(self.find(cid))
+
+    def create_model(self, callback):
+        model = self.create(self.load_data())
+        callback(model, '/comments/{0}'.format(model['id']))
+
+    def update_model(self, cid, callback):
+        model = self.load_data()
+        model['id'] = self.find(cid)['id']
+        self.store[model['id']] = model
+        callback()
+
+    def delete_model(self, cid, callback):
+        self.find(cid)
+        del self.store[int(cid)]
+        callback()
+
+
+def start_server(initial_items):
+    """ fork a process serving the sample application, return (pid, port) """
+    sockets = tornado.netutil.bind_sockets(0, '127.0.0.1')
+    port = sockets[0].getsockname()[1]
+    pid = os.fork()
+    if pid:
+        for sock in sockets:
+            sock.close()
+        return pid, port
+
+    logging.getLogger().setLevel(logging.ERROR)
+    CommentsResource.populate(initial_items)
+    api = TornadoRESTful()
+    api.add_resource('comments', CommentsResource)
+    io_loop = IOLoop()
+    server = HTTPServer(tornado.web.Application(api.get_url_mapping()),
+            io_loop=io_loop)
+    server.add_sockets(sockets)
+    signal.signal(signal.SIGTERM, lambda signum, frame: os._exit(0))
+    io_loop.start()
+    os._exit(0)
+
+
+def percentile(values, fraction):
+    """ nearest-rank percentile of sorted values """
+    if not values:
+        return None
+    index = int(math.ceil(fraction * len(values))) - 1
+    return values[max(0, min(index, len(values) - 1))]
+
+
+def parse_mix(text):
+    mix = []
+    for item in text.split(','):
+        name, weight = item.split('=')
+        if name not in LoadGenerator.operations:
+            raise ValueError('unknown operation {0}'.format(name))
+        mix.append((name, float(weight)))
+    return mix
+
+
+class LoadGenerator(object):
+    operations = ('list', 'get', 'create', 'update', 'delete')
+
+    def __init__(self, base_url, mix, known_ids, io_loop, max_clients):
+        self.base_url = base_url
+        self.mix = mix
+        self.total_weight = sum(weight for name, weight in mix)
+        self.known_ids = list(known_ids)
+        self.io_loop = io_loop
+        self.client = AsyncHTTPClient(io_loop, max_clients=max_clients,
+                force_instance=True)
+        self.latencies = dict((name, []) for name in self.operations)
+        self.errors = dict((name, 0) for name in self.operations)
+        self.pending = 0
+
+    def choose_operation(self):
+        point = random.uniform(0, self.total_weight)
+        for name, weight in self.mix:
+            point -= weight
+            if point <= 0:
+                break
+        if name in ('get', 'update', 'delete') and not self.known_ids:
+            return 'create'
+        return name
+
+    def build_request(self, name):
+        url = self.base_url + '/comments'
+        body = None
+        method = 'GET'
+        if name in ('get', 'update', 'delete'):
+            cid = random.choice(self.known_ids)
+            if name == 'delete':
+                self.known_ids.remove(cid)
+            url = '{0}/{1}'.format(url, cid)
+        if name == 'create':
+            method, body = 'POST', json.dumps({'text': 'new comment'})
+        elif name == 'update':
+            method, body = 'PUT', json.dumps({'text': 'updated comment'})
+        elif name == 'delete':
+            method = 'DELETE'
+        return url, method, body
+
+    def send(self, started_at=None, callback=None):
+        """ send one request, its latency is counted from started_at """
+        name = self.choose_operation()
+        url, method, body = self.build_request(name)
+        started_at = started_at or time.time()
+        self.pending += 1
+
+        def on_response(response):
+            self.pending -= 1
+            self.latencies[name].append(time.time() - started_at)
+            if response.error and response.code != 404:
+                self.errors[name] += 1
+            if name == 'create' and 'Location' in response.headers:
+                self.known_ids.append(
+                    int(response.headers['Location'].rsplit('/', 1)[1]))
+            if callback:
+                callback()
+
+        self.client.fetch(url, on_response, method=method, body=body,
+                headers={'Content-Type': 'application/json'})
+
+    def run_closed_loop(self, concurrency, duration):
+        deadline = time.time() + duration
+
+        def next_request():
+            if time.time() < deadline:
+                self.send(callback=next_request)
+            elif self.pending == 0:
+                self.io_loop.stop()
+
+        started_at = time.time()
+        for i in range(concurrency):
+            self.send(callback=next_request)
+        self.io_loop.start()
+        return time.time() - started_at
+
+    def run_open_loop(self, rate, duration):
+        """ send requests at a fixed rate, whether or not the previous
+        ones were answered, so a slow server does not slow the load down """
+        interval = 1.0 / rate
+        started_at = time.time()
+        total = int(rate * duration)
+        state = {'sent': 0}
+
+        def finished():
+            if state['sent'] >= total and self.pending == 0:
+                self.io_loop.stop()
+
+        def tick():
+            now = time.time()
+            while state['sent'] < total and \
+                    started_at + state['sent'] * interval <= now:
+                self.send(started_at + state['sent'] * interval, finished)
+                state['sent'] += 1
+            if state['sent'] < total:
+                self.io_loop.add_timeout(
+                    started_at + state['sent'] * interval, tick)
+
+        tick()
+        self.io_loop.start()
+        return time.time() - started_at
+
+    def report(self, elapsed):
+        endpoints = {}
+        all_latencies = []
+        for name in self.operations:
+            latencies = sorted(self.latencies[name])
+            if not latencies:
+                continue
+            all_latencies.extend(latencies)
+            endpoints[name] = summarize(latencies, self.errors[name], elapsed)
+        endpoints['all'] = summarize(sorted(all_latencies),
+                sum(self.errors.values()), elapsed)
+        return endpoints
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'p999': percentile(latencies, 0.999),
+    }
+
+
+def format_report(endpoints, names=None):
+    if names is None:
+        names = [name for name in LoadGenerator.operations
+                if name in endpoints]
+    names = list(names) + ['all']
+    width = max(len(name) for name in names + ['endpoint'])
+    lines = ['{0:<{8}} {1:>9} {2:>7} {3:>10} {4:>9} {5:>9} {6:>9} {7:>9}'
+            .format('endpoint', 'requests', 'errors', 'req/s', 'p50 ms',
+                'p95 ms', 'p99 ms', 'p999 ms', width)]
+    for name in names:
+        item = endpoints[name]
+        if not item['requests']:
+            continue
+        lines.append('{0:<{8}} {1:>9} {2:>7} {3:>10.1f} {4:>9.2f} {5:>9.2f} '
+                '{6:>9.2f} {7:>9.2f}'.format(name, item['requests'],
+                    item['errors'], item['throughput'], item['p50'] * 1000,
+                    item['p95'] * 1000, item['p99'] * 1000,
+                    item['p999'] * 1000, width))
+    return '\n'.join(lines)
+
+
+def main(args=None):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('-c', '--concurrency', type='int', default=10,
+            help='requests in flight, for the closed loop (default)')
+    parser.add_option('-r', '--rate', type='float',
+            help='requests per second, for the open loop')
+    parser.add_option('-d', '--duration', type='float', default=10)
+    parser.add_option('-m', '--mix', default=DEFAULT_MIX,
+            help='weights of list, get, create, update and delete')
+    parser.add_option('-i', '--items', type='int', default=1000,
+            help='comments in the store when it starts')
+    parser.add_option('--json', action='store_true', help='print JSON')
+    options, arguments = parser.parse_args(args)
+
+    mix = parse_mix(options.mix)
+    pid, port = start_server(options.items)
+    try:
+        time.sleep(0.2)
+        io_loop = IOLoop()
+        max_clients = options.concurrency
+        if options.rate:
+            max_clients = max(int(options.rate), options.concurrency)
+        generator = LoadGenerator('http://127.0.0.1:{0}'.format(port), mix,
+                range(1, options.items + 1), io_loop, max_clients)
+        if options.rate:
+            elapsed = generator.run_open_loop(options.rate, options.duration)
+        else:
+            elapsed = generator.run_closed_loop(options.concurrency,
+                    options.duration)
+    finally:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+    endpoints = generator.report(elapsed)
+    if options.json:
+        print(json.dumps(endpoints, indent=2, sort_keys=True))
+    else:
+        print(format_report(endpoints))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+""" measures the cost of the per-request phase instrumentation
+
+    python -m benchmarks.metrics_overhead
+"""
+import time
+import timeit
+
+from tapioca import JsonEncoder
+from tapioca.metrics import MetricsRegistry, PhaseTimings
+
+
+PHASES = ('negotiation', 'validation', 'handler', 'encode')
+
+
+def instrumented_request(registry):
+    timings = PhaseTimings()
+    for phase in PHASES:
+        started_at = time.time()
+        timings.add(phase, time.time() - started_at)
+    registry.observe_request('comments', 'GET', timings, 0.001)
+
+
+def main(number=100000):
+    registry = MetricsRegistry()
+    instrumentation = timeit.timeit(lambda: instrumented_request(registry),
+            number=number) / number
+
+    encoder = JsonEncoder(None)
+    payload = {'id': 1, 'text': 'a small comment', 'author_name': 'someone'}
+    reference = timeit.timeit(lambda: encoder.encode(payload),
+            number=number) / number
+
+    print('instrumentation: {0:.2f} us/request'.format(instrumentation * 1e6))
+    print('encoding a small model, for reference: {0:.2f} us'.format(
+        reference * 1e6))
+    return instrumentation
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+""" plays back the requests recorded by a TrafficRecorder
+
+    python -m benchmarks.replay capture.jsonl --url http://127.0.0.1:8888
+    python -m benchmarks.replay capture.jsonl --speed 4
+
+Requests are sent at the offsets they were recorded, divided by the speed
+factor, and the latencies are reported by method and resource.
+"""
+import sys
+import json
+import time
+from optparse import OptionParser
+
+from tornado.ioloop import IOLoop
+from tornado.httpclient import AsyncHTTPClient
+
+from tapioca.capture import read_capture
+from benchmarks.loadtest import summarize, format_report
+
+
+SKIPPED_HEADERS = ('host', 'content-length', 'connection',
+        'transfer-encoding')
+
+
+def endpoint(record):
+    """ method and first segment of the path, e.g. GET /comments """
+    path = record['uri'].split('?', 1)[0].strip('/')
+    resource = path.split('/', 1)[0].split('.', 1)[0]
+    return '{0} /{1}'.format(record['method'], resource)
+
+
+def replay_headers(record):
+    return dict((name, value) for name, value in record['headers'].items()
+            if name.lower() not in SKIPPED_HEADERS)
+
+
+class Replayer(object):
+
+    def __init__(self, base_url, records, speed, io_loop, max_clients=100):
+        self.base_url = base_url.rstrip('/')
+        self.records = records
+        self.speed = speed
+        self.io_loop = io_loop
+        self.client = AsyncHTTPClient(io_loop, max_clients=max_clients,
+                force_instance=True)
+        self.latencies = {}
+        self.errors = {}
+        self.pending = 0
+        self.sent = 0
+
+    def schedule_of(self, record, started_at):
+        offset = record['time'] - self.records[0]['time']
+        return started_at + offset / self.speed
+
+    def send(self, record, scheduled_at):
+        name = endpoint(record)
+        self.pending += 1
+        self.sent += 1
+
+        def on_response(response):
+            self.pending -= 1
+            self.latencies.setdefault(name, []).append(
+                    time.time() - scheduled_at)
+            if response.code != record['status']:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            if self.sent == len(self.records) and self.pending == 0:
+                self.io_loop.stop()
+
+        self.client.fetch(self.base_url + record['uri'], on_response,
+                method=record['method'], headers=replay_headers(record),
+                body=record.get('body'), allow_nonstandard_methods=True)
+
+    def run(self):
+        """ return the seconds spent playing back the capture """
+        started_at = time.time()
+        state = {'next': 0}
+
+        def tick():
+            now = time.time()
+            while state['next'] < len(self.records):
+                record = self.records[state['next']]
+                scheduled_at = self.schedule_of(record, started_at)
+                if scheduled_at > now:
+                    self.io_loop.add_timeout(scheduled_at, tick)
+                    return
+                self.send(record, scheduled_at)
+                state['next'] += 1
+
+        if self.records:
+            tick()
+            self.io_loop.start()
+        return time.time() - started_at
+
+    def report(self, elapsed):
+        endpoints = {}
+        all_latencies = []
+        for name, latencies in self.latencies.items():
+            all_latencies.extend(latencies)
+            endpoints[name] = summarize(sorted(latencies),
+                    self.errors.get(name, 0), elapsed)
+        endpoints['all'] = summarize(sorted(all_latencies),
+                sum(self.errors.values()), elapsed)
+        return endpoints
+
+
+def main(args=None):
+    parser = OptionParser(usage='%prog [options] CAPTURE')
+    parser.add_option('-u', '--url', default='http://127.0.0.1:8888',
+            help='base url of the application')
+    parser.add_option('-s', '--speed', type='float', default=1.0,
+            help='2 plays the capture twice as fast')
+    parser.add_option('-n', '--max-clients', type='int', default=100)
+    parser.add_option('--json', action='store_true', help='print JSON')
+    options, arguments = parser.parse_args(args)
+    if len(arguments) != 1:
+        parser.error('a capture file is needed')
+
+    records = sorted(read_capture(arguments[0]), key=lambda r: r['time'])
+    replayer = Replayer(options.url, records, options.speed, IOLoop(),
+            options.max_clients)
+    endpoints = replayer.report(replayer.run())
+    if options.json:
+        print(json.dumps(endpoints, indent=2, sort_keys=True))
+    else:
+        print(format_report(endpoints,
+            sorted(name for name in endpoints if name != 'all')))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
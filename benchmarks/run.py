@@ -0,0 +1,147 @@
+""" runs the benchmarks and compares results
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --compare before.json after.json
+"""
+import re
+import sys
+import json
+import timeit
+import platform
+from optparse import OptionParser
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from benchmarks.suite import BENCHMARKS
+
+
+def calibrate(timer, min_time):
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            return number
+        number *= 10
+
+
+def run_benchmark(function, repeat, min_time):
+    timer = timeit.Timer(function)
+    number = calibrate(timer, min_time)
+    timings = sorted(seconds / number
+            for seconds in timer.repeat(repeat, number))
+    return {
+        'best': timings[0],
+        'median': timings[len(timings) // 2],
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def measure_memory(function, number=100):
+    """ bytes of memory used by each call: the peak while it runs and what
+    is still allocated after it returns, or None without tracemalloc
+
+    These are sizes, not counts of allocations: a call making many small
+    objects can weigh less than one making a single large buffer.
+    """
+    if tracemalloc is None or not hasattr(tracemalloc, 'reset_peak') or \
+            tracemalloc.is_tracing():
+        return None
+    function()
+    tracemalloc.start()
+    try:
+        peak = 0
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(number):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            function()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return {'peak_bytes': peak, 'retained_bytes': retained / float(number)}
+
+
+def run(pattern=None, repeat=5, min_time=0.1, memory=True):
+    results = {}
+    for name, prepare in BENCHMARKS:
+        if pattern and not re.search(pattern, name):
+            continue
+        function = prepare()
+        results[name] = run_benchmark(function, repeat, min_time)
+        line = '{0:<32} {1:>12.2f} us'.format(name,
+                results[name]['best'] * 1e6)
+        if memory:
+            results[name]['memory'] = measure_memory(function)
+            if results[name]['memory'] is not None:
+                line += ' {0:>10} B peak'.format(
+                        results[name]['memory']['peak_bytes'])
+        sys.stderr.write(line + '\n')
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'benchmarks': results,
+    }
+
+
+def compare(before, after, threshold):
+    """ return the lines of the report and whether there was a regression """
+    lines = []
+    regression = False
+    for name in sorted(after['benchmarks']):
+        if name not in before['benchmarks']:
+            continue
+        old = before['benchmarks'][name]['best']
+        new = after['benchmarks'][name]['best']
+        change = (new - old) / old
+        status = ''
+        if change > threshold:
+            status = 'REGRESSION'
+            regression = True
+        elif change < -threshold:
+            status = 'faster'
+        lines.append('{0:<32} {1:>10.2f} us {2:>10.2f} us {3:>+8.1%} {4}'
+                .format(name, old * 1e6, new * 1e6, change, status).rstrip())
+    return lines, regression
+
+
+def main(args=None):
+    parser = OptionParser(usage='%prog [options] | --compare BEFORE AFTER')
+    parser.add_option('-o', '--output', help='write results to this file')
+    parser.add_option('-k', '--filter', help='only benchmarks matching regex')
+    parser.add_option('-r', '--repeat', type='int', default=5)
+    parser.add_option('--min-time', type='float', default=0.1,
+            help='minimum seconds of each timing')
+    parser.add_option('--no-memory', action='store_false',
+            dest='memory', default=True,
+            help='do not measure the memory allocated by each call')
+    parser.add_option('-c', '--compare', action='store_true',
+            help='compare two result files')
+    parser.add_option('-t', '--threshold', type='float', default=0.1,
+            help='relative slowdown considered a regression')
+    options, arguments = parser.parse_args(args)
+
+    if options.compare:
+        if len(arguments) != 2:
+            parser.error('--compare needs two result files')
+        with open(arguments[0]) as before, open(arguments[1]) as after:
+            lines, regression = compare(json.load(before), json.load(after),
+                    options.threshold)
+        print('\n'.join(lines))
+        return 1 if regression else 0
+
+    results = run(options.filter, options.repeat, options.min_time,
+            options.memory)
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+""" benchmarks of tapioca hot paths
+
+Each benchmark is a function that prepares its data and returns the
+callable to be timed.
+"""
+import json
+
+import tornado.web
+from tornado.httputil import HTTPHeaders
+from tornado.httpserver import HTTPRequest
+from schema import Use, And
+
+from tapioca import TornadoRESTful, ResourceHandler, JsonEncoder, \
+        RequestSchema, optional, RawRepresentation
+from tapioca.spec import SwaggerSpecification, WADLSpecification
+from tapioca.metrics import MetricsRegistry
+
+from benchmarks.metrics_overhead import instrumented_request
+
+
+BENCHMARKS = []
+
+
+def benchmark(function):
+    BENCHMARKS.append((function.__name__, function))
+    return function
+
+
+def small_payload():
+    return {'id': 1, 'text': 'a small comment', 'author_name': 'someone'}
+
+
+def nested_payload():
+    return {
+        'id': 1,
+        'author_info': {
+            'full_name': 'someone',
+            'home_page': {'url_address': 'http://example.com', 'is_valid': True}
+        },
+        'related_items': [{'item_id': i, 'item_tags': ['a', 'b']}
+            for i in range(5)]
+    }
+
+
+def list_payload():
+    return [small_payload() for i in range(100)]
+
+
+PAYLOADS = (
+    ('small', small_payload),
+    ('nested', nested_payload),
+    ('list', list_payload),
+)
+
+
+def encode_benchmark(payload_factory):
+    def prepare():
+        encoder = JsonEncoder(None)
+        payload = payload_factory()
+        return lambda: encoder.encode(payload)
+    return prepare
+
+
+def decode_benchmark(payload_factory):
+    def prepare():
+        encoder = JsonEncoder(None)
+        payload = encoder.encode(payload_factory())
+        return lambda: encoder.decode(payload)
+    return prepare
+
+
+for shape, factory in PAYLOADS:
+    BENCHMARKS.append(('json_encode_{0}'.format(shape),
+        encode_benchmark(factory)))
+    BENCHMARKS.append(('json_decode_{0}'.format(shape),
+        decode_benchmark(factory)))
+
+
+def build_handler(handler_class=ResourceHandler, method='GET', uri='/',
+        headers=None, body=None):
+    application = tornado.web.Application()
+    request = HTTPRequest(method, uri, headers=HTTPHeaders(headers or {}),
+            body=body)
+    return handler_class(application, request)
+
+
+def negotiation_benchmark(accept):
+    def prepare():
+        handler = build_handler(headers={'Accept': accept})
+        return lambda: handler.get_content_type_based_on('Accept')
+    return prepare
+
+
+ACCEPT_HEADERS = (
+    ('json', 'application/json'),
+    ('browser', 'text/html,application/xhtml+xml,application/xml;q=0.9,'
+        '*/*;q=0.8'),
+    ('wildcard', '*/*'),
+)
+
+for name, accept in ACCEPT_HEADERS:
+    BENCHMARKS.append(('negotiation_{0}'.format(name),
+        negotiation_benchmark(accept)))
+
+
+@benchmark
+def validation_querystring():
+    schema = RequestSchema(querystring={
+        'name': (And(str, Use(lambda v: v.lower())), 'The name of user'),
+        optional('page', 1): Use(int),
+        optional('size', 20): Use(int),
+    })
+    values = {'name': 'Someone', 'page': '3'}
+    return lambda: schema.validate_querystring(values)
+
+
+@benchmark
+def validation_body():
+    schema = RequestSchema(body=And(Use(json.loads),
+        {'name': Use(str), 'age': int, 'tags': [Use(str)]}))
+    body = json.dumps({'name': 'someone', 'age': 30, 'tags': ['a', 'b']})
+    return lambda: schema.validate_body(body)
+
+
+def api_with_resources(count):
+    api = TornadoRESTful(version='v1', base_url='http://api.tapioca.com')
+    for i in range(count):
+        api.add_resource('resource_{0}'.format(i), ResourceWithAllMethods)
+    return api
+
+
+class ResourceWithAllMethods(ResourceHandler):
+
+    def create_model(self, callback):
+        callback()
+
+    def get_collection(self, callback):
+        callback([])
+
+    def get_model(self, cid, callback):
+        callback({})
+
+    def update_model(self, cid, callback):
+        callback()
+
+    def delete_model(self, cid, callback):
+        callback()
+
+
+def routing_benchmark(count):
+    def prepare():
+        specs = [tornado.web.URLSpec(pattern, handler)
+                for pattern, handler in api_with_resources(count).handlers]
+        path = '/resource_{0}/123.json'.format(count - 1)
+
+        def route():
+            for spec in specs:
+                match = spec.regex.match(path)
+                if match:
+                    return spec, match.groupdict()
+        return route
+    return prepare
+
+
+for count in (10, 100):
+    BENCHMARKS.append(('routing_{0}_resources'.format(count),
+        routing_benchmark(count)))
+
+
+@benchmark
+def swagger_generation():
+    spec = api_with_resources(20).get_spec()
+    return lambda: SwaggerSpecification(spec).generate()
+
+
+@benchmark
+def swagger_resource_generation():
+    spec = api_with_resources(20).get_spec()
+    return lambda: SwaggerSpecification(spec).generate('resource_10')
+
+
+@benchmark
+def wadl_generation():
+    spec = api_with_resources(20).get_spec()
+    return lambda: WADLSpecification(spec).generate()
+
+
+class NullStream(object):
+    io_loop = None
+
+    def set_close_callback(self, callback):
+        pass
+
+
+class NullConnection(object):
+    """ connection that discards the response """
+    xheaders = False
+
+    def __init__(self):
+        self.stream = NullStream()
+
+    def write(self, chunk, callback=None):
+        pass
+
+    def finish(self):
+        pass
+
+
+class CommentsResource(ResourceWithAllMethods):
+    raw_payload = JsonEncoder(None).encode(nested_payload())
+
+    def get_model(self, cid, callback):
+        if cid == 'raw':
+            callback(RawRepresentation(self.raw_payload))
+        else:
+            callback(nested_payload())
+
+    def create_model(self, callback):
+        self.load_data()
+        callback(None, '/comments/1')
+
+
+def request_benchmark(method, uri, headers, body=None):
+    def prepare():
+        api = TornadoRESTful()
+        api.add_resource('comments', CommentsResource)
+        application = tornado.web.Application(api.get_url_mapping())
+        connection = NullConnection()
+        return lambda: application(HTTPRequest(method, uri,
+            headers=HTTPHeaders(headers), body=body, remote_ip='127.0.0.1',
+            connection=connection))
+    return prepare
+
+
+REQUESTS = (
+    ('get_model', 'GET', '/comments/1', {'Accept': 'application/json'}, None),
+    ('get_model_browser', 'GET', '/comments/1.json', {'Accept':
+        ACCEPT_HEADERS[1][1]}, None),
+    ('get_raw_model', 'GET', '/comments/raw', {'Accept': 'application/json'},
+        None),
+    ('post', 'POST', '/comments', {'Content-Type': 'application/json'},
+        json.dumps(small_payload()).encode('utf-8')),
+)
+
+for name, method, uri, headers, body in REQUESTS:
+    BENCHMARKS.append(('request_{0}'.format(name),
+        request_benchmark(method, uri, headers, body)))
+
+
+@benchmark
+def metrics_instrumentation():
+    registry = MetricsRegistry()
+    return lambda: instrumented_request(registry)
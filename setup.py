@@ -36,6 +36,11 @@ setup(
         'tapioca/templates/base.html',
         'tapioca/templates/tapioca/resource.html',
     ])],
+    entry_points = {
+        'console_scripts': [
+            'tapioca-export = tapioca.export:main',
+        ],
+    },
     install_requires=[
       "tornado>=2.4",
       "python-mimeparse>=0.1.4",
@@ -1,5 +1,17 @@
-from tapioca.rest_api import TornadoRESTful, ResourceHandler, \
+from tapioca.rest_api import TornadoRESTful, ResourceHandler, APIFrozen, \
         ResourceDoesNotExist
-from tapioca.serializers import Encoder, JsonEncoder, JsonpEncoder, HtmlEncoder
+from tapioca.serializers import Encoder, JsonEncoder, JsonpEncoder, \
+        HtmlEncoder, RawRepresentation
 from tapioca.request import RequestSchema, validate, optional, ParamError, \
         ParamRequiredError, InvalidParamError
+from tapioca.rate_limit import RateLimit
+from tapioca.server import serve
+from tapioca.profiling import RequestProfiler
+from tapioca.slow_log import SlowRequestLog
+from tapioca.capture import TrafficRecorder
+from tapioca.lag import LoopLagMonitor
+from tapioca.allocations import AllocationTracker
+from tapioca.representations import RepresentationCache
+from tapioca.changes import ChangeFeed
+from tapioca.change_log import MemoryChangeLog, FileChangeLog
+from tapioca.webhooks import WebhookDispatcher, Subscriber
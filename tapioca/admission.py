@@ -0,0 +1,109 @@
+import functools
+from collections import deque
+
+from tornado import stack_context
+
+
+class AdmissionControl(object):
+    """ limits how many requests of a resource are handled at the same time
+
+    `max_in_flight` is an int applied to every HTTP method or a dict with a
+    limit by method (e.g. {'GET': 20, 'POST': 2}). Requests that exceed the
+    limit wait in a queue of at most `max_queue` requests; when the queue is
+    full they are rejected right away.
+    """
+
+    def __init__(self, max_in_flight, max_queue=0, retry_after=1):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.in_flight = {}
+        self.queues = {}
+
+    def limit_for(self, method):
+        if isinstance(self.max_in_flight, dict):
+            return self.max_in_flight.get(method)
+        return self.max_in_flight
+
+    def acquire(self, method):
+        """ take a slot for method, return False if there is none free """
+        limit = self.limit_for(method)
+        running = self.in_flight.get(method, 0)
+        if limit is not None and running >= limit:
+            return False
+        self.in_flight[method] = running + 1
+        return True
+
+    def enqueue(self, method, waiter):
+        """ wait for a slot, return False if the queue is full
+
+        The waiter is called without arguments when a slot is handed over
+        to it, so it owns that slot and must release it later.
+        """
+        queue = self.queues.setdefault(method, deque())
+        if len(queue) >= self.max_queue:
+            return False
+        queue.append(waiter)
+        return True
+
+    def cancel(self, method, waiter):
+        """ stop waiting, return False if the slot was already handed over """
+        queue = self.queues.get(method)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            return True
+        return False
+
+    def release(self, method):
+        queue = self.queues.get(method)
+        if queue:
+            queue.popleft()()
+        else:
+            self.in_flight[method] = self.in_flight.get(method, 1) - 1
+
+    def in_flight_count(self, method):
+        return self.in_flight.get(method, 0)
+
+    def queue_length(self, method):
+        return len(self.queues.get(method, ()))
+
+    def stats(self):
+        methods = set(self.in_flight) | set(self.queues)
+        return dict((method, {
+            'in_flight': self.in_flight_count(method),
+            'queued': self.queue_length(method)
+        }) for method in methods)
+
+
+def admission_controlled(method):
+    """ run an HTTP verb only when the resource admission control allows it
+
+    Must be used below `tornado.web.asynchronous`, so that a queued verb still
+    runs inside the exception handling of its own request.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        control = self.admission_control
+        if control is None:
+            return method(self, *args, **kwargs)
+
+        http_method = self.request.method
+        if control.acquire(http_method):
+            self.admission_state = 'admitted'
+            return method(self, *args, **kwargs)
+
+        def run():
+            if self.admission_state == 'queued':
+                self.admission_state = 'admitted'
+                method(self, *args, **kwargs)
+
+        io_loop = self.request.connection.stream.io_loop
+        waiter = functools.partial(io_loop.add_callback,
+                stack_context.wrap(run))
+        if control.enqueue(http_method, waiter):
+            self.admission_state = 'queued'
+            self.admission_waiter = waiter
+        else:
+            self.shed_load(control.retry_after)
+
+    return wrapper
@@ -0,0 +1,135 @@
+import random
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import tornado.web
+
+
+class AllocationTrackingUnavailable(Exception):
+    pass
+
+
+class AllocationTracker(object):
+    """ tracks the memory allocated by a sample of the requests and still
+    allocated when they finish, aggregated by resource and method
+
+    A `sample_rate` fraction of the requests is tracked, as well as any
+    request with the `X-Allocation-Token` header equal to `token`. Tracing
+    is only enabled while a tracked request runs, one at a time, so the
+    other requests are not slowed down; allocations of the requests that
+    run in between can show up too. `frames` is the depth of the stack
+    recorded for each allocation site.
+    """
+
+    def __init__(self, sample_rate=0.0, token=None, frames=1, max_sites=100):
+        if tracemalloc is None:
+            raise AllocationTrackingUnavailable(
+                    'allocation tracking needs the tracemalloc module')
+        self.sample_rate = sample_rate
+        self.token = token
+        self.frames = frames
+        self.max_sites = max_sites
+        self.active = None
+        self.before = None
+        self.sites = {}
+        self.requests = {}
+        self.allocated = {}
+
+    def has_token(self, handler):
+        return self.token is not None and \
+                handler.request.headers.get('X-Allocation-Token') == self.token
+
+    def should_track(self, handler):
+        if self.active is not None:
+            return False
+        return self.has_token(handler) or random.random() < self.sample_rate
+
+    def start(self, handler):
+        self.active = handler
+        if tracemalloc.is_tracing():
+            self.before = tracemalloc.take_snapshot()
+        else:
+            self.before = None
+            tracemalloc.start(self.frames)
+
+    def stop(self, handler):
+        if self.active is not handler:
+            return
+        self.active = None
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)])
+        key_type = 'traceback' if self.frames > 1 else 'lineno'
+        if self.before is None:
+            tracemalloc.stop()
+            statistics = [(stat.traceback, stat.size, stat.count)
+                    for stat in snapshot.statistics(key_type)]
+        else:
+            statistics = [(stat.traceback, stat.size_diff, stat.count_diff)
+                    for stat in snapshot.compare_to(self.before, key_type)]
+            self.before = None
+        self.add(handler.resource_name, handler.request.method, statistics)
+
+    def add(self, resource, method, statistics):
+        key = (resource, method)
+        sites = self.sites.setdefault(key, {})
+        for traceback, size, count in statistics[:self.max_sites]:
+            site = site_label(traceback)
+            totals = sites.setdefault(site, [0, 0])
+            totals[0] += size
+            totals[1] += count
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.allocated[key] = self.allocated.get(key, 0) + \
+                sum(size for traceback, size, count in statistics)
+
+    def report(self, resource, method, limit=20):
+        key = (resource, method)
+        sites = self.sites.get(key)
+        if sites is None:
+            return None
+        requests = self.requests[key]
+        lines = ['{0} {1}: {2} requests, {3:.0f} bytes by request\n'.format(
+            resource, method, requests, self.allocated[key] / requests)]
+        top = sorted(sites.items(), key=lambda item: item[1][0],
+                reverse=True)[:limit]
+        for site, (size, count) in top:
+            lines.append('{0:>12.0f} B {1:>8.1f} blocks  {2}\n'.format(
+                size / requests, count / requests, site))
+        return ''.join(lines)
+
+    def summary(self):
+        return ''.join('{0} {1} {2} {3:.0f}\n'.format(resource, method,
+            count, self.allocated[(resource, method)] / count)
+            for (resource, method), count in sorted(self.requests.items()))
+
+
+def site_label(traceback):
+    return ' <- '.join('{0}:{1}'.format(frame.filename, frame.lineno)
+            for frame in reversed(list(traceback)))
+
+
+class AllocationsHandler(tornado.web.RequestHandler):
+    """ serves the reports, only to requests with the tracker token """
+
+    def initialize(self, tracker):
+        self.tracker = tracker
+
+    def get(self):
+        if not self.tracker.has_token(self):
+            raise tornado.web.HTTPError(403)
+        self.set_header('Content-Type', 'text/plain')
+        resource = self.get_argument('resource', None)
+        if resource is None:
+            self.finish(self.tracker.summary())
+            return
+        try:
+            limit = int(self.get_argument('limit', 20))
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+        report = self.tracker.report(resource,
+                self.get_argument('method', 'GET'), limit)
+        if report is None:
+            raise tornado.web.HTTPError(404)
+        self.finish(report)
@@ -0,0 +1,129 @@
+import json
+import time
+import base64
+import random
+from collections import deque
+
+from tornado.ioloop import IOLoop
+
+
+SENSITIVE_HEADERS = ('Authorization', 'Cookie', 'X-Api-Key',
+        'X-Profile-Token', 'X-Server-Timing-Token')
+SENSITIVE_ARGUMENTS = ('api_key', 'access_token', 'token')
+REDACTED = 'REDACTED'
+
+
+def redact_headers(*names):
+    """ redaction hook that hides the value of the given headers """
+    names = set(name.lower() for name in names)
+
+    def redact(record):
+        for name in record['headers']:
+            if name.lower() in names:
+                record['headers'][name] = REDACTED
+        return record
+    return redact
+
+
+def redact_arguments(*names):
+    """ redaction hook that hides the value of the given query arguments
+    in the uri """
+    names = set(name.lower() for name in names)
+
+    def redact(record):
+        path, _, query = record['uri'].partition('?')
+        if not query:
+            return record
+        arguments = []
+        for argument in query.split('&'):
+            name, equals, value = argument.partition('=')
+            if equals and name.lower() in names:
+                argument = name + '=' + REDACTED
+            arguments.append(argument)
+        record['uri'] = path + '?' + '&'.join(arguments)
+        return record
+    return redact
+
+
+class TrafficRecorder(object):
+    """ records a sample of the requests to an append-only file, one JSON
+    object by line, to be played back by `benchmarks.replay`
+
+    Each record goes through the `redact` hooks, functions that receive
+    the record and return it changed, or None to drop it. By default the
+    sensitive headers and query arguments are redacted. Records are
+    buffered and appended to the file by an IOLoop callback every
+    `flush_interval` seconds: the write is blocking file I/O done on the
+    IOLoop, which stalls the worker for its duration, so keep the file on
+    a local disk and the sample small.
+    """
+
+    def __init__(self, path, sample_rate=1.0, redact=None,
+            flush_interval=1.0, max_buffer=1000, io_loop=None):
+        self.path = path
+        self.sample_rate = sample_rate
+        if redact is None:
+            redact = [redact_headers(*SENSITIVE_HEADERS),
+                    redact_arguments(*SENSITIVE_ARGUMENTS)]
+        self.redact = redact
+        self.flush_interval = flush_interval
+        self.records = deque(maxlen=max_buffer)
+        self.io_loop = io_loop
+        self.flush_scheduled = False
+
+    def observe(self, handler, duration):
+        if random.random() >= self.sample_rate:
+            return
+        record = self.build_record(handler, duration)
+        for hook in self.redact:
+            record = hook(record)
+            if record is None:
+                return
+        self.records.append(record)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            io_loop = self.io_loop or IOLoop.instance()
+            io_loop.add_timeout(time.time() + self.flush_interval, self.flush)
+
+    def build_record(self, handler, duration):
+        request = handler.request
+        record = {
+            'time': request._start_time,
+            'method': request.method,
+            'uri': request.uri,
+            'headers': dict(request.headers),
+            'status': handler.get_status(),
+            'duration': duration,
+        }
+        body = handler.get_raw_body()
+        if body:
+            try:
+                record['body'] = body.decode('utf-8')
+            except UnicodeDecodeError:
+                record['body_base64'] = \
+                        base64.b64encode(body).decode('ascii')
+        return record
+
+    def flush(self):
+        self.flush_scheduled = False
+        if not self.records:
+            return
+        lines = []
+        while self.records:
+            lines.append(json.dumps(self.records.popleft(),
+                separators=(',', ':'), sort_keys=True))
+        with open(self.path, 'a') as capture:
+            capture.write('\n'.join(lines) + '\n')
+
+
+def read_capture(path):
+    """ the records of a capture file, in the order they were written """
+    with open(path) as capture:
+        for line in capture:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'body_base64' in record:
+                record['body'] = base64.b64decode(record.pop('body_base64'))
+            yield record
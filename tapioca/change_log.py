@@ -0,0 +1,187 @@
+import os
+import json
+import uuid
+from bisect import bisect_right
+
+
+class ChangesExpired(Exception):
+    pass
+
+
+class InvalidSinceToken(Exception):
+    pass
+
+
+class MemoryChangeLog(object):
+    """ the keys created, updated and deleted in each resource, to answer
+    the `since=<token>` queries of the collections
+
+    It is a change listener: `TornadoRESTful(change_log=MemoryChangeLog())`
+    feeds it with the successful writes. A token is the epoch of the log
+    and the number of the last change it covers; the last `max_entries`
+    changes of each resource are kept, older tokens and tokens of another
+    epoch (a restarted process) are expired. A change without key (a POST
+    that did not tell its Location, a DELETE of the whole collection) is
+    not logged, it expires the earlier tokens of its resource instead.
+
+    A forked worker starts an epoch of its own, so a token handed out by
+    another worker is expired rather than answered with unrelated keys.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.pid = os.getpid()
+        self.epoch = uuid.uuid4().hex[:12]
+        self.last_seq = 0
+        self.seqs = {}
+        self.entries = {}
+        self.truncated = {}
+
+    def check_process(self):
+        """ start a new epoch in a process forked after the log was built """
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.epoch = uuid.uuid4().hex[:12]
+
+    def __call__(self, resource, action, key, content=None):
+        self.check_process()
+        self.last_seq += 1
+        self.append(resource, self.last_seq, action, key)
+
+    def append(self, resource, seq, action, key):
+        if key is None:
+            self.truncated[resource] = seq
+            self.seqs.pop(resource, None)
+            self.entries.pop(resource, None)
+            return
+        seqs = self.seqs.setdefault(resource, [])
+        entries = self.entries.setdefault(resource, [])
+        seqs.append(seq)
+        entries.append((action, key))
+        if len(seqs) > self.max_entries:
+            drop = len(seqs) - self.max_entries // 2
+            self.truncated[resource] = seqs[drop - 1]
+            del seqs[:drop]
+            del entries[:drop]
+
+    def token(self, seq=None):
+        self.check_process()
+        if seq is None:
+            seq = self.last_seq
+        return '{0}.{1}'.format(self.epoch, seq)
+
+    def parse_token(self, token):
+        epoch, _, seq = token.partition('.')
+        if not seq.isdigit():
+            raise InvalidSinceToken(token)
+        self.check_process()
+        if epoch != self.epoch:
+            raise ChangesExpired(token)
+        return int(seq)
+
+    def changes_since(self, resource, token):
+        """ the keys changed and deleted in resource after token, and the
+        token that covers them """
+        seq = self.parse_token(token)
+        if seq > self.last_seq:
+            raise InvalidSinceToken(token)
+        if seq < self.truncated.get(resource, 0):
+            raise ChangesExpired(token)
+        seqs = self.seqs.get(resource, [])
+        entries = self.entries.get(resource, [])
+        last = {}
+        for index in range(bisect_right(seqs, seq), len(entries)):
+            action, key = entries[index]
+            last[key] = (index, action)
+        changed = []
+        deleted = []
+        for key, (index, action) in sorted(last.items(),
+                key=lambda item: item[1][0]):
+            if action == 'deleted':
+                deleted.append(key)
+            else:
+                changed.append(key)
+        return changed, deleted, self.token()
+
+    def close(self):
+        """ nothing to release, the changes only live in memory """
+
+
+class FileChangeLog(MemoryChangeLog):
+    """ a change log kept in memory and appended to a file, so its tokens
+    survive restarts. The file belongs to one process, it is rewritten
+    with the retained changes when it has `max_entries` changes more; a
+    process forked after the log was opened can not use it, so serve the
+    api with `processes=1`.
+
+    Each change is written and flushed by the change listeners, once the
+    response of its write was sent. The IOLoop does nothing else
+    meanwhile, so a later request never gets a token for a change the
+    file does not have, but a crash between the response and the write
+    loses the change. It is blocking I/O on the IOLoop, a system call per
+    write and, at every rewrite, the whole log: keep the file on a local
+    disk, or use a MemoryChangeLog when tokens may expire on restarts.
+    """
+
+    def __init__(self, path, max_entries=100000):
+        super(FileChangeLog, self).__init__(max_entries)
+        self.path = path
+        self.file = None
+        self.lines = 0
+        if os.path.exists(path):
+            self.load()
+        self.rewrite()
+
+    def load(self):
+        """ read the changes of the file, up to a line cut by a crash """
+        with open(self.path) as log:
+            header = json.loads(log.readline())
+            self.epoch = header['epoch']
+            self.truncated = header.get('truncated', {})
+            self.last_seq = header.get('last_seq', 0)
+            for line in log:
+                try:
+                    seq, resource, action, key = json.loads(line)
+                except ValueError:
+                    break
+                self.append(resource, seq, action, key)
+                self.last_seq = max(self.last_seq, seq)
+
+    def check_process(self):
+        if self.pid != os.getpid():
+            raise RuntimeError(
+                'a FileChangeLog can not be shared by forked processes')
+
+    def __call__(self, resource, action, key, content=None):
+        super(FileChangeLog, self).__call__(resource, action, key, content)
+        self.file.write(json.dumps([self.last_seq, resource, action, key]))
+        self.file.write('\n')
+        self.file.flush()
+        self.lines += 1
+        if self.lines > self.retained() + self.max_entries:
+            self.rewrite()
+
+    def retained(self):
+        return sum(len(seqs) for seqs in self.seqs.values())
+
+    def rewrite(self):
+        """ write the retained changes to a new file that replaces the log """
+        if self.file is not None:
+            self.file.close()
+        changes = []
+        for resource, seqs in self.seqs.items():
+            for seq, (action, key) in zip(seqs, self.entries[resource]):
+                changes.append((seq, resource, action, key))
+        temporary = '{0}.tmp'.format(self.path)
+        with open(temporary, 'w') as log:
+            log.write(json.dumps({'epoch': self.epoch,
+                'truncated': self.truncated,
+                'last_seq': self.last_seq}) + '\n')
+            for change in sorted(changes):
+                log.write(json.dumps(list(change)) + '\n')
+        os.rename(temporary, self.path)
+        self.lines = len(changes)
+        self.file = open(self.path, 'a')
+
+    def close(self):
+        self.file.close()
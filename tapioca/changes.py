@@ -0,0 +1,196 @@
+from collections import deque
+
+import tornado.web
+from tornado.ioloop import IOLoop, PeriodicCallback
+
+from tapioca.serializers import JsonEncoder
+from tapioca.cors import EXPOSED_HEADERS
+
+
+# the change notified by tapioca after a successful write, by HTTP method
+CHANGE_ACTIONS = {
+    'POST': 'created',
+    'PUT': 'updated',
+    'PATCH': 'updated',
+    'DELETE': 'deleted',
+}
+
+HEARTBEAT = ': heartbeat\n\n'
+
+
+def format_event(event_id, event, data):
+    lines = ['id: {0}\n'.format(event_id), 'event: {0}\n'.format(event)]
+    for line in data.split('\n'):
+        lines.append('data: {0}\n'.format(line))
+    lines.append('\n')
+    return ''.join(lines)
+
+
+class ChangeFeed(object):
+    """ pushes the changes of resources to server-sent event streams
+
+    It is a change listener: `TornadoRESTful(change_feed=ChangeFeed())`
+    serves the stream of each resource at `/<resource>/<path>`. Streams go
+    through the rate limit of their resource and are only opened for the
+    requests `authorize` accepts: a function that receives the
+    ChangesHandler and returns whether it can listen, every stream is
+    refused without one. Each event is encoded once, with the key and the
+    action of the change, and its content when `include_content` is set.
+    The last `history` events are kept so a client can resume after its
+    `Last-Event-ID`. A stream that has more than `buffer_size` events
+    waiting to be written is finished, its client reconnects and resumes.
+    Every `heartbeat` seconds a comment is sent to keep idle streams open
+    through proxies. A feed only sees the changes of its own process, the
+    streams of a worker miss the writes served by the others.
+    """
+
+    def __init__(self, history=1000, buffer_size=100, heartbeat=15,
+            retry=3000, io_loop=None, authorize=None, include_content=False,
+            path='changes'):
+        self.events = deque(maxlen=history)
+        self.buffer_size = buffer_size
+        self.heartbeat = heartbeat
+        self.retry = retry
+        self.io_loop = io_loop
+        self.authorize = authorize
+        self.include_content = include_content
+        self.path = path
+        self.last_id = 0
+        self.streams = {}
+        self.heartbeats = None
+        self.encoder = JsonEncoder(None)
+
+    def __call__(self, resource, action, key, content=None):
+        self.publish(resource, action, key, content)
+
+    def publish(self, resource, action, key, content=None):
+        self.last_id += 1
+        change = {'key': key, 'action': action}
+        if self.include_content:
+            change['content'] = content
+        data = self.encoder.encode(change)
+        event = (self.last_id, resource,
+                format_event(self.last_id, action, data))
+        self.events.append(event)
+        for stream in list(self.streams.get(resource, ())):
+            stream.push(event[2])
+
+    def subscribe(self, stream, resource, last_event_id=None):
+        """ add stream to the listeners of resource, first pushing the
+        events it missed since last_event_id """
+        if self.retry is not None:
+            stream.push('retry: {0}\n\n'.format(self.retry))
+        if last_event_id is not None:
+            oldest = self.events[0][0] if self.events else self.last_id + 1
+            if last_event_id + 1 < oldest:
+                stream.push(format_event(self.last_id, 'reset', 'null'))
+            else:
+                for event_id, event_resource, event in self.events:
+                    if event_id > last_event_id and event_resource == resource:
+                        stream.push(event)
+        self.streams.setdefault(resource, set()).add(stream)
+        if self.heartbeats is None and self.heartbeat:
+            self.heartbeats = PeriodicCallback(self.send_heartbeats,
+                    self.heartbeat * 1000,
+                    io_loop=self.io_loop or IOLoop.instance())
+            self.heartbeats.start()
+
+    def unsubscribe(self, stream, resource):
+        streams = self.streams.get(resource)
+        if streams is not None:
+            streams.discard(stream)
+            if not streams:
+                del self.streams[resource]
+        if not self.streams and self.heartbeats is not None:
+            self.heartbeats.stop()
+            self.heartbeats = None
+
+    def send_heartbeats(self):
+        for streams in list(self.streams.values()):
+            for stream in list(streams):
+                stream.push(HEARTBEAT)
+
+    def stream_count(self):
+        return sum(len(streams) for streams in self.streams.values())
+
+
+class ChangesHandler(tornado.web.RequestHandler):
+
+    def initialize(self, feed, resource, handler=None):
+        self.feed = feed
+        self.resource = resource
+        self.resource_handler = handler
+        self.queue = []
+        self.writing = False
+        self.subscribed = False
+
+    def set_cross_origin(self):
+        if getattr(self.resource_handler, 'cross_origin_enabled', False):
+            self.set_header('Access-Control-Allow-Origin', '*')
+            self.set_header('Access-Control-Expose-Headers',
+                    ', '.join(EXPOSED_HEADERS))
+
+    def prepare(self):
+        self.set_cross_origin()
+        rate_limit = getattr(self.resource_handler, 'rate_limit', None)
+        if rate_limit is not None:
+            rate_limit.apply(self)
+            if self._finished:
+                return
+        if self.feed.authorize is None or not self.feed.authorize(self):
+            raise tornado.web.HTTPError(403)
+
+    def last_event_id(self):
+        value = self.request.headers.get('Last-Event-ID',
+                self.get_argument('lastEventId', None))
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+
+    @tornado.web.asynchronous
+    def get(self):
+        last_event_id = self.last_event_id()
+        self.set_header('Content-Type', 'text/event-stream')
+        self.set_header('Cache-Control', 'no-cache')
+        self.subscribed = True
+        self.feed.subscribe(self, self.resource, last_event_id)
+        if not self.writing:
+            self.flush()
+
+    def push(self, data):
+        """ queue data, written as soon as the previous write is done """
+        if self._finished:
+            return
+        self.queue.append(data)
+        if len(self.queue) > self.feed.buffer_size:
+            self.close_stream()
+        elif not self.writing:
+            self.write_queue()
+
+    def write_queue(self):
+        if not self.queue or self._finished:
+            self.writing = False
+            return
+        self.writing = True
+        self.write(''.join(self.queue))
+        self.queue = []
+        self.flush(callback=self.write_queue)
+
+    def close_stream(self):
+        self.queue = []
+        self.unsubscribe()
+        self.finish()
+
+    def unsubscribe(self):
+        if self.subscribed:
+            self.subscribed = False
+            self.feed.unsubscribe(self, self.resource)
+
+    def on_connection_close(self):
+        self.unsubscribe()
+
+    def on_finish(self):
+        self.unsubscribe()
@@ -0,0 +1,353 @@
+""" asynchronous client of tapioca apis, driven by their specification
+
+    def on_comment(response):
+        print(response.data)
+
+    client = Client('http://localhost:8888', api.get_spec())
+    client.resource('comments').get('1', on_comment)
+
+`Client.discover` builds the client from the Swagger discovery documents
+of a running api instead.
+"""
+import json
+from collections import deque
+
+try:
+    from urllib import urlencode
+except ImportError:
+    from urllib.parse import urlencode
+
+from tornado.ioloop import IOLoop
+from tornado.httpclient import AsyncHTTPClient
+
+try:
+    from tornado.curl_httpclient import CurlAsyncHTTPClient
+except ImportError:
+    CurlAsyncHTTPClient = None
+
+from tapioca.serializers import JsonEncoder
+from tapioca.spec import APISpecification, Resource, Path, Method, Param
+from tapioca.request import ParamRequiredError, InvalidParamError
+
+
+class OperationNotSupported(Exception):
+    pass
+
+
+class DiscoveryError(Exception):
+    pass
+
+
+class Response(object):
+    __slots__ = ('code', 'data', 'location', 'etag', 'error', 'cached')
+
+    def __init__(self, code, data=None, location=None, etag=None,
+            error=None, cached=False):
+        self.code = code
+        self.data = data
+        self.location = location
+        self.etag = etag
+        self.error = error
+        self.cached = cached
+
+
+class EtagCache(object):
+    """ last representation of each url with its ETag, the oldest entries
+    are dropped after `max_entries` """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.entries = {}
+        self.order = deque()
+
+    def get(self, url):
+        return self.entries.get(url)
+
+    def set(self, url, etag, data):
+        if url not in self.entries:
+            self.order.append(url)
+            if len(self.order) > self.max_entries:
+                self.entries.pop(self.order.popleft(), None)
+        self.entries[url] = (etag, data)
+
+    def discard(self, url):
+        if self.entries.pop(url, None) is not None:
+            self.order.remove(url)
+
+
+def build_http_client(io_loop, max_clients):
+    """ curl keeps the connections alive between requests, the simple
+    client opens one for each request """
+    if CurlAsyncHTTPClient is not None:
+        return CurlAsyncHTTPClient(io_loop, max_clients=max_clients,
+                force_instance=True)
+    return AsyncHTTPClient(io_loop, max_clients=max_clients,
+            force_instance=True)
+
+
+class Client(object):
+
+    def __init__(self, base_url, spec, encoder=JsonEncoder, io_loop=None,
+            max_clients=10, etag_cache=True, http_client=None):
+        self.base_url = base_url.rstrip('/')
+        self.spec = spec
+        self.encoder = encoder(None)
+        self.io_loop = io_loop or IOLoop.instance()
+        self.http_client = http_client or build_http_client(self.io_loop,
+                max_clients)
+        self.etag_cache = EtagCache() if etag_cache else None
+        self.resources = dict((resource.name, ResourceClient(self, resource))
+                for resource in spec.resources)
+
+    @classmethod
+    def discover(cls, base_url, callback, errback=None, **kwargs):
+        """ build the client from the discovery routes of base_url and
+        pass it to callback, or pass a DiscoveryError to errback (callback
+        when there is none) if the documents could not be loaded """
+        Discovery(cls, base_url, callback, kwargs, errback).start()
+
+    def resource(self, name):
+        try:
+            return self.resources[name]
+        except KeyError:
+            raise OperationNotSupported('no resource {0}'.format(name))
+
+    def __getattr__(self, name):
+        resources = self.__dict__.get('resources', {})
+        if name in resources:
+            return resources[name]
+        raise AttributeError(name)
+
+    def request(self, method, path, callback, querystring=None, data=None):
+        url = self.base_url + path
+        if querystring:
+            url = '{0}?{1}'.format(url, urlencode(querystring))
+        headers = {'Accept': self.encoder.mimetype}
+        body = None
+        if data is not None:
+            headers['Content-Type'] = self.encoder.mimetype
+            body = self.encoder.encode(data)
+        cached = None
+        if method == 'GET' and self.etag_cache is not None:
+            cached = self.etag_cache.get(url)
+            if cached is not None:
+                headers['If-None-Match'] = cached[0]
+
+        def on_response(response):
+            callback(self.build_response(method, url, response, cached))
+
+        self.http_client.fetch(url, on_response, method=method,
+                headers=headers, body=body)
+
+    def build_response(self, method, url, response, cached):
+        etag = response.headers.get('Etag')
+        if response.code == 304 and cached is not None:
+            return Response(304, cached[1], etag=cached[0], cached=True)
+        if response.error and response.code >= 400 or response.code == 599:
+            if self.etag_cache is not None:
+                self.etag_cache.discard(url)
+            return Response(response.code, error=response.error)
+        data = None
+        if response.body:
+            data = self.encoder.decode(response.body.decode('utf-8'))
+        if self.etag_cache is not None:
+            if method == 'GET' and etag:
+                self.etag_cache.set(url, etag, data)
+            elif method != 'GET':
+                self.etag_cache.discard(url)
+        return Response(response.code, data,
+                location=response.headers.get('Location'), etag=etag)
+
+
+class ResourceClient(object):
+    """ the operations of a resource, with their querystring validated
+    against the params of the spec """
+
+    def __init__(self, client, resource):
+        self.client = client
+        self.name = resource.name
+        self.path = '/{0}'.format(resource.name)
+        self.collection_methods = {}
+        self.instance_methods = {}
+        for path in resource.paths:
+            if path.name == self.path:
+                self.collection_methods = self.methods_of(path)
+            elif path.name == '{0}/{{key}}'.format(self.path):
+                self.instance_methods = self.methods_of(path)
+
+    def methods_of(self, path):
+        return dict((method.name, method) for method in path.methods)
+
+    def method(self, methods, name):
+        try:
+            return methods[name]
+        except KeyError:
+            raise OperationNotSupported('{0} {1} is not supported'.format(
+                name, self.path))
+
+    def validate(self, method, querystring):
+        params = dict((param.name, param) for param in method.params or []
+                if param.style == 'querystring')
+        for name in querystring:
+            if name not in params:
+                raise InvalidParamError(name)
+        for param in params.values():
+            if param.required and param.name not in querystring:
+                raise ParamRequiredError(param.name)
+        return querystring
+
+    def instance_path(self, key):
+        return '{0}/{1}'.format(self.path, key)
+
+    def list(self, callback, **querystring):
+        method = self.method(self.collection_methods, 'GET')
+        self.client.request('GET', self.path, callback,
+                self.validate(method, querystring))
+
+    def get(self, key, callback, **querystring):
+        method = self.method(self.instance_methods, 'GET')
+        self.client.request('GET', self.instance_path(key), callback,
+                self.validate(method, querystring))
+
+    def create(self, data, callback, **querystring):
+        method = self.method(self.collection_methods, 'POST')
+        self.client.request('POST', self.path, callback,
+                self.validate(method, querystring), data)
+
+    def update(self, key, data, callback, **querystring):
+        method = self.method(self.instance_methods, 'PUT')
+        self.client.request('PUT', self.instance_path(key), callback,
+                self.validate(method, querystring), data)
+
+    def delete(self, key, callback, **querystring):
+        method = self.method(self.instance_methods, 'DELETE')
+        self.client.request('DELETE', self.instance_path(key), callback,
+                self.validate(method, querystring))
+
+    def bulk_get(self, keys, callback, **querystring):
+        """ get the models concurrently, callback receives the responses
+        in the order of keys """
+        self.bulk([(self.get, (key,)) for key in keys], callback, querystring)
+
+    def bulk_create(self, items, callback, **querystring):
+        self.bulk([(self.create, (data,)) for data in items], callback,
+                querystring)
+
+    def bulk_update(self, items, callback, **querystring):
+        """ items are (key, data) pairs """
+        self.bulk([(self.update, item) for item in items], callback,
+                querystring)
+
+    def bulk_delete(self, keys, callback, **querystring):
+        self.bulk([(self.delete, (key,)) for key in keys], callback,
+                querystring)
+
+    def bulk(self, calls, callback, querystring):
+        responses = [None] * len(calls)
+        pending = [len(calls)]
+        if not calls:
+            callback(responses)
+            return
+
+        def done(index):
+            def on_response(response):
+                responses[index] = response
+                pending[0] -= 1
+                if pending[0] == 0:
+                    callback(responses)
+            return on_response
+
+        for index, (operation, args) in enumerate(calls):
+            operation(*(args + (done(index),)), **querystring)
+
+
+def spec_from_swagger(documents):
+    """ the APISpecification described by the Swagger documents of each
+    resource, by resource name """
+    spec = APISpecification()
+    for name, document in sorted(documents.items()):
+        resource = Resource(name)
+        for api in document['apis']:
+            params = []
+            methods = []
+            for operation in api['operations']:
+                query_params = []
+                for parameter in operation['parameters']:
+                    if parameter['paramType'] == 'query':
+                        query_params.append(Param(parameter['name'],
+                            style='querystring',
+                            required=parameter['required']))
+                    elif operation is api['operations'][0]:
+                        params.append(Param(parameter['name'], style='url'))
+                methods.append(Method(operation['httpMethod'],
+                    params=query_params))
+            resource.add_path(Path(api['path'], params=params,
+                methods=methods))
+        spec.add_resource(resource)
+    return spec
+
+
+class Discovery(object):
+
+    def __init__(self, client_class, base_url, callback, kwargs,
+            errback=None):
+        self.client_class = client_class
+        self.base_url = base_url.rstrip('/')
+        self.callback = callback
+        self.errback = errback or callback
+        self.kwargs = kwargs
+        self.http_client = AsyncHTTPClient(kwargs.get('io_loop'),
+                force_instance=True)
+        self.documents = {}
+        self.pending = 0
+        self.failed = False
+
+    def start(self):
+        self.http_client.fetch(self.base_url + '/discovery.swagger',
+                self.on_index)
+
+    def load(self, response):
+        """ the decoded document, or None after reporting the error """
+        if self.failed:
+            return None
+        if response.error:
+            return self.fail('could not fetch {0}: {1}'.format(
+                response.request.url, response.error))
+        try:
+            return json.loads(response.body.decode('utf-8'))
+        except ValueError as e:
+            return self.fail('invalid document at {0}: {1}'.format(
+                response.request.url, e))
+
+    def fail(self, message):
+        self.failed = True
+        self.http_client.close()
+        self.errback(DiscoveryError(message))
+
+    def on_index(self, response):
+        index = self.load(response)
+        if index is None:
+            return
+        self.pending = len(index['apis'])
+        if not self.pending:
+            self.finish()
+        for api in index['apis']:
+            name = api['path'][len('/discovery/'):-len('.swagger')]
+            self.http_client.fetch(self.base_url + api['path'],
+                    self.on_resource(name))
+
+    def on_resource(self, name):
+        def on_response(response):
+            document = self.load(response)
+            if document is None:
+                return
+            self.documents[name] = document
+            self.pending -= 1
+            if self.pending == 0:
+                self.finish()
+        return on_response
+
+    def finish(self):
+        spec = spec_from_swagger(self.documents)
+        self.http_client.close()
+        self.callback(self.client_class(self.base_url, spec, **self.kwargs))
@@ -0,0 +1,96 @@
+import zlib
+
+
+SUPPORTED_ENCODINGS = ('gzip', 'deflate')
+
+
+class UnsupportedEncoding(Exception):
+    pass
+
+
+class DecompressedBodyTooLarge(Exception):
+    pass
+
+
+class InvalidCompressedBody(Exception):
+    pass
+
+
+def decompressor(encoding):
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return zlib.decompressobj()
+    raise UnsupportedEncoding(encoding)
+
+
+def inflate(decompressor, body, limit=None):
+    """ decompress body, giving up as soon as it gets over limit bytes """
+    if limit is None:
+        data = decompressor.decompress(body)
+        check_complete(decompressor)
+        return data + decompressor.flush()
+    chunks = []
+    size = 0
+    data = body
+    while data:
+        chunk = decompressor.decompress(data, limit + 1 - size)
+        size += len(chunk)
+        if size > limit:
+            raise DecompressedBodyTooLarge(limit)
+        chunks.append(chunk)
+        data = decompressor.unconsumed_tail
+    check_complete(decompressor)
+    chunk = decompressor.flush()
+    if size + len(chunk) > limit:
+        raise DecompressedBodyTooLarge(limit)
+    chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def check_complete(decompressor):
+    """ a truncated stream is not an error for zlib, and `eof` only exists
+    on Python 3.3 or later: once the end of the stream was seen any data
+    fed to the decompressor is left in unused_data, so feed a byte to a
+    copy of it """
+    if decompressor.unused_data:
+        return
+    probe = decompressor.copy()
+    probe.decompress(b'\x00')
+    if not probe.unused_data:
+        raise zlib.error('incomplete compressed body')
+
+
+def decompress(body, content_encoding, max_size=None, max_ratio=None,
+        encodings=SUPPORTED_ENCODINGS):
+    """ undo the encodings of a Content-Encoding header, refusing bodies
+    that decompress to more than max_size bytes or max_ratio times their
+    compressed size
+
+    Both limits apply to the size of each decoded layer, the ratio against
+    the size of the body as received, so stacking encodings does not
+    multiply it.
+    """
+    limit = max_size
+    if max_ratio is not None:
+        ratio_limit = max(len(body), 1) * max_ratio
+        limit = ratio_limit if limit is None else min(limit, ratio_limit)
+    for encoding in reversed(content_encoding.lower().split(',')):
+        encoding = encoding.strip()
+        if encoding in ('', 'identity'):
+            continue
+        if encoding not in encodings and \
+                not (encoding == 'x-gzip' and 'gzip' in encodings):
+            raise UnsupportedEncoding(encoding)
+        try:
+            body = inflate(decompressor(encoding), body, limit)
+        except zlib.error:
+            if encoding != 'deflate':
+                raise InvalidCompressedBody(encoding)
+            # some clients send deflate without the zlib header
+            try:
+                body = inflate(zlib.decompressobj(-zlib.MAX_WBITS), body,
+                        limit)
+            except zlib.error:
+                raise InvalidCompressedBody(encoding)
+    return body
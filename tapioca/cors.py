@@ -0,0 +1,25 @@
+ALLOWED_HEADERS = ('Accept', 'Content-Type', 'Content-Encoding',
+        'If-None-Match', 'X-Api-Key', 'X-Requested-With')
+
+# the response headers, besides the simple ones, scripts can read
+EXPOSED_HEADERS = ('ETag', 'Location', 'Retry-After', 'X-RateLimit-Limit',
+        'X-RateLimit-Remaining', 'X-RateLimit-Reset')
+
+# a day, browsers cap it anyway (Chrome at 2 hours, Firefox at a day)
+DEFAULT_MAX_AGE = 86400
+
+
+def preflight_headers(methods, max_age=DEFAULT_MAX_AGE,
+        allowed_headers=ALLOWED_HEADERS):
+    """ the headers of the answer to a preflight of an url that handles
+    methods, as (name, value) pairs, or None when methods is empty """
+    if not methods:
+        return None
+    headers = [
+        ('Access-Control-Allow-Origin', '*'),
+        ('Access-Control-Allow-Methods', ', '.join(sorted(methods))),
+        ('Access-Control-Allow-Headers', ', '.join(allowed_headers)),
+    ]
+    if max_age is not None:
+        headers.append(('Access-Control-Max-Age', str(int(max_age))))
+    return tuple(headers)
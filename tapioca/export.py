@@ -0,0 +1,87 @@
+""" writes the discovery documents of an api to static files
+
+    tapioca-export myapp.api:api --output public --gzip
+
+The files are laid out like the discovery routes (discovery.swagger,
+discovery/<resource>.swagger and discovery.wadl), so a static file server
+can serve them in place of the api workers.
+"""
+import os
+import sys
+import gzip
+from optparse import OptionParser
+
+from tapioca.spec import discovery_documents as spec_documents
+
+
+def load_api(target):
+    """ the api named by 'package.module:attribute', where the attribute
+    is a TornadoRESTful or a function that returns one """
+    if ':' not in target:
+        raise ValueError('expected module:attribute, got {0}'.format(target))
+    module_name, attribute = target.split(':', 1)
+    __import__(module_name)
+    api = getattr(sys.modules[module_name], attribute)
+    if callable(api):
+        api = api()
+    return api
+
+
+def discovery_documents(spec):
+    """ (relative path, content) of each discovery document """
+    for (format, resource), content in spec_documents(spec):
+        if resource is None:
+            yield 'discovery.{0}'.format(format), content
+        else:
+            yield os.path.join('discovery',
+                    '{0}.{1}'.format(resource, format)), content
+
+
+def write_file(path, content, compress=False):
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    output = open(path, 'wb')
+    try:
+        output.write(content)
+    finally:
+        output.close()
+    if compress:
+        output = gzip.open(path + '.gz', 'wb')
+        try:
+            output.write(content)
+        finally:
+            output.close()
+
+
+def export(spec, directory, compress=False):
+    """ write the discovery documents of spec, return their paths """
+    paths = []
+    for name, content in discovery_documents(spec):
+        path = os.path.join(directory, name)
+        write_file(path, content, compress)
+        paths.append(path)
+    return paths
+
+
+def main(args=None):
+    parser = OptionParser(usage='%prog [options] module:api')
+    parser.add_option('-o', '--output', default='.',
+            help='directory to write the documents to')
+    parser.add_option('-z', '--gzip', action='store_true', default=False,
+            help='also write a gzipped copy of each document')
+    options, arguments = parser.parse_args(args)
+    if len(arguments) != 1:
+        parser.error('the api to export is needed, e.g. myapp.api:api')
+
+    sys.path.insert(0, os.getcwd())
+    api = load_api(arguments[0])
+    for path in export(api.get_spec(), options.output, options.gzip):
+        print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import sys
+import json
+import time
+import logging
+import threading
+import traceback
+from collections import deque
+
+from tornado.ioloop import IOLoop, PeriodicCallback
+
+from tapioca.metrics import Histogram
+
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+        5.0, 10.0)
+
+
+def find_handler(frame):
+    """ the resource handler running in frame or in one of its callers """
+    while frame is not None:
+        candidate = frame.f_locals.get('self')
+        if getattr(candidate, 'resource_name', None) is not None and \
+                hasattr(candidate, 'request'):
+            return candidate
+        frame = frame.f_back
+    return None
+
+
+class LoopLagMonitor(object):
+    """ measures how late the IOLoop runs a callback scheduled every
+    `interval` seconds
+
+    The lag is observed in `histogram`, which is the
+    `tapioca_ioloop_lag_seconds` histogram of `registry` when one is given.
+    A watchdog thread checks the loop and, when it is blocked for more than
+    `threshold` seconds, captures the stack of the loop thread and the
+    resource and method of the handler running on it. The last
+    `max_reports` of those are kept in `reports` and logged to the
+    `tapioca.loop_lag` logger.
+    """
+
+    metric = 'tapioca_ioloop_lag_seconds'
+
+    def __init__(self, interval=0.1, threshold=0.25, registry=None,
+            logger=None, max_reports=100):
+        self.interval = interval
+        self.threshold = threshold
+        self.registry = registry
+        self.logger = logger or logging.getLogger('tapioca.loop_lag')
+        self.reports = deque(maxlen=max_reports)
+        self.histogram = None
+        self.periodic = None
+        self.watchdog = None
+        self.running = False
+        self.loop_thread = None
+        self.last_tick = None
+        self.reported_tick = None
+
+    def start(self, io_loop=None):
+        """ start monitoring io_loop, to be called from the loop thread """
+        io_loop = io_loop or IOLoop.instance()
+        if self.registry is not None:
+            self.registry.describe(self.metric,
+                    'Delay of the IOLoop to run a scheduled callback.')
+            self.histogram = self.registry.histogram(self.metric, (),
+                    LAG_BUCKETS)
+        else:
+            self.histogram = Histogram(LAG_BUCKETS)
+        self.loop_thread = threading.current_thread().ident
+        self.last_tick = time.time()
+        self.running = True
+        self.periodic = PeriodicCallback(self.tick, self.interval * 1000,
+                io_loop=io_loop)
+        self.periodic.start()
+        self.watchdog = threading.Thread(target=self.watch,
+                name='tapioca-loop-lag')
+        self.watchdog.daemon = True
+        self.watchdog.start()
+
+    def stop(self):
+        self.running = False
+        if self.periodic is not None:
+            self.periodic.stop()
+            self.periodic = None
+
+    def tick(self):
+        now = time.time()
+        lag = max(now - self.last_tick - self.interval, 0.0)
+        self.last_tick = now
+        self.histogram.observe(lag)
+
+    def watch(self):
+        while self.running:
+            time.sleep(min(self.interval, self.threshold) / 2)
+            last_tick = self.last_tick
+            blocked = time.time() - last_tick - self.interval
+            if blocked > self.threshold and last_tick != self.reported_tick:
+                self.reported_tick = last_tick
+                self.report(blocked)
+
+    def report(self, blocked):
+        frame = sys._current_frames().get(self.loop_thread)
+        if frame is None:
+            return
+        handler = find_handler(frame)
+        report = {
+            'blocked': blocked,
+            'resource': handler.resource_name if handler else None,
+            'method': handler.request.method if handler else None,
+            'stack': traceback.format_stack(frame),
+        }
+        del frame
+        self.reports.append(report)
+        self.logger.warning(json.dumps(report, sort_keys=True))
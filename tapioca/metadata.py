@@ -9,6 +9,8 @@ class Metadata(object):
     def add(self, path, handler):
         resource = Resource(path)
         basic_methods = list(self.get_basic_methods(handler))
+        self.describe_rate_limit(handler, basic_methods)
+        self.describe_content_encodings(handler, basic_methods)
         if basic_methods:
             resource.add_path(
                     Path('/{0}'.format(path), methods=basic_methods))
@@ -18,6 +20,8 @@ class Metadata(object):
                         methods=basic_methods))
 
         instance_methods = list(self.get_instance_methods(handler))
+        self.describe_rate_limit(handler, instance_methods)
+        self.describe_content_encodings(handler, instance_methods)
         if instance_methods:
             resource.add_path(
                     Path('/{0}/{{key}}'.format(path),
@@ -32,11 +36,31 @@ class Metadata(object):
                         methods=instance_methods))
         self.spec.add_resource(resource)
 
+    def get_allowed_methods(self, handler):
+        """ names of the methods of the collection and of the instance
+        urls of handler """
+        return ([method.name for method in self.get_basic_methods(handler)],
+                [method.name for method in self.get_instance_methods(handler)])
+
     def get_basic_methods(self, handler):
         return self.introspect_methods(
                 GET=handler.get_collection,
                 POST=handler.create_model)
 
+    def describe_rate_limit(self, handler, methods):
+        if getattr(handler, 'rate_limit', None) is None:
+            return
+        for method in methods:
+            method.rate_limit = handler.rate_limit.describe(method.name)
+
+    def describe_content_encodings(self, handler, methods):
+        encodings = getattr(handler, 'content_encodings', None)
+        if not encodings:
+            return
+        for method in methods:
+            if method.name in ('POST', 'PUT', 'PATCH'):
+                method.content_encodings = encodings
+
     def is_overridden(self, method):
         return not hasattr(method, 'original')
 
@@ -44,6 +68,7 @@ class Metadata(object):
         return self.introspect_methods(
                 GET=handler.get_model,
                 PUT=handler.update_model,
+                PATCH=handler.patch_model,
                 DELETE=handler.delete_model)
 
     def introspect_methods(self, **mapping):
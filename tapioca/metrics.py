@@ -0,0 +1,137 @@
+from bisect import bisect_left
+
+import tornado.web
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+        0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram(object):
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+PHASES = ('routing', 'negotiation', 'validation', 'handler', 'encode',
+        'write')
+
+
+class PhaseTimings(object):
+    """ how long each phase of a request took, in seconds """
+    __slots__ = ('durations',)
+
+    def __init__(self):
+        self.durations = {}
+
+    def add(self, phase, duration):
+        self.durations[phase] = self.durations.get(phase, 0.0) + duration
+
+    def get(self, phase, default=None):
+        return self.durations.get(phase, default)
+
+    def items(self):
+        return self.durations.items()
+
+    def server_timing(self):
+        """ value of a Server-Timing header, durations in milliseconds """
+        phases = [phase for phase in PHASES if phase in self.durations]
+        phases.extend(sorted(set(self.durations) - set(PHASES)))
+        return ', '.join('{0};dur={1:.3f}'.format(
+            phase, self.durations[phase] * 1000) for phase in phases)
+
+
+class MetricsRegistry(object):
+    """ histograms of request phases, labeled by resource and method """
+
+    phase_metric = 'tapioca_request_phase_seconds'
+    request_metric = 'tapioca_request_duration_seconds'
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.request_histograms = {}
+        self.descriptions = {
+            self.phase_metric: 'Time spent in each phase of a request.',
+            self.request_metric: 'Total time to handle a request.',
+        }
+
+    def describe(self, name, description):
+        self.descriptions[name] = description
+
+    def histogram(self, name, labels, buckets=None):
+        """ labels is a tuple of (label, value) pairs """
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(
+                    buckets or self.buckets)
+        return histogram
+
+    def observe(self, name, labels, value):
+        self.histogram(name, labels).observe(value)
+
+    def observe_request(self, resource, method, timings, duration):
+        histograms = self.request_histograms.get((resource, method))
+        if histograms is None:
+            histograms = self.request_histograms[(resource, method)] = {}
+        for phase, value in timings.items():
+            histogram = histograms.get(phase)
+            if histogram is None:
+                histogram = histograms[phase] = self.histogram(
+                        self.phase_metric, (('resource', resource),
+                            ('method', method), ('phase', phase)))
+            histogram.observe(value)
+
+        histogram = histograms.get(None)
+        if histogram is None:
+            histogram = histograms[None] = self.histogram(self.request_metric,
+                    (('resource', resource), ('method', method)))
+        histogram.observe(duration)
+
+    def to_prometheus(self):
+        lines = []
+        current_name = None
+        for (name, labels), histogram in sorted(self.histograms.items(),
+                key=lambda item: item[0]):
+            if name != current_name:
+                current_name = name
+                lines.append('# HELP {0} {1}'.format(
+                    name, self.descriptions.get(name, name)))
+                lines.append('# TYPE {0} histogram'.format(name))
+            labels_text = ','.join('{0}="{1}"'.format(label, value)
+                    for label, value in labels)
+            separator = ',' if labels_text else ''
+            for bound, count in histogram.cumulative_counts():
+                lines.append('{0}_bucket{{{1}{2}le="{3}"}} {4}'.format(
+                    name, labels_text, separator, bound, count))
+            lines.append('{0}_sum{{{1}}} {2!r}'.format(
+                name, labels_text, histogram.sum))
+            lines.append('{0}_count{{{1}}} {2}'.format(
+                name, labels_text, histogram.count))
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+
+    def initialize(self, registry):
+        self.registry = registry
+
+    def get(self):
+        self.set_header('Content-Type', 'text/plain; version=0.0.4')
+        self.finish(self.registry.to_prometheus())
@@ -0,0 +1,232 @@
+""" JSON Merge Patch (RFC 7396) and JSON Patch (RFC 6902) documents """
+import copy
+
+from schema import SchemaError
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+
+MERGE_PATCH = 'application/merge-patch+json'
+JSON_PATCH = 'application/json-patch+json'
+OPERATIONS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+
+class PatchError(Exception):
+    pass
+
+
+class PatchConflict(PatchError):
+    pass
+
+
+def apply_merge_patch(target, patch):
+    """ a copy of target with the merge patch applied """
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(target) if isinstance(target, dict) else {}
+    for name, value in patch.items():
+        if value is None:
+            result.pop(name, None)
+        else:
+            result[name] = apply_merge_patch(result.get(name), value)
+    return result
+
+
+def parse_pointer(pointer):
+    """ the reference tokens of a JSON pointer """
+    if not isinstance(pointer, string_types):
+        raise PatchError('a path must be a string')
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise PatchError('invalid path {0}'.format(pointer))
+    return [token.replace('~1', '/').replace('~0', '~')
+            for token in pointer[1:].split('/')]
+
+
+def list_index(document, token, appending=False):
+    if appending and token == '-':
+        return len(document)
+    if not token.isdigit() or (len(token) > 1 and token[0] == '0'):
+        raise PatchConflict('invalid index {0}'.format(token))
+    index = int(token)
+    if index > len(document) or (index == len(document) and not appending):
+        raise PatchConflict('index {0} out of range'.format(token))
+    return index
+
+
+def resolve(document, path):
+    """ the value at path """
+    for token in path:
+        if isinstance(document, dict):
+            if token not in document:
+                raise PatchConflict('{0} does not exist'.format(token))
+            document = document[token]
+        elif isinstance(document, list):
+            document = document[list_index(document, token)]
+        else:
+            raise PatchConflict('{0} does not exist'.format(token))
+    return document
+
+
+def add(document, path, value):
+    if not path:
+        return value
+    container = resolve(document, path[:-1])
+    token = path[-1]
+    if isinstance(container, dict):
+        container[token] = value
+    elif isinstance(container, list):
+        container.insert(list_index(container, token, True), value)
+    else:
+        raise PatchConflict('can not add to {0}'.format(token))
+    return document
+
+
+def remove(document, path):
+    if not path:
+        raise PatchConflict('can not remove the whole document')
+    container = resolve(document, path[:-1])
+    token = path[-1]
+    if isinstance(container, dict):
+        if token not in container:
+            raise PatchConflict('{0} does not exist'.format(token))
+        del container[token]
+    elif isinstance(container, list):
+        del container[list_index(container, token)]
+    else:
+        raise PatchConflict('{0} does not exist'.format(token))
+    return document
+
+
+def apply_operation(document, operation):
+    op, path = operation['op'], operation['path']
+    if op == 'add':
+        return add(document, path, copy.deepcopy(operation['value']))
+    if op == 'remove':
+        return remove(document, path)
+    if op == 'replace':
+        resolve(document, path)
+        if not path:
+            return copy.deepcopy(operation['value'])
+        container = resolve(document, path[:-1])
+        if isinstance(container, list):
+            container[list_index(container, path[-1])] = \
+                    copy.deepcopy(operation['value'])
+            return document
+        return add(document, path, copy.deepcopy(operation['value']))
+    if op == 'test':
+        if resolve(document, path) != operation['value']:
+            raise PatchConflict('test of {0} failed'.format(
+                '/'.join(path)))
+        return document
+    value = copy.deepcopy(resolve(document, operation['from']))
+    if op == 'move':
+        if path[:len(operation['from'])] == operation['from'] and \
+                path != operation['from']:
+            raise PatchConflict('can not move a value into itself')
+        document = remove(document, operation['from'])
+    return add(document, path, value)
+
+
+def apply_json_patch(target, operations):
+    """ a copy of target with the operations applied, in order """
+    document = copy.deepcopy(target)
+    for operation in operations:
+        document = apply_operation(document, operation)
+    return document
+
+
+class MergePatch(object):
+    """ the fields to change, a null value removes the field """
+    mimetype = MERGE_PATCH
+
+    def __init__(self, document):
+        if not isinstance(document, dict):
+            raise PatchError('a merge patch must be an object')
+        self.document = document
+
+    def fields(self):
+        return list(self.document)
+
+    def validate(self, schemas):
+        """ validate each value with the schema of its field """
+        for name, value in self.document.items():
+            if name not in schemas:
+                raise SchemaError('unknown field {0}'.format(name), None)
+            if value is not None:
+                self.document[name] = schemas[name].validate(value)
+        return self
+
+    def apply(self, target):
+        return apply_merge_patch(target, self.document)
+
+
+class JsonPatch(object):
+    """ a list of operations, their paths parsed into lists of tokens.
+    `translate` is applied to each token, to follow the key conventions of
+    the encoder. """
+    mimetype = JSON_PATCH
+
+    def __init__(self, operations, translate=None):
+        if not isinstance(operations, list):
+            raise PatchError('a JSON patch must be a list of operations')
+        self.operations = [self.parse(operation, translate)
+                for operation in operations]
+
+    def parse(self, operation, translate):
+        if not isinstance(operation, dict) or \
+                operation.get('op') not in OPERATIONS:
+            raise PatchError('invalid operation {0!r}'.format(operation))
+        if 'path' not in operation:
+            raise PatchError('operation without path')
+        op = operation['op']
+        parsed = {'op': op, 'path': self.parse_path(operation['path'],
+            translate)}
+        if op in ('add', 'replace', 'test'):
+            if 'value' not in operation:
+                raise PatchError('{0} without value'.format(op))
+            parsed['value'] = operation['value']
+        elif op in ('move', 'copy'):
+            if 'from' not in operation:
+                raise PatchError('{0} without from'.format(op))
+            parsed['from'] = self.parse_path(operation['from'], translate)
+        return parsed
+
+    def parse_path(self, pointer, translate):
+        path = parse_pointer(pointer)
+        if translate is not None:
+            path = [translate(token) for token in path]
+        return path
+
+    def fields(self):
+        fields = []
+        for operation in self.operations:
+            for path in (operation['path'], operation.get('from')):
+                if path and path[0] not in fields:
+                    fields.append(path[0])
+        return fields
+
+    def validate(self, schemas):
+        """ every path must be in a field of schemas and the values of
+        the whole fields are validated with the schema of the field; values
+        inside a field, or moved and copied, are not """
+        for operation in self.operations:
+            paths = [operation['path']]
+            if 'from' in operation:
+                paths.append(operation['from'])
+            for path in paths:
+                if not path or path[0] not in schemas:
+                    raise SchemaError('unknown field /{0}'.format(
+                        '/'.join(path)), None)
+            path = operation['path']
+            if 'value' in operation and len(path) == 1:
+                operation['value'] = schemas[path[0]].validate(
+                        operation['value'])
+        return self
+
+    def apply(self, target):
+        return apply_json_patch(target, self.operations)
@@ -0,0 +1,117 @@
+import pstats
+import random
+import cProfile
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import tornado.web
+
+
+class RequestProfiler(object):
+    """ profiles a sample of the requests and aggregates the results by
+    resource and method
+
+    A `sample_rate` fraction of the requests is profiled, as well as any
+    request with the `X-Profile-Token` header equal to `token`. Only one
+    request is profiled at a time and, as the IOLoop runs other requests
+    in between, their work can show up in the profile too.
+    """
+
+    def __init__(self, sample_rate=0.0, token=None):
+        self.sample_rate = sample_rate
+        self.token = token
+        self.active = None
+        self.stats = {}
+        self.requests = {}
+
+    def has_token(self, handler):
+        return self.token is not None and \
+                handler.request.headers.get('X-Profile-Token') == self.token
+
+    def should_profile(self, handler):
+        if self.active is not None:
+            return False
+        return self.has_token(handler) or random.random() < self.sample_rate
+
+    def start(self):
+        self.active = cProfile.Profile()
+        self.active.enable()
+        return self.active
+
+    def stop(self, profile, resource, method):
+        profile.disable()
+        if self.active is profile:
+            self.active = None
+        key = (resource, method)
+        if key in self.stats:
+            self.stats[key].add(profile)
+        else:
+            self.stats[key] = pstats.Stats(profile)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def report(self, resource, method, limit=20, output='pstats'):
+        stats = self.stats.get((resource, method))
+        if stats is None:
+            return None
+        if output == 'collapsed':
+            return self.collapsed(stats, limit)
+        stats.stream = StringIO()
+        stats.sort_stats('cumulative').print_stats(limit)
+        return stats.stream.getvalue()
+
+    def collapsed(self, stats, limit):
+        """ caller;function pairs weighted by microseconds spent in function
+
+        cProfile only knows the direct callers of each function, so the
+        stacks have at most two frames.
+        """
+        weights = []
+        for function, (_, _, total_time, _, callers) in stats.stats.items():
+            if not callers:
+                weights.append((total_time, label(function)))
+            for caller, caller_stats in callers.items():
+                caller_time = caller_stats[2] \
+                        if isinstance(caller_stats, tuple) else total_time
+                weights.append((caller_time, '{0};{1}'.format(
+                    label(caller), label(function))))
+        weights.sort(reverse=True)
+        return ''.join('{0} {1}\n'.format(stack, int(weight * 1e6))
+                for weight, stack in weights[:limit])
+
+    def summary(self):
+        return ''.join('{0} {1} {2}\n'.format(resource, method, count)
+                for (resource, method), count in sorted(self.requests.items()))
+
+
+def label(function):
+    filename, line, name = function
+    return '{0}:{1}({2})'.format(filename, line, name)
+
+
+class ProfileHandler(tornado.web.RequestHandler):
+    """ serves the reports, only to requests with the profiler token """
+
+    def initialize(self, profiler):
+        self.profiler = profiler
+
+    def get(self):
+        if not self.profiler.has_token(self):
+            raise tornado.web.HTTPError(403)
+        self.set_header('Content-Type', 'text/plain')
+        resource = self.get_argument('resource', None)
+        if resource is None:
+            self.finish(self.profiler.summary())
+            return
+        try:
+            limit = int(self.get_argument('limit', 20))
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+        report = self.profiler.report(resource,
+                self.get_argument('method', 'GET'), limit,
+                self.get_argument('format', 'pstats'))
+        if report is None:
+            raise tornado.web.HTTPError(404)
+        self.finish(report)
@@ -0,0 +1,159 @@
+import math
+import time
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+
+# 429 is not known by older http libraries, and tornado refuses to send
+# a status code it does not know
+TOO_MANY_REQUESTS = 429 if 429 in httplib.responses else 503
+
+
+def client_ip(handler):
+    return handler.request.remote_ip
+
+
+def api_key(header='X-Api-Key', argument='api_key', validate=None):
+    """ identify clients by an API key, falling back to their IP
+
+    Without `validate` any key is trusted, so a client that sends a new key
+    with each request gets a new bucket each time. `validate` receives the
+    key and returns whether it is known; unknown keys fall back to the IP.
+    """
+    def key(handler):
+        value = handler.request.headers.get(header)
+        if value is None:
+            value = handler.get_argument(argument, default=None)
+        if value is None or (validate is not None and not validate(value)):
+            value = client_ip(handler)
+        return value
+    return key
+
+
+class TokenBucket(object):
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, tokens, updated_at):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class RateLimit(object):
+    """ token bucket rate limiting by client
+
+    `requests` is how many requests a client can do in `period` seconds.
+    It can be an int, so all methods of the resource share the same bucket,
+    or a dict with a limit by method (e.g. {'POST': 10}), so each method has
+    its own bucket and methods that are not in the dict are not limited.
+    `key` is a function that receives the handler and returns the client
+    identification, the remote IP by default.
+    """
+
+    def __init__(self, requests, period=60, key=client_ip, burst=None,
+            sweep_interval=60):
+        self.requests = requests
+        self.period = period
+        self.key = key
+        self.burst = burst
+        self.sweep_interval = sweep_interval
+        self.buckets = {}
+        self.swept_at = time.time()
+
+    def limit_for(self, method):
+        if isinstance(self.requests, dict):
+            return self.requests.get(method)
+        return self.requests
+
+    def capacity_for(self, method):
+        if self.burst is not None:
+            return self.burst
+        return self.limit_for(method)
+
+    def bucket_key(self, handler):
+        if isinstance(self.requests, dict):
+            return (handler.request.method, self.key(handler))
+        return self.key(handler)
+
+    def consume(self, handler, now=None):
+        """ take a token, return (allowed, limit, remaining, reset) or None
+
+        None means that the request method is not limited. `limit` is the
+        capacity of the bucket (the burst, or the requests of a period),
+        `reset` is the number of seconds until the bucket is full again.
+        """
+        method = handler.request.method
+        limit = self.limit_for(method)
+        if limit is None:
+            return None
+        if now is None:
+            now = time.time()
+        self.sweep(now)
+
+        capacity = self.capacity_for(method)
+        rate = float(limit) / self.period
+        key = self.bucket_key(handler)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(capacity, now)
+        else:
+            bucket.tokens = min(capacity,
+                    bucket.tokens + (now - bucket.updated_at) * rate)
+            bucket.updated_at = now
+
+        allowed = bucket.tokens >= 1
+        if allowed:
+            bucket.tokens -= 1
+        reset = int((capacity - bucket.tokens) / rate + 0.5)
+        return allowed, capacity, int(bucket.tokens), reset
+
+    def apply(self, handler):
+        """ consume a token for the request of handler, setting the
+        X-RateLimit-* headers, and answer it when over the limit """
+        result = self.consume(handler)
+        if result is None:
+            return
+        allowed, limit, remaining, reset = result
+        handler.set_header('X-RateLimit-Limit', str(limit))
+        handler.set_header('X-RateLimit-Remaining', str(remaining))
+        handler.set_header('X-RateLimit-Reset', str(reset))
+        if not allowed:
+            handler.set_cross_origin()
+            handler.set_status(TOO_MANY_REQUESTS)
+            handler.set_header('Retry-After', str(self.retry_after(handler)))
+            handler.finish()
+
+    def retry_after(self, handler):
+        """ the seconds until the bucket of handler has a token again """
+        method = handler.request.method
+        rate = float(self.limit_for(method)) / self.period
+        bucket = self.buckets[self.bucket_key(handler)]
+        return max(int(math.ceil((1 - bucket.tokens) / rate)), 1)
+
+    def sweep(self, now):
+        """ drop buckets that were idle long enough to be full again
+
+        A full bucket behaves just like a new one, so dropping them does not
+        change any client limit.
+        """
+        if now - self.swept_at < self.sweep_interval:
+            return
+        self.swept_at = now
+        for key, bucket in list(self.buckets.items()):
+            method = key[0] if isinstance(self.requests, dict) else None
+            limit = self.limit_for(method)
+            if limit is None:
+                del self.buckets[key]
+                continue
+            refill_time = self.capacity_for(method) * self.period / \
+                    float(limit)
+            if now - bucket.updated_at >= refill_time:
+                del self.buckets[key]
+
+    def describe(self, method):
+        limit = self.limit_for(method)
+        if limit is None:
+            return None
+        return {'requests': limit, 'period': self.period}
@@ -0,0 +1,59 @@
+from collections import deque
+
+
+class RepresentationCache(object):
+    """ ETag and length of the last representations sent by GET, so HEAD
+    can answer without running the resource or encoding the body
+
+    Entries are kept by resource, url and content type, the oldest are
+    dropped after `max_entries`. A successful POST, PUT or DELETE on a
+    resource drops all its entries. The cache belongs to a process: use it
+    only when the resources change through the api of that process.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.resources = {}
+        self.generations = {}
+        self.order = deque()
+        self.count = 0
+
+    def get(self, resource, url, content_type):
+        entries = self.resources.get(resource)
+        if entries is None:
+            return None
+        return entries.get((url, content_type))
+
+    def set(self, resource, url, content_type, etag, length):
+        entries = self.resources.setdefault(resource, {})
+        key = (url, content_type)
+        if key not in entries:
+            self.order.append((resource, self.generations.get(resource, 0),
+                key))
+            self.count += 1
+            while self.count > self.max_entries:
+                self.evict()
+        entries[key] = (etag, length)
+
+    def evict(self):
+        """ drop the oldest entry, skipping the ones left in the order by
+        an invalidation """
+        resource, generation, key = self.order.popleft()
+        if generation == self.generations.get(resource, 0) and \
+                self.resources[resource].pop(key, None) is not None:
+            self.count -= 1
+
+    def invalidate(self, resource):
+        """ drop the entries of resource; they stay in the order until they
+        are the oldest, or until stale ones are most of it """
+        entries = self.resources.pop(resource, None)
+        if not entries:
+            return
+        self.generations[resource] = self.generations.get(resource, 0) + 1
+        self.count -= len(entries)
+        if len(self.order) > 2 * self.max_entries:
+            self.order = deque(item for item in self.order
+                    if item[1] == self.generations.get(item[0], 0))
+
+    def __len__(self):
+        return self.count
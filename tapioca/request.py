@@ -1,3 +1,4 @@
+import time
 import functools
 
 import tornado.web
@@ -36,9 +37,37 @@ class RequestSchema(object):
         _, description = self.process_body()
         return description
 
+    def prepare(self):
+        """ build the body schemas before the first request """
+        if hasattr(self, 'body') and 'body_schema' not in self.__dict__:
+            pattern, _ = self.process_body()
+            self.body_schema = Schema(pattern)
+        if hasattr(self, 'items') and 'items_schema' not in self.__dict__:
+            self.items_schema = Schema(self.items)
+        if hasattr(self, 'fields') and 'fields_schemas' not in self.__dict__:
+            self.fields_schemas = dict((name, Schema(pattern))
+                    for name, pattern in self.fields.items())
+
     def validate_body(self, value):
-        pattern, _ = self.process_body()
-        return Schema(pattern).validate(value)
+        if 'body_schema' not in self.__dict__:
+            self.prepare()
+        return self.body_schema.validate(value)
+
+    def validate_items(self, items):
+        """ validate each item as it is iterated """
+        if 'items_schema' not in self.__dict__:
+            self.prepare()
+        try:
+            for item in items:
+                yield self.items_schema.validate(item)
+        except ValueError as error:
+            raise SchemaError(str(error), None)
+
+    def validate_patch(self, patch):
+        """ validate the fields changed by a merge or JSON patch """
+        if 'fields_schemas' not in self.__dict__:
+            self.prepare()
+        return patch.validate(self.fields_schemas)
 
     def process_body(self):
         pattern = self.body
@@ -49,12 +78,16 @@ class RequestSchema(object):
 
 
 class ParamSchema(object):
+    __slots__ = ('name', 'pattern', 'description', 'is_optional',
+            'default_value', 'schema')
+
     def __init__(self, name, pattern, description, is_optional, default_value):
         self.name = name
         self.pattern = pattern
         self.description = description
         self.is_optional = is_optional
         self.default_value = default_value
+        self.schema = Schema(pattern)
 
     def validate(self, values):
         if not self.name in values:
@@ -66,7 +99,7 @@ class ParamSchema(object):
         else:
             value = values[self.name]
             try:
-                return Schema(self.pattern).validate(value)
+                return self.schema.validate(value)
             except SchemaError:
                 raise InvalidParamError(self.name)
 
@@ -153,8 +186,10 @@ class ValidateDecorator(object):
                     self.get_querystring_values())
 
             try:
+                started_at = time.time()
                 self.process_params_in_url(url_params)
                 self.process_body()
+                self.record_validation(started_at)
                 return func(handler, *args, **url_params)
             except SchemaError as error:
                 raise tornado.web.HTTPError(400)
@@ -180,16 +215,30 @@ class ValidateDecorator(object):
         return values
 
     def process_body(self):
-        if hasattr(self.request_schema, 'body'):
+        if hasattr(self.request_schema, 'fields') and \
+                self.handler.request.method == 'PATCH':
+            self.handler.values['patch'] = self.request_schema.validate_patch(
+                    self.handler.load_patch())
+        elif hasattr(self.request_schema, 'items'):
+            self.handler.values['items'] = self.request_schema.validate_items(
+                    self.handler.load_items())
+        elif hasattr(self.request_schema, 'body'):
             parsed_values = self.request_schema.validate_body(
                     self.handler.request.body)
             self.handler.values['body'] = parsed_values
 
+    def record_validation(self, started_at):
+        record_phase = getattr(self.handler, 'record_phase', None)
+        if record_phase is not None:
+            record_phase('validation', started_at)
+
     def format_error(self, error):
         return {'error': error.message}
 
 
 class Values(dict):
+    __slots__ = ('request_schema', 'querystring_values')
+
     def __init__(self, request_schema, querystring):
         self.request_schema = request_schema
         self.querystring_values = querystring
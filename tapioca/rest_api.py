@@ -1,33 +1,170 @@
 import json
+import time
 import logging
 
 import tornado.web
+from tornado.escape import native_str
 import mimeparse
 
 from tapioca.serializers import JsonEncoder, JsonpEncoder, HtmlEncoder, \
-        SwaggerEncoder, WADLEncoder
+        SwaggerEncoder, WADLEncoder, RawRepresentation
 from tapioca.metadata import Metadata
+from tapioca.spec import discovery_documents
+from tapioca.admission import AdmissionControl, admission_controlled
+from tapioca.metrics import MetricsRegistry, MetricsHandler, PhaseTimings
+from tapioca.profiling import ProfileHandler
+from tapioca.allocations import AllocationsHandler
+from tapioca.cors import preflight_headers, ALLOWED_HEADERS, \
+        EXPOSED_HEADERS, DEFAULT_MAX_AGE
+from tapioca.patch import MERGE_PATCH, JSON_PATCH, MergePatch, JsonPatch, \
+        PatchError, PatchConflict
+from tapioca.changes import ChangesHandler, CHANGE_ACTIONS
+from tapioca.change_log import ChangesExpired, InvalidSinceToken
+from tapioca.compression import SUPPORTED_ENCODINGS, decompress, \
+        UnsupportedEncoding, DecompressedBodyTooLarge, InvalidCompressedBody
 
 
 SIMPLE_POST_MIMETYPE = 'application/x-www-form-urlencoded'
 
+# negotiation results, by encoders and Accept or Content-Type header
+MIMETYPES_PRIORITY = {}
+NEGOTIATED_CONTENT_TYPES = {}
+MAX_NEGOTIATED_CONTENT_TYPES = 1000
+SHARED_ENCODERS = {}
+EXTENSION_POINTS = ('get_collection', 'get_model', 'create_model',
+        'update_model', 'patch_model', 'delete_model')
+
+
+def mimetypes_priority(encoders):
+    encoders = tuple(encoders)
+    mimetypes = MIMETYPES_PRIORITY.get(encoders)
+    if mimetypes is None:
+        mimetypes = MIMETYPES_PRIORITY[encoders] = tuple(
+                encoder.mimetype for encoder in reversed(encoders))
+    return mimetypes
+
+
+def negotiate(mimetypes, header):
+    key = (tuple(mimetypes), header)
+    content_type = NEGOTIATED_CONTENT_TYPES.get(key)
+    if content_type is None:
+        if len(NEGOTIATED_CONTENT_TYPES) >= MAX_NEGOTIATED_CONTENT_TYPES:
+            NEGOTIATED_CONTENT_TYPES.clear()
+        content_type = NEGOTIATED_CONTENT_TYPES[key] = \
+                mimeparse.best_match(mimetypes, header)
+    return content_type
+
+
+def shared_encoder(encoder_class):
+    encoder = SHARED_ENCODERS.get(encoder_class)
+    if encoder is None:
+        encoder = SHARED_ENCODERS[encoder_class] = encoder_class(None)
+    return encoder
+
 
 class TornadoRESTful(object):
 
     def __init__(self, version=None, base_url=None, discovery=False,
-            cross_origin_enabled=False):
+            cross_origin_enabled=False, metrics=False, server_timing=False,
+            server_timing_token=None, profiler=None, slow_log=None,
+            recorder=None, lag_monitor=None, allocation_tracker=None,
+            cross_origin_max_age=DEFAULT_MAX_AGE,
+            cross_origin_headers=ALLOWED_HEADERS, representation_cache=None,
+            change_feed=None, change_log=None, webhooks=None):
         self.metadata = Metadata(version=version, base_url=base_url)
         self.handlers = []
         self.discovery = discovery
         self.cross_origin_enabled = cross_origin_enabled
-
-    def add_resource(self, path, handler, *args, **kw):
+        self.cross_origin_max_age = cross_origin_max_age
+        self.cross_origin_headers = cross_origin_headers
+        self.admission_controls = {}
+        self.metrics = None
+        if metrics:
+            self.metrics = MetricsRegistry()
+        self.server_timing = server_timing
+        self.server_timing_token = server_timing_token
+        self.profiler = profiler
+        self.slow_log = slow_log
+        self.recorder = recorder
+        self.lag_monitor = lag_monitor
+        self.allocation_tracker = allocation_tracker
+        self.representation_cache = representation_cache
+        self.change_feed = change_feed
+        self.change_listeners = []
+        if change_feed is not None:
+            self.change_listeners.append(change_feed)
+        self.change_log = change_log
+        if change_log is not None:
+            self.change_listeners.append(change_log)
+        self.webhooks = webhooks
+        if webhooks is not None:
+            self.change_listeners.append(webhooks)
+        if lag_monitor is not None and lag_monitor.registry is None:
+            lag_monitor.registry = self.metrics
+        self.frozen = None
+        self.discovery_documents = None
+
+    def add_resource(self, path, handler, max_in_flight=None, max_queue=0,
+            retry_after=1, rate_limit=None, *args, **kw):
+        """ route path to a subclass of handler that carries the settings
+        of this registration, so a handler class can be added at several
+        paths, or to several apis, with different settings. Returns it. """
+        if self.frozen is not None:
+            raise APIFrozen('resources can not be added after freeze()')
         normalized_path = path.rstrip('/').lstrip('/')
-        handler.cross_origin_enabled = self.cross_origin_enabled
+        settings = {
+            '__module__': handler.__module__,
+            'cross_origin_enabled': self.cross_origin_enabled,
+            'resource_name': normalized_path,
+            'change_listeners': tuple(self.change_listeners),
+            'change_log': self.change_log,
+        }
+        if self.metrics is not None:
+            settings['metrics'] = self.metrics
+        if self.server_timing or self.server_timing_token:
+            settings['server_timing'] = self.server_timing
+            settings['server_timing_token'] = self.server_timing_token
+        if self.profiler is not None:
+            settings['profiler'] = self.profiler
+        if self.slow_log is not None:
+            settings['slow_log'] = self.slow_log
+        if self.recorder is not None:
+            settings['recorder'] = self.recorder
+        if self.allocation_tracker is not None:
+            settings['allocation_tracker'] = self.allocation_tracker
+        if self.representation_cache is not None:
+            settings['representation_cache'] = self.representation_cache
+        if rate_limit is not None:
+            settings['rate_limit'] = rate_limit
+        if max_in_flight is not None:
+            settings['admission_control'] = AdmissionControl(
+                    max_in_flight, max_queue, retry_after)
+            self.admission_controls[normalized_path] = \
+                    settings['admission_control']
+        handler = type(handler.__name__, (handler,), settings)
         self.add_url_mapping(normalized_path, handler)
         self.metadata.add(normalized_path, handler)
+        self.add_preflight(handler)
+        return handler
+
+    def add_preflight(self, handler):
+        """ answer the CORS preflights of the resource with the methods
+        described in its metadata """
+        if not self.cross_origin_enabled:
+            handler.collection_preflight = handler.instance_preflight = None
+            return
+        collection, instance = self.metadata.get_allowed_methods(handler)
+        handler.collection_preflight = preflight_headers(collection,
+                self.cross_origin_max_age, self.cross_origin_headers)
+        handler.instance_preflight = preflight_headers(instance,
+                self.cross_origin_max_age, self.cross_origin_headers)
 
     def add_url_mapping(self, normalized_path, handler):
+        if self.change_feed is not None:
+            self.handlers.append(('/{0}/{1}'.format(normalized_path,
+                self.change_feed.path), ChangesHandler,
+                {'feed': self.change_feed, 'resource': normalized_path,
+                    'handler': handler}))
         self.handlers.append(('/{0}/?'.format(normalized_path), handler))
         self.handlers.append(('/{0}\.(?P<force_return_type>\w+)'
                 .format(normalized_path), handler))
@@ -37,24 +174,111 @@ class TornadoRESTful(object):
                 .format(normalized_path), handler))
 
     def get_url_mapping(self):
+        """ the routes of the api, for tornado.web.Application: (pattern,
+        handler[, kwargs]) tuples, or the compiled URLSpecs once frozen """
+        if self.frozen is not None:
+            return self.url_specs
         url_mapping = self.handlers
         if self.discovery:
+            discovery_kwargs = {'api_spec': self.metadata.spec,
+                    'documents': self.discovery_documents}
             url_mapping = url_mapping + [
             ('/discovery\.(?P<force_return_type>\w+)',
-                DiscoveryHandler, {'api_spec': self.metadata.spec}),
+                DiscoveryHandler, discovery_kwargs),
             ('/discovery/(?P<resource_name>[\w_/]+)\.(?P<force_return_type>\w+)',
-                DiscoveryHandler, {'api_spec': self.metadata.spec})
+                DiscoveryHandler, discovery_kwargs)
+            ]
+        if self.metrics is not None:
+            url_mapping = url_mapping + [
+                ('/metrics', MetricsHandler, {'registry': self.metrics})
+            ]
+        if self.profiler is not None and self.profiler.token is not None:
+            url_mapping = url_mapping + [
+                ('/_admin/profile', ProfileHandler, {'profiler': self.profiler})
+            ]
+        if self.allocation_tracker is not None and \
+                self.allocation_tracker.token is not None:
+            url_mapping = url_mapping + [
+                ('/_admin/allocations', AllocationsHandler,
+                    {'tracker': self.allocation_tracker})
             ]
         return url_mapping
 
     def get_spec(self):
         return self.metadata.spec
 
+    def freeze(self):
+        """ do the work left to the first requests (discovery documents,
+        validators, negotiation, templates and url patterns) and refuse new
+        resources. Returns what was prepared. """
+        if self.frozen is not None:
+            return self.frozen
+        report = {}
+        handlers = []
+        for spec in self.handlers:
+            handler = spec[1]
+            if handler not in handlers and issubclass(handler, ResourceHandler):
+                handlers.append(handler)
+        if self.discovery:
+            self.discovery_documents = self.generate_discovery_documents()
+            report['discovery_documents'] = len(self.discovery_documents)
+            handlers.append(DiscoveryHandler)
+
+        report['validators'] = 0
+        for handler in handlers:
+            for name in EXTENSION_POINTS:
+                schema = getattr(getattr(handler, name), 'request_schema', None)
+                if schema is not None:
+                    schema.prepare()
+                    report['validators'] += 1
+
+        report['content_types'] = 0
+        templates = []
+        for handler in handlers:
+            mimetypes = mimetypes_priority(handler.encoders)
+            for header in mimetypes + ('*/*',):
+                negotiate(mimetypes, header)
+                report['content_types'] += 1
+            for encoder in handler.encoders:
+                if vars(encoder).get('stateless', False):
+                    shared_encoder(encoder)
+                if issubclass(encoder, HtmlEncoder) and \
+                        encoder.template_name not in templates:
+                    encoder.load_template()
+                    templates.append(encoder.template_name)
+        report['templates'] = templates
+
+        self.url_specs = [tornado.web.URLSpec(*spec)
+                for spec in self.get_url_mapping()]
+        report['routes'] = len(self.url_specs)
+        self.frozen = report
+        return report
+
+    def generate_discovery_documents(self):
+        return dict(discovery_documents(self.metadata.spec))
+
+    def get_admission_stats(self):
+        """ in flight and queued requests by resource and method """
+        return dict((path, control.stats())
+                for path, control in self.admission_controls.items())
+
 
 class ResourceDoesNotExist(Exception):
     pass
 
 
+# the status of the errors extension points raise, the first match wins
+EXCEPTION_STATUSES = (
+    (ResourceDoesNotExist, 404),
+    (PatchConflict, 409),
+    (PatchError, 400),
+)
+
+
+class APIFrozen(Exception):
+    pass
+
+
 def mark_as_original_method(method):
     method.original = True
     return method
@@ -62,15 +286,66 @@ def mark_as_original_method(method):
 
 class ResourceHandler(tornado.web.RequestHandler):
     encoders = (JsonEncoder, JsonpEncoder, HtmlEncoder,)
+    admission_control = None
+    admission_state = None
+    rate_limit = None
+    metrics = None
+    resource_name = None
+    timings = None
+    handler_started_at = None
+    server_timing = False
+    server_timing_token = None
+    server_timing_requested = False
+    profiler = None
+    profile = None
+    slow_log = None
+    recorder = None
+    allocation_tracker = None
+    response_encoder = None
+    response_type = None
+    response_size = 0
+    force_return_type = None
+    content_encodings = SUPPORTED_ENCODINGS
+    max_decompressed_size = 10 * 1024 * 1024
+    max_compression_ratio = 100
+    raw_body = None
+    collection_preflight = None
+    instance_preflight = None
+    representation_cache = None
+    patch_document = None
+    change_listeners = ()
+    change_log = None
+    change_key = None
+    change_content = None
+
+    def prepare(self):
+        if self.profiler is not None and self.profiler.should_profile(self):
+            self.profile = self.profiler.start()
+        if self.allocation_tracker is not None and \
+                self.allocation_tracker.should_track(self):
+            self.allocation_tracker.start(self)
+        self.server_timing_requested = self.server_timing or \
+                self.has_server_timing_token()
+        if self.needs_timings():
+            self.timings = PhaseTimings()
+            self.record_phase('routing', self.request._start_time)
+        if self.request.method == 'OPTIONS':
+            return
+        if self.rate_limit is not None:
+            self.apply_rate_limit()
+        if not self._finished and 'Content-Encoding' in self.request.headers:
+            self.decompress_body()
+
+    def needs_timings(self):
+        return self.metrics is not None or self.server_timing_requested or \
+                self.slow_log is not None
 
     def get_encoders(self):
         return self.encoders
 
     def get_mimetypes_priority(self):
-        encoders_mimetypes = [encoder.mimetype \
-                for encoder in self.get_encoders()]
-        encoders_mimetypes.reverse()
-        return encoders_mimetypes
+        encoders = self.get_encoders()
+        return mimetypes_priority(encoders)
 
     def get_content_type_based_on(self, header_key):
         mimetypes = self.get_mimetypes_priority()
@@ -79,8 +354,7 @@ class ResourceHandler(tornado.web.RequestHandler):
                 header_key, default_encoding)
         if content_types_by_client == SIMPLE_POST_MIMETYPE:
             content_types_by_client = default_encoding
-        content_type = mimeparse.best_match(mimetypes, content_types_by_client)
-        return content_type
+        return negotiate(mimetypes, content_types_by_client)
 
     def get_encoder_for(self, content_type):
         encoders = self.get_encoders()
@@ -88,22 +362,101 @@ class ResourceHandler(tornado.web.RequestHandler):
         for encoder in encoders:
             if content_type == encoder.mimetype:
                 encoder_class = encoder
+        if vars(encoder_class).get('stateless', False):
+            return shared_encoder(encoder_class)
         return encoder_class(self)
 
-    def respond_with(self, data, force_type=None):
+    def get_response_type(self, force_type=None):
         if force_type is None:
-            respond_as = self.get_content_type_based_on('Accept')
-        else:
-            respond_as = self.get_content_type_for_extension(force_type)
+            return self.get_content_type_based_on('Accept')
+        return self.get_content_type_for_extension(force_type)
+
+    def respond_with(self, data, force_type=None):
+        started_at = time.time()
+        respond_as = self.get_response_type(force_type)
+        self.record_phase('negotiation', started_at)
 
         self.set_cross_origin()
         self.set_header('Content-Type', respond_as)
-        self.write(self.get_encoder_for(respond_as).encode(data))
+        self.response_type = respond_as
+        started_at = time.time()
+        encoder = self.get_encoder_for(respond_as)
+        if isinstance(data, RawRepresentation):
+            body = self.encode_raw(data, respond_as, encoder)
+        else:
+            body = encoder.encode(data)
+            self.response_encoder = encoder.__class__.__name__
+        self.record_phase('encode', started_at)
+        self.response_size = len(body)
+        started_at = time.time()
+        self.write(body)
+        self.record_phase('write', started_at)
         self.finish()
 
+    def encode_raw(self, representation, content_type, encoder):
+        """ the raw body as is when it has the negotiated content type,
+        otherwise wrapped or decoded and encoded again by the encoders """
+        if representation.content_type == content_type:
+            self.response_encoder = 'RawRepresentation'
+            return representation.body
+        self.response_encoder = encoder.__class__.__name__
+        encode_raw = getattr(encoder, 'encode_raw', None)
+        if encode_raw is not None:
+            body = encode_raw(representation)
+            if body is not None:
+                return body
+        for decoder in self.get_encoders():
+            if decoder.mimetype == representation.content_type and \
+                    hasattr(decoder, 'decode'):
+                data = self.get_encoder_for(decoder.mimetype).decode(
+                        representation.body)
+                return encoder.encode(data)
+        raise tornado.web.HTTPError(406)
+
+    def finish(self, chunk=None):
+        if self.server_timing_requested and not self._headers_written:
+            self.set_header('Server-Timing', self.timings.server_timing())
+        super(ResourceHandler, self).finish(chunk)
+
+    def has_server_timing_token(self):
+        if self.server_timing_token is None:
+            return False
+        return self.request.headers.get('X-Server-Timing-Token') == \
+                self.server_timing_token
+
+    def record_phase(self, phase, started_at):
+        if self.timings is not None:
+            self.timings.add(phase, time.time() - started_at)
+
+    def start_handler_phase(self):
+        self.handler_started_at = time.time()
+
+    def end_handler_phase(self):
+        """ time spent in the extension point, validation excluded """
+        if self.timings is not None and self.handler_started_at is not None:
+            self.timings.add('handler', time.time() -
+                    self.handler_started_at -
+                    self.timings.get('validation', 0.0))
+        self.handler_started_at = None
+
     def set_cross_origin(self):
         if hasattr(self, 'cross_origin_enabled') and self.cross_origin_enabled:
             self.set_header('Access-Control-Allow-Origin', '*')
+            self.set_header('Access-Control-Expose-Headers',
+                    ', '.join(EXPOSED_HEADERS))
+
+    def options(self, key=None, force_return_type=None, *args, **kwargs):
+        """ answer a CORS preflight without running the resource """
+        if key is None:
+            headers = self.collection_preflight
+        else:
+            headers = self.instance_preflight
+        if headers is None:
+            raise tornado.web.HTTPError(405)
+        for name, value in headers:
+            self.set_header(name, value)
+        self.set_status(204)
+        self.finish()
 
     def get_content_type_for_extension(self, extension):
         for encoder in self.get_encoders():
@@ -111,6 +464,130 @@ class ResourceHandler(tornado.web.RequestHandler):
                 return encoder.mimetype
         raise tornado.web.HTTPError(404)
 
+    def apply_rate_limit(self):
+        self.rate_limit.apply(self)
+
+    def shed_load(self, retry_after):
+        self.set_cross_origin()
+        self.set_status(503)
+        self.set_header('Retry-After', str(retry_after))
+        self.finish()
+
+    def release_admission(self):
+        state, self.admission_state = self.admission_state, None
+        method = self.request.method
+        if state == 'admitted':
+            self.admission_control.release(method)
+        elif state == 'queued':
+            if not self.admission_control.cancel(method,
+                    self.admission_waiter):
+                self.admission_control.release(method)
+
+    def stop_profile(self):
+        if self.profile is not None:
+            self.profiler.stop(self.profile, self.resource_name,
+                    self.request.method)
+            self.profile = None
+
+    def stop_allocation_tracking(self):
+        if self.allocation_tracker is not None:
+            self.allocation_tracker.stop(self)
+
+    def on_finish(self):
+        self.stop_profile()
+        self.stop_allocation_tracking()
+        self.release_admission()
+        if self.timings is not None:
+            duration = self.request.request_time()
+            if self.metrics is not None:
+                self.metrics.observe_request(self.resource_name,
+                        self.request.method, self.timings, duration)
+            if self.slow_log is not None:
+                self.slow_log.observe(self, duration)
+        if self.recorder is not None:
+            self.recorder.observe(self, self.request.request_time())
+        if self.representation_cache is not None:
+            self.update_representation_cache()
+        if self.change_listeners and self.get_status() < 400 and \
+                self.request.method in CHANGE_ACTIONS:
+            self.notify_change(CHANGE_ACTIONS[self.request.method],
+                    self.change_key, self.change_content)
+
+    def notify_change(self, action, key, content=None):
+        """ tell the change listeners that a model of the resource was
+        created, updated or deleted. Called after each successful write,
+        with the content the handler set in `change_content`. """
+        for listener in self.change_listeners:
+            listener(self.resource_name, action, key, content)
+
+    def update_representation_cache(self):
+        method = self.request.method
+        status = self.get_status()
+        if method in ('GET', 'HEAD'):
+            etag = self._headers.get('Etag')
+            if status == 200 and etag and self.response_type is not None:
+                self.representation_cache.set(self.resource_name,
+                        self.request.uri, self.response_type,
+                        native_str(etag), self._headers['Content-Length'])
+        elif method in ('POST', 'PUT', 'PATCH', 'DELETE') and status < 400:
+            self.representation_cache.invalidate(self.resource_name)
+
+    def respond_from_cache(self, force_type=None):
+        """ answer a HEAD with the cached ETag and length of the GET
+        representation, return False when there is none """
+        respond_as = self.get_response_type(force_type)
+        cached = self.representation_cache.get(self.resource_name,
+                self.request.uri, respond_as)
+        if cached is None:
+            return False
+        etag, length = cached
+        self.set_cross_origin()
+        self.set_header('Content-Type', respond_as)
+        self.set_header('Etag', etag)
+        if etag in self.request.headers.get('If-None-Match', ''):
+            self.set_status(304)
+        else:
+            self.set_header('Content-Length', length)
+        self.finish()
+        return True
+
+    def _handle_request_exception(self, e):
+        """ answer the errors that extension points raise from their
+        asynchronous callbacks like the ones they raise right away """
+        for exception, status_code in EXCEPTION_STATUSES:
+            if isinstance(e, exception):
+                e = tornado.web.HTTPError(status_code)
+                break
+        super(ResourceHandler, self)._handle_request_exception(e)
+
+    def on_connection_close(self):
+        self.stop_profile()
+        self.stop_allocation_tracking()
+        self.release_admission()
+
+    def decompress_body(self):
+        """ replace a gzip or deflate request body by its decompressed
+        content, within the size and ratio limits of the handler; the body
+        as it was received stays in `raw_body` """
+        self.raw_body = self.request.body
+        try:
+            self.request.body = decompress(self.request.body,
+                    self.request.headers['Content-Encoding'],
+                    self.max_decompressed_size, self.max_compression_ratio,
+                    self.content_encodings)
+        except UnsupportedEncoding:
+            raise tornado.web.HTTPError(415)
+        except DecompressedBodyTooLarge:
+            raise tornado.web.HTTPError(413)
+        except InvalidCompressedBody:
+            raise tornado.web.HTTPError(400)
+
+    def get_raw_body(self):
+        """ the request body as it was received, before decompression """
+        if self.raw_body is not None:
+            return self.raw_body
+        return self.request.body
+
     def load_data(self):
         """ load data based on Content-Type request header """
         content_type = self.get_content_type_based_on('Content-Type')
@@ -118,56 +595,168 @@ class ResourceHandler(tornado.web.RequestHandler):
         data = self.get_encoder_for(content_type).decode(data_as_string)
         return data
 
+    def load_items(self):
+        """ iterate over the items of a list in the body, decoding one at a
+        time when the encoder has `decode_items` """
+        content_type = self.get_content_type_based_on('Content-Type')
+        encoder = self.get_encoder_for(content_type)
+        decode_items = getattr(encoder, 'decode_items', None)
+        if decode_items is not None:
+            return decode_items(self.request.body)
+        return iter(encoder.decode(self.request.body))
+
+    def load_patch(self):
+        """ the merge patch or JSON patch of the body, by its content type.
+        A plain JSON body is a merge patch. """
+        if self.patch_document is None:
+            content_type = self.request.headers.get('Content-Type',
+                    'application/json').split(';')[0].strip()
+            if content_type not in ('application/json', MERGE_PATCH,
+                    JSON_PATCH):
+                raise tornado.web.HTTPError(415)
+            encoder = shared_encoder(JsonEncoder)
+            try:
+                document = encoder.decode(self.request.body)
+            except ValueError:
+                raise tornado.web.HTTPError(400)
+            try:
+                if content_type == JSON_PATCH:
+                    self.patch_document = JsonPatch(document,
+                            encoder.decode_key)
+                else:
+                    self.patch_document = MergePatch(document)
+            except PatchError:
+                raise tornado.web.HTTPError(400)
+        return self.patch_document
+
     # Generic API HTTP Verbs
 
     @tornado.web.asynchronous
+    @admission_controlled
     def get(self, key=None, force_return_type=None, *args, **kwargs):
         """ return the collection or a model """
-        def _callback(data):
-            self.respond_with(data, force_return_type)
+        self.get_representation(key, force_return_type, *args, **kwargs)
 
+    @tornado.web.asynchronous
+    @admission_controlled
+    def head(self, key=None, force_return_type=None, *args, **kwargs):
+        """ the headers of get, without encoding the body when the
+        representation cache has them """
+        if self.representation_cache is not None and \
+                self.respond_from_cache(force_return_type):
+            return
+        self.get_representation(key, force_return_type, *args, **kwargs)
+
+    def get_representation(self, key, force_return_type, *args, **kwargs):
+        self.force_return_type = force_return_type
+        self.start_handler_phase()
+        if key is None and self.change_log is not None:
+            since = self.get_argument('since', None)
+            if since is not None:
+                self.get_changes(since)
+                return
+            self.set_header('X-Since-Token', self.change_log.token())
         if key is None:
-            self.get_collection(_callback, *args, **kwargs)
+            self.get_collection(self.get_callback, *args, **kwargs)
         else:
             try:
-                self.get_model(key, _callback, *args, **kwargs)
+                self.get_model(key, self.get_callback, *args, **kwargs)
             except ResourceDoesNotExist:
                 raise tornado.web.HTTPError(404)
 
+    def get_callback(self, data):
+        self.end_handler_phase()
+        self.respond_with(data, self.force_return_type)
+
+    def get_changes(self, since):
+        """ the models changed and the keys deleted since the token, with
+        the token to use next time """
+        try:
+            changed, deleted, token = self.change_log.changes_since(
+                    self.resource_name, since)
+        except InvalidSinceToken:
+            raise tornado.web.HTTPError(400)
+        except ChangesExpired:
+            raise tornado.web.HTTPError(410)
+
+        def on_models(models):
+            items = []
+            for key, model in zip(changed, models):
+                if model is None:
+                    deleted.append(key)
+                else:
+                    items.append(model)
+            self.get_callback({'items': items, 'deleted': deleted,
+                'since': token})
+
+        self.get_models(changed, on_models)
+
     @tornado.web.asynchronous
+    @admission_controlled
     def post(self, *args, **kwargs):
         """ create a model """
-        def _callback(content=None, location=None, *args, **kwargs):
-            self.set_status(201)
-            self.set_cross_origin()
-            if location:
-                self.set_header('Location', location)
-            if content:
-                self.respond_with(content)
-            else:
-                self.finish()
-
-        self.create_model(_callback, *args, **kwargs)
+        self.start_handler_phase()
+        self.create_model(self.post_callback, *args, **kwargs)
+
+    def post_callback(self, content=None, location=None, *args, **kwargs):
+        self.end_handler_phase()
+        if location:
+            self.change_key = location.rstrip('/').rsplit('/', 1)[-1]
+        if self.change_content is None and \
+                not isinstance(content, RawRepresentation):
+            self.change_content = content
+        self.set_status(201)
+        self.set_cross_origin()
+        if location:
+            self.set_header('Location', location)
+        if content:
+            self.respond_with(content)
+        else:
+            self.finish()
 
     @tornado.web.asynchronous
+    @admission_controlled
     def put(self, key=None, *args, **kwargs):
         """ update a model """
+        self.change_key = key
         try:
             self.set_status(204)
+            self.start_handler_phase()
             self.update_model(key, self.finish_callback, *args, **kwargs)
         except ResourceDoesNotExist:
             raise tornado.web.HTTPError(404)
 
     @tornado.web.asynchronous
+    @admission_controlled
+    def patch(self, key=None, force_return_type=None, *args, **kwargs):
+        """ partially update a model """
+        if key is None:
+            raise tornado.web.HTTPError(405)
+        self.change_key = key
+        try:
+            self.set_status(204)
+            self.start_handler_phase()
+            self.patch_model(key, self.load_patch(), self.finish_callback,
+                    *args, **kwargs)
+        except ResourceDoesNotExist:
+            raise tornado.web.HTTPError(404)
+        except PatchConflict:
+            raise tornado.web.HTTPError(409)
+
+    @tornado.web.asynchronous
+    @admission_controlled
     def delete(self, key=None, *args):
         """ delete a model """
+        self.change_key = key
         try:
             self.set_status(200)
+            self.start_handler_phase()
             self.delete_model(key, self.finish_callback, *args)
         except ResourceDoesNotExist:
             raise tornado.web.HTTPError(404)
 
     def finish_callback(self, location=None, *args, **kw):
+        self.end_handler_phase()
         self.set_cross_origin()
         if location:
             self.set_header('Location', location)
@@ -189,11 +778,39 @@ class ResourceHandler(tornado.web.RequestHandler):
         """ return a model, return None to indicate not found """
         raise tornado.web.HTTPError(404)
 
+    def get_models(self, keys, callback):
+        """ the models of keys, None for the ones that do not exist. It
+        calls get_model for each key, override it to load them at once. """
+        models = [None] * len(keys)
+        pending = [len(keys)]
+        if not keys:
+            callback(models)
+            return
+
+        def loaded(index):
+            def on_model(model=None):
+                models[index] = model
+                pending[0] -= 1
+                if pending[0] == 0:
+                    callback(models)
+            return on_model
+
+        for index, key in enumerate(keys):
+            try:
+                self.get_model(key, loaded(index))
+            except ResourceDoesNotExist:
+                loaded(index)(None)
+
     @mark_as_original_method
     def update_model(self, oid, callback, *args, **kwargs):
         """ update a model """
         raise tornado.web.HTTPError(404)
 
+    @mark_as_original_method
+    def patch_model(self, oid, patch, callback, *args, **kwargs):
+        """ apply patch, a MergePatch or a JsonPatch, to the model """
+        raise tornado.web.HTTPError(404)
+
     @mark_as_original_method
     def delete_model(self, oid, callback, *args, **kwargs):
         """ delete a model """
@@ -206,11 +823,13 @@ class DiscoveryHandler(ResourceHandler):
     def __init__(self, *args, **kwargs):
         self.api_spec = kwargs['api_spec']
         del kwargs['api_spec']
+        self.documents = kwargs.pop('documents', None)
         super(DiscoveryHandler, self).__init__(*args, **kwargs)
 
     def get_collection(self, callback, resource_name=None, *args):
         self.set_header('Access-Control-Allow-Origin', '*')
         callback({
             'spec': self.api_spec,
-            'resource': resource_name
+            'resource': resource_name,
+            'documents': self.documents
         })
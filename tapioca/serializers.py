@@ -1,36 +1,108 @@
+import os
 import re
 import json
 
+from tornado import template
+
 from tapioca.spec import SwaggerSpecification, WADLSpecification
 
 
 class Encoder(object):
+    """ encoders that do not use the handler can set `stateless = True`,
+    then one instance is shared by all requests. As subclasses may use the
+    handler, the flag is not inherited and each class has to set it. """
 
     def __init__(self, handler):
         self.handler = handler
 
 
+class RawRepresentation(object):
+    """ a body already encoded as content_type, that handlers can pass to
+    their callbacks to have it written as is """
+    __slots__ = ('body', 'content_type')
+
+    def __init__(self, body, content_type='application/json'):
+        self.body = body
+        self.content_type = content_type.split(';')[0].strip()
+
+
+SNAKE_CASE = re.compile('_(.)')
+CAMEL_CASE = re.compile('([a-z])([A-Z])')
+WHITESPACE = re.compile('[ \t\n\r]*')
+MAX_CACHED_KEYS = 10000
+JSON_DECODER = json.JSONDecoder()
+
+
+def iter_json_array(data):
+    """ decode the items of a JSON array one at a time """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    index = WHITESPACE.match(data, 0).end()
+    if data[index:index + 1] != '[':
+        raise ValueError('expected a JSON array')
+    index = WHITESPACE.match(data, index + 1).end()
+    if data[index:index + 1] == ']':
+        return
+    while True:
+        item, index = JSON_DECODER.raw_decode(data, index)
+        yield item
+        index = WHITESPACE.match(data, index).end()
+        separator = data[index:index + 1]
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError('expected , or ] at {0}'.format(index))
+        index = WHITESPACE.match(data, index + 1).end()
+
+
+def to_upper(match):
+    return match.group(1).upper()
+
+
+def to_lower(match):
+    return '{0}_{1}'.format(match.group(1), match.group(2).lower())
+
+
 class JsonEncoder(Encoder):
     mimetype = 'application/json'
     extension = 'json'
+    stateless = True
+    translated_keys = {}
 
     def encode(self, data):
-        to_upper = lambda match: match.group(1).upper()
-        return json.dumps(self.pass_through_all_values('_(.)', to_upper, data))
+        return json.dumps(self.pass_through_all_values(
+            SNAKE_CASE, to_upper, data))
 
     def decode(self, data):
         data = json.loads(data)
-        to_lower = lambda match: \
-                '{0}_{1}'.format(match.group(1), match.group(2).lower())
-        return self.pass_through_all_values('([a-z])([A-Z])', to_lower, data)
+        return self.pass_through_all_values(CAMEL_CASE, to_lower, data)
+
+    def decode_items(self, data):
+        for item in iter_json_array(data):
+            yield self.pass_through_all_values(CAMEL_CASE, to_lower, item)
+
+    def decode_key(self, key):
+        return self.translate_key(CAMEL_CASE, to_lower, key)
+
+    def translate_key(self, pattern, function, key):
+        """ keys repeat across models, so their translations are cached """
+        cache_key = (pattern, function, key)
+        new_key = self.translated_keys.get(cache_key)
+        if new_key is None:
+            if len(self.translated_keys) >= MAX_CACHED_KEYS:
+                self.translated_keys.clear()
+            new_key = self.translated_keys[cache_key] = \
+                    re.sub(pattern, function, key)
+        return new_key
 
     def pass_through_all_values(self, pattern, function, data):
         if isinstance(data, dict):
             new_dict = {}
+            translate_key = self.translate_key
+            pass_through = self.pass_through_all_values
             for key, value in data.items():
-                new_key = re.sub(pattern, function, key)
-                new_dict[new_key] = self.pass_through_all_values(
-                        pattern, function, value)
+                new_dict[translate_key(pattern, function, key)] = \
+                        pass_through(pattern, function, value)
             return new_dict
         if isinstance(data, (list, tuple)):
             for i in range(len(data)):
@@ -50,6 +122,15 @@ class JsonpEncoder(JsonEncoder):
         callback_name = self.get_callback_name()
         return "%s(%s);" % (callback_name, data)
 
+    def encode_raw(self, representation):
+        """ wrap a raw JSON body without decoding it """
+        if representation.content_type != JsonEncoder.mimetype:
+            return None
+        body = representation.body
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        return "%s(%s);" % (self.get_callback_name(), body)
+
     def get_callback_name(self):
         callback_name = self.default_callback_name
         if hasattr(self.handler, 'default_callback_name'):
@@ -60,24 +141,58 @@ class JsonpEncoder(JsonEncoder):
 class HtmlEncoder(Encoder):
     mimetype = 'text/html'
     extension = 'html'
+    template_name = 'templates/tapioca/resource.html'
+
+    # the loaders of the tapioca templates, by autoescape setting
+    template_loaders = {}
 
     def encode(self, data):
         pprint_data = json.dumps(data, sort_keys=True, indent=4)
-        return self.handler.render_string(
-                'templates/tapioca/resource.html',
-                    resource_content=pprint_data)
+        settings = self.handler.application.settings
+        if self.handler.get_template_path() or 'template_loader' in settings:
+            return self.handler.render_string(self.template_name,
+                        resource_content=pprint_data)
+        namespace = self.handler.get_template_namespace()
+        namespace['resource_content'] = pprint_data
+        return self.load_template(self.handler).generate(**namespace)
+
+    @classmethod
+    def load_template(cls, handler=None):
+        """ the template, compiled once by the loader of the tapioca
+        templates, used when the application has no template_path nor
+        template_loader. The loader is made by the handler, so it follows
+        the autoescape setting of its application """
+        settings = handler.application.settings if handler else {}
+        autoescape = settings.get('autoescape', template._DEFAULT_AUTOESCAPE)
+        loader = HtmlEncoder.template_loaders.get(autoescape)
+        if loader is None:
+            directory = os.path.dirname(__file__)
+            if handler is not None:
+                loader = handler.create_template_loader(directory)
+            else:
+                loader = template.Loader(directory)
+            HtmlEncoder.template_loaders[autoescape] = loader
+        return loader.load(cls.template_name)
 
 
 class SwaggerEncoder(JsonEncoder):
     extension = 'swagger'
+    stateless = True
 
     def encode(self, data):
+        documents = data.get('documents')
+        if documents and ('swagger', data['resource']) in documents:
+            return documents[('swagger', data['resource'])]
         return SwaggerSpecification(data['spec']).generate(data['resource'])
 
 
 class WADLEncoder(Encoder):
     mimetype = 'application/xml'
     extension = 'wadl'
+    stateless = True
 
     def encode(self, data):
+        documents = data.get('documents')
+        if documents and ('wadl', None) in documents:
+            return documents[('wadl', None)]
         return WADLSpecification(data['spec']).generate()
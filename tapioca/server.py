@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import errno
+import random
+import signal
+import logging
+from binascii import hexlify
+
+import tornado.web
+import tornado.netutil
+import tornado.process
+from tornado.ioloop import IOLoop
+from tornado.httpserver import HTTPServer
+
+from tapioca.change_log import FileChangeLog
+
+
+class RequestCounter(object):
+    """ application wrapper that knows how many requests are in flight
+
+    A request stops being in flight when it is finished or when the client
+    closed its connection, so an abandoned request does not hold a drain
+    until its timeout.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.requests = set()
+
+    @property
+    def in_flight(self):
+        for request in list(self.requests):
+            connection = request.connection
+            if connection is None or connection.stream.closed():
+                self.requests.discard(request)
+        return len(self.requests)
+
+    def __call__(self, request):
+        self.requests.add(request)
+        finish = request.finish
+
+        def counted_finish():
+            self.requests.discard(request)
+            finish()
+
+        request.finish = counted_finish
+        return self.application(request)
+
+
+def drain(server, counter, io_loop, timeout, callback, interval=0.1):
+    """ stop accepting connections and call callback when no request is
+    in flight anymore or after timeout seconds """
+    server.stop()
+    deadline = time.time() + timeout
+
+    def check():
+        if counter.in_flight <= 0 or time.time() >= deadline:
+            if counter.in_flight > 0:
+                logging.warning('%d requests still in flight after %s '
+                        'seconds, stopping anyway', counter.in_flight, timeout)
+            callback()
+        else:
+            io_loop.add_timeout(time.time() + interval, check)
+
+    check()
+
+
+def reseed_random():
+    """ a forked worker would otherwise draw the random numbers of its
+    parent and of its siblings """
+    try:
+        seed = int(hexlify(os.urandom(16)), 16)
+    except NotImplementedError:
+        seed = int(time.time() * 1000) ^ os.getpid()
+    random.seed(seed)
+
+
+def fork_workers(num_processes, max_restarts=100):
+    """ fork worker processes and return the worker id in each of them
+
+    The parent process never returns: it forwards SIGTERM and SIGINT to
+    the workers, restarts the ones that die unexpectedly and exits when
+    all of them are gone.
+    """
+    if num_processes is None or num_processes <= 0:
+        num_processes = tornado.process.cpu_count()
+    children = {}
+    state = {'stopping': False, 'restarts': 0}
+
+    def start_child(worker_id):
+        pid = os.fork()
+        if pid == 0:
+            reseed_random()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            return worker_id
+        children[pid] = worker_id
+        return None
+
+    def stop_children(signum, frame):
+        state['stopping'] = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_children)
+    signal.signal(signal.SIGINT, stop_children)
+    logging.info('Starting %d worker processes', num_processes)
+    for i in range(num_processes):
+        worker_id = start_child(i)
+        if worker_id is not None:
+            return worker_id
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                continue
+            raise
+        if pid not in children:
+            continue
+        worker_id = children.pop(pid)
+        if state['stopping'] or \
+                (os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0):
+            continue
+        logging.warning('worker %d (pid %d) died, restarting', worker_id, pid)
+        state['restarts'] += 1
+        if state['restarts'] > max_restarts:
+            stop_children(None, None)
+            raise RuntimeError('Too many worker restarts, giving up')
+        worker_id = start_child(worker_id)
+        if worker_id is not None:
+            return worker_id
+    sys.exit(0)
+
+
+def serve(api, port=8888, address='', processes=0, drain_timeout=10,
+        **settings):
+    """ serve a TornadoRESTful api
+
+    The application is built and the socket is bound once, before forking
+    `processes` workers (one per core when 0, no fork when 1). On SIGTERM
+    each worker stops accepting connections and waits up to `drain_timeout`
+    seconds for the requests in flight, then closes its webhooks, slow log
+    and change log before exiting. The api is frozen
+    before forking, so the workers start warm. A FileChangeLog belongs to
+    one process, it is refused with more than one worker; a ChangeFeed
+    only streams the writes of its own worker, a warning is logged.
+    """
+    if processes != 1 and isinstance(api.change_log, FileChangeLog):
+        raise ValueError('a FileChangeLog needs processes=1')
+    if processes != 1 and api.change_feed is not None:
+        logging.warning('The change feed is per process, its streams miss '
+                'the writes served by the other workers')
+    api.freeze()
+    application = tornado.web.Application(api.get_url_mapping(), **settings)
+    counter = RequestCounter(application)
+    sockets = tornado.netutil.bind_sockets(port, address)
+    if processes != 1:
+        fork_workers(processes)
+
+    io_loop = IOLoop.instance()
+    server = HTTPServer(counter, io_loop=io_loop)
+    server.add_sockets(sockets)
+    if api.lag_monitor is not None:
+        api.lag_monitor.start(io_loop)
+
+    draining = []
+
+    def on_signal(signum, frame):
+        if not draining:
+            draining.append(signum)
+            io_loop.add_callback(lambda: drain(
+                server, counter, io_loop, drain_timeout, io_loop.stop))
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    io_loop.start()
+    if api.lag_monitor is not None:
+        api.lag_monitor.stop()
+    if api.webhooks is not None:
+        api.webhooks.close()
+    if api.slow_log is not None:
+        api.slow_log.close(drain_timeout)
+    if api.change_log is not None:
+        api.change_log.close()
@@ -0,0 +1,100 @@
+import json
+import time
+import logging
+import threading
+from collections import deque
+
+try:
+    from Queue import Queue, Full
+except ImportError:
+    from queue import Queue, Full
+
+from tornado.ioloop import IOLoop
+
+from tapioca.capture import SENSITIVE_ARGUMENTS, redact_arguments
+
+
+class SlowRequestLog(object):
+    """ structured log of the requests slower than `threshold` seconds
+
+    Records are buffered and handed every `flush_interval` seconds to a
+    background thread that writes them to the logger, so the handlers of
+    the logger never block the IOLoop. When more than `max_buffer` records
+    are waiting, the oldest are dropped; when the thread is `max_batches`
+    flushes behind, the new batches are dropped. `dropped` counts them.
+    The sensitive query arguments of the uri are redacted.
+    """
+
+    def __init__(self, threshold=1.0, logger=None, flush_interval=1.0,
+            max_buffer=1000, max_batches=10, io_loop=None):
+        self.threshold = threshold
+        self.logger = logger or logging.getLogger('tapioca.slow_requests')
+        self.flush_interval = flush_interval
+        self.records = deque(maxlen=max_buffer)
+        self.io_loop = io_loop
+        self.flush_scheduled = False
+        self.queue = Queue(max_batches)
+        self.writer = None
+        self.dropped = 0
+        self.redact = redact_arguments(*SENSITIVE_ARGUMENTS)
+
+    def observe(self, handler, duration):
+        if duration < self.threshold:
+            return
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append(self.build_record(handler, duration))
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            io_loop = self.io_loop or IOLoop.instance()
+            io_loop.add_timeout(time.time() + self.flush_interval, self.flush)
+
+    def build_record(self, handler, duration):
+        timings = handler.timings
+        record = {
+            'resource': handler.resource_name,
+            'method': handler.request.method,
+            'uri': handler.request.uri,
+            'status': handler.get_status(),
+            'duration': duration,
+            'encoder': handler.response_encoder,
+            'request_size': len(handler.get_raw_body() or ''),
+            'response_size': handler.response_size,
+        }
+        for phase in ('validation', 'handler', 'encode'):
+            record[phase] = timings.get(phase) if timings else None
+        return self.redact(record)
+
+    def flush(self):
+        self.flush_scheduled = False
+        if not self.records:
+            return
+        records = list(self.records)
+        self.records.clear()
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.write_records)
+            self.writer.daemon = True
+            self.writer.start()
+        try:
+            self.queue.put_nowait(records)
+        except Full:
+            self.dropped += len(records)
+
+    def write_records(self):
+        while True:
+            records = self.queue.get()
+            if records is None:
+                return
+            for record in records:
+                self.logger.warning(json.dumps(record, sort_keys=True))
+
+    def close(self, timeout=None):
+        """ write the buffered records and stop the writer thread """
+        self.flush()
+        if self.writer is not None:
+            try:
+                self.queue.put(None, True, timeout)
+            except Full:
+                pass
+            self.writer.join(timeout)
+            self.writer = None
@@ -5,17 +5,23 @@ from tapioca.visitor import SimpleVisitor
 
 
 class SpecItem(object):
+    __slots__ = ('description',)
+
     def __init__(self, description=None, *args, **kwargs):
         self.description = description
 
 
 class NamedItem(SpecItem):
+    __slots__ = ('name',)
+
     def __init__(self, name=None, *args, **kwargs):
         super(NamedItem, self).__init__(*args, **kwargs)
         self.name = name
 
 
 class APISpecification(SpecItem):
+    __slots__ = ('version', 'base_url', 'complete_url', 'resources')
+
     def __init__(self, version=None, base_url=None):
         self.version = version
         self.base_url = base_url
@@ -26,6 +32,8 @@ class APISpecification(SpecItem):
         self.resources.append(resource)
 
 class Path(NamedItem):
+    __slots__ = ('params', 'methods')
+
     def __init__(self, name=None, params=[], methods=[], *args, **kwargs):
         super(Path, self).__init__(name, *args, **kwargs)
         self.params = params
@@ -33,6 +41,8 @@ class Path(NamedItem):
 
 
 class Resource(NamedItem):
+    __slots__ = ('paths',)
+
     def __init__(self, name=None, paths=None, *args, **kwargs):
         super(Resource, self).__init__(name, *args, **kwargs)
         if paths:
@@ -45,6 +55,8 @@ class Resource(NamedItem):
 
 
 class Param(NamedItem):
+    __slots__ = ('default_value', 'style', 'required', 'options')
+
     def __init__(self, name=None, default_value=None, style=None, required=True,
             options=[], *args, **kwargs):
         super(Param, self).__init__(name, *args, **kwargs)
@@ -55,13 +67,20 @@ class Param(NamedItem):
 
 
 class Method(NamedItem):
-    def __init__(self, name=None, errors=[], params=None, *args, **kwargs):
+    __slots__ = ('errors', 'params', 'rate_limit', 'content_encodings')
+
+    def __init__(self, name=None, errors=[], params=None, rate_limit=None,
+            content_encodings=None, *args, **kwargs):
         super(Method, self).__init__(name, *args, **kwargs)
         self.errors = errors
         self.params = params
+        self.rate_limit = rate_limit
+        self.content_encodings = content_encodings
 
 
 class APIError(SpecItem):
+    __slots__ = ('code',)
+
     def __init__(self, code=None, *args, **kwargs):
         super(APIError, self).__init__(*args, **kwargs)
         self.code = code
@@ -117,7 +136,7 @@ class SwaggerSpecification(SimpleVisitor, DocumentationHelpers):
         }
 
     def visit_method(self, node):
-        return {
+        operation = {
             'httpMethod': node.name,
             'nickname': self.slugify_method_with_path(node.name, self.current_path),
             'parameters': self.visit((self.current_params or []) + (node.params or [])),
@@ -125,6 +144,11 @@ class SwaggerSpecification(SimpleVisitor, DocumentationHelpers):
             'summary': '',
             'notes': '',
         }
+        if node.rate_limit:
+            operation['rateLimit'] = node.rate_limit
+        if node.content_encodings:
+            operation['contentEncodings'] = list(node.content_encodings)
+        return operation
 
     def visit_param(self, node):
         return {
@@ -180,3 +204,13 @@ class WADLSpecification(SimpleVisitor, DocumentationHelpers):
     def visit_param(self, node):
         self.output.append('<param name="{node.name}" required="true" type="xsd:string" style="template">'.format(node=node))
         self.output.append('</param>')
+
+
+def discovery_documents(spec):
+    """ ((format, resource name or None), content) of each discovery
+    document of spec """
+    yield ('swagger', None), SwaggerSpecification(spec).generate()
+    for resource in spec.resources:
+        yield ('swagger', resource.name), \
+                SwaggerSpecification(spec).generate(resource.name)
+    yield ('wadl', None), WADLSpecification(spec).generate()
@@ -0,0 +1,308 @@
+import os
+import hmac
+import time
+import random
+import logging
+import hashlib
+import tempfile
+import functools
+from collections import deque
+
+from tornado.ioloop import IOLoop
+
+from tapioca.client import build_http_client
+from tapioca.serializers import JsonEncoder
+
+
+class Subscriber(object):
+    """ an url that receives the changes of `resources` (all of them by
+    default) with one of `actions`. With a `secret` the batches are signed
+    with HMAC-SHA256 in the `X-Webhook-Signature` header. """
+
+    def __init__(self, url, resources=None, actions=None, secret=None):
+        self.url = url
+        self.resources = resources
+        self.actions = actions
+        self.secret = secret
+
+    def wants(self, resource, action):
+        return (self.resources is None or resource in self.resources) and \
+                (self.actions is None or action in self.actions)
+
+    def sign(self, body):
+        return 'sha256=' + hmac.new(self.secret.encode('utf-8'), body,
+                hashlib.sha256).hexdigest()
+
+
+class OverflowFile(object):
+    """ encoded events that did not fit in memory, as lines read back in
+    the order they were written. It only extends the memory of a queue, it
+    is not durable: the file is created empty in `directory`, with a name
+    starting with `prefix`, by the first append of each process, and
+    removed by close. Reads and writes are blocking file I/O on the IOLoop,
+    done while a subscriber is behind. """
+
+    def __init__(self, directory, prefix='webhook-'):
+        self.directory = directory
+        self.prefix = prefix
+        self.path = None
+        self.pid = None
+        self.count = 0
+        self.offset = 0
+
+    def create(self):
+        """ a file of this process; a forked worker does not share the
+        file of its parent """
+        if self.pid != os.getpid():
+            fd, self.path = tempfile.mkstemp(prefix=self.prefix,
+                    suffix='.overflow', dir=self.directory)
+            os.close(fd)
+            self.pid = os.getpid()
+            self.count = self.offset = 0
+
+    def append(self, events):
+        self.create()
+        with open(self.path, 'ab') as overflow:
+            for event in events:
+                overflow.write(event.encode('utf-8') + b'\n')
+        self.count += len(events)
+
+    def read(self, limit):
+        events = []
+        if self.pid != os.getpid():
+            return events
+        with open(self.path, 'rb') as overflow:
+            overflow.seek(self.offset)
+            while len(events) < limit:
+                line = overflow.readline()
+                if not line:
+                    break
+                events.append(line.decode('utf-8').rstrip('\n'))
+            self.offset = overflow.tell()
+        self.count -= len(events)
+        if self.count <= 0:
+            open(self.path, 'wb').close()
+            self.count = self.offset = 0
+        return events
+
+    def close(self):
+        if self.pid == os.getpid() and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = self.pid = None
+        self.count = self.offset = 0
+
+
+class SubscriberQueue(object):
+    """ the events waiting to be delivered to a subscriber, at most
+    `max_queue` in memory. The others go to the overflow file when there
+    is one, otherwise the oldest events are dropped. """
+
+    def __init__(self, subscriber, max_queue, overflow=None):
+        self.subscriber = subscriber
+        self.max_queue = max_queue
+        self.memory = deque()
+        self.overflow = overflow
+        self.to_overflow = []
+        self.overflow_scheduled = False
+        self.batch = None
+        self.attempts = 0
+        self.timeout = None
+        self.scheduled = False
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def __len__(self):
+        overflowed = self.overflow.count if self.overflow is not None else 0
+        return len(self.memory) + len(self.to_overflow) + overflowed
+
+    def append(self, event):
+        overflowing = self.to_overflow or \
+                (self.overflow is not None and self.overflow.count)
+        if not overflowing and len(self.memory) < self.max_queue:
+            self.memory.append(event)
+        elif self.overflow is not None:
+            self.to_overflow.append(event)
+        else:
+            self.memory.popleft()
+            self.memory.append(event)
+            self.dropped += 1
+
+    def write_overflow(self):
+        self.overflow_scheduled = False
+        if self.to_overflow:
+            self.overflow.append(self.to_overflow)
+            self.to_overflow = []
+
+    def take(self, size):
+        """ the next batch of at most size events """
+        batch = []
+        while self.memory and len(batch) < size:
+            batch.append(self.memory.popleft())
+        if self.overflow is not None:
+            self.write_overflow()
+            room = self.max_queue - len(self.memory)
+            if self.overflow.count and room > 0:
+                self.memory.extend(self.overflow.read(room))
+            while self.memory and len(batch) < size:
+                batch.append(self.memory.popleft())
+        return batch
+
+
+class WebhookDispatcher(object):
+    """ delivers the changes of resources to subscribers, in batches
+
+    It is a change listener: `TornadoRESTful(webhooks=WebhookDispatcher(
+    [Subscriber(url)]))` feeds it with the successful writes. Adding an
+    event only queues it; a batch is posted when the subscriber has
+    `batch_size` events or `batch_interval` seconds after its first event,
+    as `{"events": [...]}`, one batch at a time for each subscriber so they
+    arrive in order. Failed batches are retried after an exponential
+    backoff from `retry_delay` to `max_retry_delay` seconds, up to
+    `max_retries` times. Connections come from a pool of `max_clients`.
+    With an `overflow_directory`, the events over `max_queue` by subscriber
+    are written to files of the dispatcher there, named after
+    `overflow_prefix`, instead of being dropped. Those files are not a
+    journal: close removes them and the events still queued are lost.
+    Each event is encoded when it is added; one that can not be encoded
+    is logged and counted as failed.
+    """
+
+    def __init__(self, subscribers, batch_size=100, batch_interval=1.0,
+            max_queue=10000, max_retries=8, retry_delay=1.0,
+            max_retry_delay=300.0, overflow_directory=None,
+            overflow_prefix='webhook-', max_clients=10, request_timeout=20,
+            io_loop=None, http_client=None):
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_clients = max_clients
+        self.request_timeout = request_timeout
+        self.io_loop = io_loop
+        self.http_client = http_client
+        self.encoder = JsonEncoder(None)
+        self.queues = []
+        for index, subscriber in enumerate(subscribers):
+            overflow = None
+            if overflow_directory is not None:
+                overflow = OverflowFile(overflow_directory,
+                        '{0}{1}-'.format(overflow_prefix, index))
+            self.queues.append(SubscriberQueue(subscriber, max_queue,
+                overflow))
+
+    def get_io_loop(self):
+        if self.io_loop is None:
+            self.io_loop = IOLoop.instance()
+        return self.io_loop
+
+    def get_http_client(self):
+        if self.http_client is None:
+            self.http_client = build_http_client(self.get_io_loop(),
+                    self.max_clients)
+        return self.http_client
+
+    def __call__(self, resource, action, key, content=None):
+        queues = [queue for queue in self.queues
+                if queue.subscriber.wants(resource, action)]
+        if not queues:
+            return
+        try:
+            event = self.encoder.encode({'resource': resource,
+                'action': action, 'key': key, 'content': content,
+                'time': time.time()})
+        except (TypeError, ValueError):
+            logging.exception('Could not encode the %s change of %s',
+                    action, resource)
+            for queue in queues:
+                queue.failed += 1
+            return
+        for queue in queues:
+            queue.append(event)
+            if queue.to_overflow and not queue.overflow_scheduled:
+                queue.overflow_scheduled = True
+                self.get_io_loop().add_callback(queue.write_overflow)
+            self.schedule(queue)
+
+    def schedule(self, queue):
+        """ deliver the next batch of queue when it is full, or when its
+        first event waited `batch_interval` seconds """
+        if queue.batch is not None or queue.scheduled or not len(queue):
+            return
+        io_loop = self.get_io_loop()
+        if len(queue) >= self.batch_size:
+            if queue.timeout is not None:
+                io_loop.remove_timeout(queue.timeout)
+                queue.timeout = None
+            queue.scheduled = True
+            io_loop.add_callback(functools.partial(self.deliver, queue))
+        elif queue.timeout is None:
+            queue.timeout = io_loop.add_timeout(
+                    time.time() + self.batch_interval,
+                    functools.partial(self.deliver, queue))
+
+    def deliver(self, queue):
+        queue.timeout = None
+        queue.scheduled = False
+        if queue.batch is None:
+            queue.batch = queue.take(self.batch_size)
+            if not queue.batch:
+                queue.batch = None
+                return
+        body = '{{"events": [{0}]}}'.format(', '.join(queue.batch))
+        body = body.encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if queue.subscriber.secret is not None:
+            headers['X-Webhook-Signature'] = queue.subscriber.sign(body)
+        self.get_http_client().fetch(queue.subscriber.url,
+                functools.partial(self.on_response, queue),
+                method='POST', body=body, headers=headers,
+                request_timeout=self.request_timeout)
+
+    def should_retry(self, response):
+        return response.code >= 500 or response.code in (408, 429) or \
+                response.code < 200
+
+    def on_response(self, queue, response):
+        if 200 <= response.code < 300:
+            queue.delivered += len(queue.batch)
+        elif self.should_retry(response) and \
+                queue.attempts < self.max_retries:
+            queue.attempts += 1
+            queue.timeout = self.get_io_loop().add_timeout(
+                    time.time() + self.backoff(queue.attempts),
+                    functools.partial(self.deliver, queue))
+            return
+        else:
+            queue.failed += len(queue.batch)
+        queue.batch = None
+        queue.attempts = 0
+        self.schedule(queue)
+
+    def backoff(self, attempts):
+        delay = min(self.retry_delay * 2 ** (attempts - 1),
+                self.max_retry_delay)
+        return delay / 2 + random.random() * delay / 2
+
+    def close(self):
+        """ stop the deliveries and remove the overflow files, the queued
+        events are lost """
+        for queue in self.queues:
+            if queue.timeout is not None:
+                self.get_io_loop().remove_timeout(queue.timeout)
+                queue.timeout = None
+            if queue.overflow is not None:
+                queue.to_overflow = []
+                queue.overflow.close()
+        if self.http_client is not None:
+            self.http_client.close()
+            self.http_client = None
+
+    def stats(self):
+        return dict((queue.subscriber.url, {
+            'queued': len(queue),
+            'delivered': queue.delivered,
+            'failed': queue.failed,
+            'dropped': queue.dropped,
+        }) for queue in self.queues)
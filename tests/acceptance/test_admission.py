@@ -0,0 +1,67 @@
+import time
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler
+
+from tests.support import assert_response_code
+
+
+PENDING_CALLBACKS = []
+
+
+class SlowResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        PENDING_CALLBACKS.append(callback)
+
+
+class AdmissionControlTestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.api = TornadoRESTful(cross_origin_enabled=True)
+        self.api.add_resource('slow', SlowResource,
+                max_in_flight=1, max_queue=1, retry_after=5)
+        return tornado.web.Application(self.api.get_url_mapping())
+
+    def setUp(self, *args, **kw):
+        super(AdmissionControlTestCase, self).setUp(*args, **kw)
+        del PENDING_CALLBACKS[:]
+        self.responses = []
+
+    def start_request(self):
+        self.http_client.fetch(self.get_url('/slow'), self.responses.append)
+
+    def wait_until(self, condition):
+        while not condition():
+            self.io_loop.add_timeout(time.time() + 0.01, self.stop)
+            self.wait()
+
+    def test_should_shed_requests_when_the_queue_is_full(self):
+        for i in range(3):
+            self.start_request()
+        self.wait_until(lambda: len(self.responses) == 1)
+
+        assert_response_code(self.responses[0], 503)
+        assert self.responses[0].headers['Retry-After'] == '5'
+        assert self.responses[0].headers['Access-Control-Allow-Origin'] == \
+                '*'
+        assert self.api.get_admission_stats() == {
+            'slow': {'GET': {'in_flight': 1, 'queued': 1}}
+        }
+
+    def test_should_run_queued_request_when_a_slot_is_released(self):
+        self.start_request()
+        self.start_request()
+        self.wait_until(lambda: len(PENDING_CALLBACKS) == 1)
+
+        PENDING_CALLBACKS[0](['first'])
+        self.wait_until(lambda: len(PENDING_CALLBACKS) == 2)
+        PENDING_CALLBACKS[1](['second'])
+        self.wait_until(lambda: len(self.responses) == 2)
+
+        for response in self.responses:
+            assert_response_code(response, 200)
+        stats = self.api.get_admission_stats()['slow']['GET']
+        assert stats == {'in_flight': 0, 'queued': 0}
@@ -0,0 +1,80 @@
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, AllocationTracker
+from tapioca.allocations import tracemalloc
+
+from tests.support import assert_response_code
+
+
+LEAKED = []
+
+
+class LeakingResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        LEAKED.append(bytearray(100000))
+        callback([])
+
+
+class AllocationTrackerTestCase(AsyncHTTPTestCase):
+    # collected only where tracemalloc exists (Python 3.4 or later)
+    __test__ = tracemalloc is not None
+
+    def get_app(self):
+        self.tracker = AllocationTracker(token='s3cr3t')
+        api = TornadoRESTful(allocation_tracker=self.tracker)
+        api.add_resource('leaking', LeakingResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def tearDown(self):
+        del LEAKED[:]
+        super(AllocationTrackerTestCase, self).tearDown()
+
+    def fetch_with_token(self, path):
+        return self.fetch(path, headers={'X-Allocation-Token': 's3cr3t'})
+
+    def test_should_not_track_requests_out_of_the_sample(self):
+        assert_response_code(self.fetch('/leaking'), 200)
+        assert self.tracker.requests == {}
+        assert not tracemalloc.is_tracing()
+
+    def test_should_track_requests_with_the_token(self):
+        assert_response_code(self.fetch_with_token('/leaking'), 200)
+        assert_response_code(self.fetch_with_token('/leaking'), 200)
+        assert self.tracker.requests == {('leaking', 'GET'): 2}
+        assert self.tracker.allocated[('leaking', 'GET')] >= 200000
+        assert not tracemalloc.is_tracing()
+
+    def test_should_serve_the_top_allocation_sites(self):
+        assert_response_code(self.fetch_with_token('/leaking'), 200)
+        response = self.fetch_with_token(
+                '/_admin/allocations?resource=leaking&method=GET&limit=1')
+        assert_response_code(response, 200)
+        lines = response.body.decode('utf-8').splitlines()
+        assert lines[0].startswith('leaking GET: 1 requests')
+        assert len(lines) == 2
+        assert 'test_allocations.py' in lines[1]
+
+    def test_should_require_the_token(self):
+        assert_response_code(self.fetch('/_admin/allocations'), 403)
+
+    def test_should_refuse_an_invalid_limit(self):
+        assert_response_code(self.fetch_with_token(
+            '/_admin/allocations?resource=leaking&limit=many'), 400)
+
+    def test_should_return_not_found_for_untracked_resources(self):
+        assert_response_code(self.fetch_with_token(
+            '/_admin/allocations?resource=other'), 404)
+
+
+class AllocationTrackerWithoutTokenTestCase(AsyncHTTPTestCase):
+    __test__ = tracemalloc is not None
+
+    def get_app(self):
+        api = TornadoRESTful(allocation_tracker=AllocationTracker())
+        api.add_resource('leaking', LeakingResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_not_mount_the_admin_endpoint(self):
+        assert_response_code(self.fetch('/_admin/allocations'), 404)
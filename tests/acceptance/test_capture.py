@@ -0,0 +1,111 @@
+import os
+import time
+import shutil
+import tempfile
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, TrafficRecorder
+from tapioca.capture import read_capture, redact_headers, redact_arguments
+
+from tests.support import assert_response_code
+from tests.unit.test_compression import gzipped
+
+
+class CommentsResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        callback([{'id': 1}])
+
+    def create_model(self, callback):
+        callback()
+
+
+def drop_posts(record):
+    if record['method'] != 'POST':
+        return record
+
+
+class CaptureTestCase(AsyncHTTPTestCase):
+    redact = None
+
+    def get_app(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'capture.jsonl')
+        self.recorder = TrafficRecorder(self.path, redact=self.redact,
+                flush_interval=0.05, io_loop=self.io_loop)
+        api = TornadoRESTful(recorder=self.recorder)
+        api.add_resource('comments', CommentsResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(CaptureTestCase, self).tearDown()
+
+    def wait_for_flush(self):
+        self.io_loop.add_timeout(time.time() + 0.15, self.stop)
+        self.wait()
+
+
+class TrafficRecorderTestCase(CaptureTestCase):
+
+    def test_should_append_the_requests_to_the_capture(self):
+        assert_response_code(self.fetch('/comments?page=2',
+            headers={'Accept': 'application/json'}), 200)
+        assert_response_code(self.fetch('/comments', method='POST',
+            body='{"text": "a"}'), 201)
+        self.wait_for_flush()
+        records = list(read_capture(self.path))
+        assert len(records) == 2
+        assert records[0]['method'] == 'GET'
+        assert records[0]['uri'] == '/comments?page=2'
+        assert records[0]['headers']['Accept'] == 'application/json'
+        assert records[0]['status'] == 200
+        assert records[0]['duration'] >= 0
+        assert records[1]['body'] == '{"text": "a"}'
+
+    def test_should_record_a_compressed_body_as_it_was_received(self):
+        body = gzipped(b'{"text": "a"}')
+        assert_response_code(self.fetch('/comments', method='POST',
+            body=body, headers={'Content-Type': 'application/json',
+                'Content-Encoding': 'gzip'}), 201)
+        self.wait_for_flush()
+        record = list(read_capture(self.path))[0]
+        assert record['headers']['Content-Encoding'] == 'gzip'
+        assert record['body'] == body
+
+    def test_should_redact_sensitive_headers(self):
+        assert_response_code(self.fetch('/comments',
+            headers={'Authorization': 'Basic c2VjcmV0'}), 200)
+        self.wait_for_flush()
+        record = list(read_capture(self.path))[0]
+        assert record['headers']['Authorization'] == 'REDACTED'
+
+    def test_should_redact_sensitive_query_arguments(self):
+        assert_response_code(self.fetch('/comments?page=2&api_key=s3cr3t'),
+                200)
+        self.wait_for_flush()
+        record = list(read_capture(self.path))[0]
+        assert record['uri'] == '/comments?page=2&api_key=REDACTED'
+
+    def test_should_buffer_records_until_the_flush(self):
+        assert_response_code(self.fetch('/comments'), 200)
+        assert len(self.recorder.records) == 1
+        assert not os.path.exists(self.path)
+
+
+class RedactionHooksTestCase(CaptureTestCase):
+    redact = [redact_headers('X-Secret'), redact_arguments('q'), drop_posts]
+
+    def test_should_apply_the_hooks_to_each_record(self):
+        assert_response_code(self.fetch('/comments', method='POST',
+            body='{"text": "a"}'), 201)
+        assert_response_code(self.fetch('/comments?q=a&api_key=b',
+            headers={'X-Secret': 'a', 'Authorization': 'b'}), 200)
+        self.wait_for_flush()
+        records = list(read_capture(self.path))
+        assert len(records) == 1
+        assert records[0]['headers']['X-Secret'] == 'REDACTED'
+        assert records[0]['headers']['Authorization'] == 'b'
+        assert records[0]['uri'] == '/comments?q=REDACTED&api_key=b'
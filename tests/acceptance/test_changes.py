@@ -0,0 +1,200 @@
+from json import loads
+from unittest import TestCase
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, ChangeFeed, RateLimit
+from tapioca.rate_limit import TOO_MANY_REQUESTS
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class CommentsResource(ResourceHandler):
+
+    def create_model(self, callback):
+        callback(self.load_data(), '/comments/1')
+
+    def update_model(self, key, callback):
+        self.change_content = self.load_data()
+        callback()
+
+    def delete_model(self, key, callback):
+        callback()
+
+
+def can_listen(handler):
+    return handler.request.headers.get('X-Api-Key') == 's3cr3t'
+
+
+class Stream(object):
+
+    def __init__(self):
+        self.events = []
+
+    def push(self, data):
+        self.events.append(data)
+
+
+def parse_events(body):
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n')
+                if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((int(fields['id']), fields['event'],
+                loads(fields['data'])))
+    return events
+
+
+class ChangeFeedTestCase(TestCase):
+
+    def test_should_push_to_the_streams_of_the_resource(self):
+        feed = ChangeFeed(heartbeat=None, retry=None, include_content=True)
+        comments, users = Stream(), Stream()
+        feed.subscribe(comments, 'comments')
+        feed.subscribe(users, 'users')
+        feed('comments', 'created', '1', {'my_text': 'a'})
+        assert users.events == []
+        assert parse_events(comments.events[0]) == [(1, 'created',
+            {'key': '1', 'action': 'created', 'content': {'myText': 'a'}})]
+
+    def test_should_only_send_the_content_when_asked_to(self):
+        feed = ChangeFeed(heartbeat=None, retry=None)
+        stream = Stream()
+        feed.subscribe(stream, 'comments')
+        feed('comments', 'created', '1', {'text': 'a'})
+        assert parse_events(stream.events[0]) == [(1, 'created',
+            {'key': '1', 'action': 'created'})]
+
+    def test_should_resume_after_the_last_event_id(self):
+        feed = ChangeFeed(heartbeat=None, retry=None)
+        feed('comments', 'created', '1')
+        feed('users', 'created', '1')
+        feed('comments', 'deleted', '1')
+        stream = Stream()
+        feed.subscribe(stream, 'comments', last_event_id=1)
+        assert [event[:2] for event in parse_events(''.join(stream.events))] \
+                == [(3, 'deleted')]
+
+    def test_should_reset_when_the_history_is_too_short(self):
+        feed = ChangeFeed(history=1, heartbeat=None, retry=None)
+        feed('comments', 'created', '1')
+        feed('comments', 'created', '2')
+        stream = Stream()
+        feed.subscribe(stream, 'comments', last_event_id=0)
+        assert parse_events(stream.events[0])[0][1] == 'reset'
+
+    def test_should_forget_unsubscribed_streams(self):
+        feed = ChangeFeed(heartbeat=None)
+        stream = Stream()
+        feed.subscribe(stream, 'comments')
+        feed.unsubscribe(stream, 'comments')
+        assert feed.stream_count() == 0
+
+
+class ChangesStreamTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        self.feed = ChangeFeed(heartbeat=0.05, io_loop=self.io_loop,
+                authorize=can_listen, include_content=True)
+        api = TornadoRESTful(change_feed=self.feed)
+        api.add_resource('comments', CommentsResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def open_stream(self, headers=None):
+        self.body = ''
+        self.marker = 'retry:'
+
+        def on_chunk(chunk):
+            self.body += chunk.decode('utf-8')
+            if self.marker is not None and self.marker in self.body:
+                self.stop()
+
+        def on_response(response):
+            self.response = response
+            self.stop()
+
+        headers = dict(headers or {}, **{'X-Api-Key': 's3cr3t'})
+        self.http_client.fetch(self.get_url('/comments/changes'),
+                on_response, headers=headers, streaming_callback=on_chunk,
+                request_timeout=5)
+        self.wait()
+
+    def wait_for(self, marker):
+        self.marker = marker
+        if marker not in self.body:
+            self.wait()
+
+    def close_streams(self):
+        self.marker = None
+        for streams in list(self.feed.streams.values()):
+            for stream in list(streams):
+                stream.close_stream()
+        self.wait()
+        assert_response_code(self.response, 200)
+
+    def test_should_stream_the_writes(self):
+        self.open_stream()
+        response = self._fetch(self.get_url('/comments'), 'POST',
+                body='{"text": "a"}')
+        assert_response_code(response, 201)
+        self._fetch(self.get_url('/comments/1'), 'PUT', body='{"text": "b"}')
+        self.delete(self.get_url('/comments/1'))
+        self.wait_for('event: deleted')
+        events = parse_events(self.body)
+        assert [(action, data['key'], data['content'])
+                for event_id, action, data in events] == [
+            ('created', '1', {'text': 'a'}),
+            ('updated', '1', {'text': 'b'}),
+            ('deleted', '1', None)]
+        self.close_streams()
+        assert self.feed.stream_count() == 0
+
+    def test_should_send_heartbeats(self):
+        self.open_stream()
+        self.wait_for(': heartbeat')
+        self.close_streams()
+
+    def test_should_resume_from_the_last_event_id(self):
+        self.feed('comments', 'created', '1')
+        self.feed('comments', 'created', '2')
+        self.open_stream({'Last-Event-ID': '1'})
+        self.wait_for('id: 2')
+        assert [event[0] for event in parse_events(self.body)] == [2]
+        self.close_streams()
+
+    def test_should_not_notify_failed_writes(self):
+        self.open_stream()
+        response = self._fetch(self.get_url('/comments'), 'POST',
+                body='not json')
+        assert response.code == 500
+        assert 'event:' not in self.body
+        self.close_streams()
+
+    def test_should_refuse_streams_not_authorized(self):
+        assert_response_code(self.get('/comments/changes'), 403)
+
+
+class LimitedCommentsResource(CommentsResource):
+    pass
+
+
+class ChangesStreamOptionsTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        self.feed = ChangeFeed(heartbeat=None, path='_changes',
+                io_loop=self.io_loop)
+        api = TornadoRESTful(change_feed=self.feed)
+        api.add_resource('comments', LimitedCommentsResource,
+                rate_limit=RateLimit(1, period=60))
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_refuse_every_stream_without_authorize(self):
+        assert_response_code(self.get('/comments/_changes'), 403)
+
+    def test_should_apply_the_rate_limit_of_the_resource(self):
+        self.get('/comments/_changes')
+        response = self.get('/comments/_changes')
+        assert_response_code(response, TOO_MANY_REQUESTS)
+        assert response.headers['X-RateLimit-Remaining'] == '0'
@@ -0,0 +1,123 @@
+from unittest import TestCase
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, validate, optional, \
+        InvalidParamError
+from tapioca.client import Client, OperationNotSupported, DiscoveryError, \
+        EtagCache
+
+
+class CommentsResource(ResourceHandler):
+    store = {}
+
+    @validate(querystring={optional('author', None): str})
+    def get_collection(self, callback):
+        callback(sorted(self.store.values(), key=lambda model: model['id']))
+
+    def get_model(self, cid, callback):
+        callback(self.store[cid])
+
+    def create_model(self, callback):
+        model = self.load_data()
+        model['id'] = str(len(self.store) + 1)
+        self.store[model['id']] = model
+        callback(model, '/comments/{0}'.format(model['id']))
+
+    def update_model(self, cid, callback):
+        model = self.load_data()
+        model['id'] = cid
+        self.store[cid] = model
+        callback()
+
+
+class ClientTestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        CommentsResource.store = {'1': {'id': '1', 'author_name': 'someone'}}
+        self.api = TornadoRESTful(discovery=True)
+        self.api.add_resource('comments', CommentsResource)
+        return tornado.web.Application(self.api.get_url_mapping())
+
+    def build_client(self):
+        return Client(self.get_url(''), self.api.get_spec(),
+                io_loop=self.io_loop)
+
+    def call(self, operation, *args, **querystring):
+        operation(*(args + (self.stop,)), **querystring)
+        return self.wait()
+
+    def test_should_get_a_model_decoding_its_keys(self):
+        response = self.call(self.build_client().comments.get, '1')
+        assert response.code == 200
+        assert response.data == {'id': '1', 'author_name': 'someone'}
+
+    def test_should_reuse_the_cached_representation_when_not_modified(self):
+        client = self.build_client()
+        first = self.call(client.comments.get, '1')
+        second = self.call(client.comments.get, '1')
+        assert not first.cached
+        assert second.cached
+        assert second.code == 304
+        assert second.data == first.data
+
+    def test_should_create_and_update_models(self):
+        client = self.build_client()
+        response = self.call(client.comments.create, {'author_name': 'other'})
+        assert response.code == 201
+        assert response.location == '/comments/2'
+        assert response.data['author_name'] == 'other'
+        response = self.call(client.comments.update, '2',
+                {'author_name': 'changed'})
+        assert response.code == 204
+        assert self.call(client.comments.get, '2').data['author_name'] == \
+                'changed'
+
+    def test_should_get_models_concurrently(self):
+        client = self.build_client()
+        self.call(client.comments.create, {'author_name': 'other'})
+        responses = self.call(client.comments.bulk_get, ['2', '1', '3'])
+        assert [response.code for response in responses] == [200, 200, 500]
+        assert responses[1].data['id'] == '1'
+
+    def test_should_validate_the_querystring(self):
+        client = self.build_client()
+        assert self.call(client.comments.list, author='a').code == 200
+        self.assertRaises(InvalidParamError, client.comments.list,
+                self.stop, page=1)
+
+    def test_should_refuse_operations_missing_in_the_spec(self):
+        client = self.build_client()
+        self.assertRaises(OperationNotSupported, client.comments.delete,
+                '1', self.stop)
+        self.assertRaises(OperationNotSupported, client.resource, 'others')
+
+    def test_should_discover_the_api(self):
+        Client.discover(self.get_url(''), self.stop, io_loop=self.io_loop)
+        client = self.wait()
+        assert client.comments.collection_methods['GET'].params[0].name == \
+                'author'
+        response = self.call(client.comments.get, '1')
+        assert response.data['author_name'] == 'someone'
+
+    def test_should_pass_discovery_errors_to_the_errback(self):
+        Client.discover(self.get_url('/missing'), self.fail, self.stop,
+                io_loop=self.io_loop)
+        error = self.wait()
+        assert isinstance(error, DiscoveryError)
+        assert '404' in str(error)
+
+
+class EtagCacheTestCase(TestCase):
+
+    def test_should_forget_discarded_urls(self):
+        cache = EtagCache(max_entries=2)
+        cache.set('/a', '"1"', {})
+        cache.discard('/a')
+        cache.set('/b', '"2"', {})
+        cache.set('/a', '"3"', {})
+        assert list(cache.order) == ['/b', '/a']
+        cache.set('/c', '"4"', {})
+        assert cache.get('/a') == ('"3"', {})
+        assert cache.get('/b') is None
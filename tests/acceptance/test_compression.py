@@ -0,0 +1,69 @@
+import zlib
+from json import loads, dumps
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+from schema import Use
+
+from tapioca import TornadoRESTful, ResourceHandler, validate
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+from tests.unit.test_compression import gzipped
+
+
+class ImportResource(ResourceHandler):
+    max_decompressed_size = 100000
+
+    @validate(items={'name': Use(str)})
+    def create_model(self, callback):
+        callback({'names': [item['name'] for item in self.values['items']]})
+
+    def update_model(self, key, callback):
+        callback()
+
+
+class CompressedBodyTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        api = TornadoRESTful(discovery=True)
+        api.add_resource('imports', ImportResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def post_body(self, body, encoding):
+        return self._fetch(self.get_url('/imports'), 'POST', body=body,
+                headers={'Content-Type': 'application/json',
+                    'Content-Encoding': encoding})
+
+    def test_should_validate_a_gzipped_body(self):
+        body = gzipped(dumps([{'name': 'a'}, {'name': 'b'}]).encode('utf-8'))
+        response = self.post_body(body, 'gzip')
+        assert_response_code(response, 201)
+        assert loads(response.body.decode('utf-8')) == {'names': ['a', 'b']}
+
+    def test_should_load_a_deflated_body(self):
+        body = zlib.compress(dumps({'name': 'a'}).encode('utf-8'))
+        response = self._fetch(self.get_url('/imports/1'), 'PUT', body=body,
+                headers={'Content-Type': 'application/json',
+                    'Content-Encoding': 'deflate'})
+        assert_response_code(response, 204)
+
+    def test_should_refuse_a_decompression_bomb(self):
+        body = gzipped(b'[' + b' ' * 1000000 + b']')
+        assert_response_code(self.post_body(body, 'gzip'), 413)
+
+    def test_should_refuse_an_unsupported_encoding(self):
+        assert_response_code(self.post_body(b'[]', 'br'), 415)
+
+    def test_should_refuse_an_invalid_body(self):
+        assert_response_code(self.post_body(b'[]', 'gzip'), 400)
+
+    def test_should_list_the_encodings_in_discovery(self):
+        response = self.get('/discovery/imports.swagger')
+        content = loads(response.body.decode('utf-8'))
+        operations = dict((operation['httpMethod'], operation)
+                for api in content['apis'] for operation in api['operations'])
+        assert operations['POST']['contentEncodings'] == ['gzip', 'deflate']
+        assert operations['PUT']['contentEncodings'] == ['gzip', 'deflate']
+        for name, operation in operations.items():
+            if name not in ('POST', 'PUT'):
+                assert 'contentEncodings' not in operation
@@ -0,0 +1,106 @@
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, RateLimit
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class CommentsResource(ResourceHandler):
+    calls = 0
+
+    def get_collection(self, callback):
+        CommentsResource.calls += 1
+        callback([])
+
+    def create_model(self, callback):
+        CommentsResource.calls += 1
+        callback(1)
+
+    def get_model(self, key, callback):
+        callback({})
+
+    def delete_model(self, key, callback):
+        callback()
+
+
+class InstancesOnlyResource(ResourceHandler):
+
+    def get_model(self, key, callback):
+        callback({})
+
+
+class PreflightTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        CommentsResource.calls = 0
+        api = TornadoRESTful(cross_origin_enabled=True,
+                cross_origin_max_age=600)
+        api.add_resource('comments', CommentsResource,
+                rate_limit=RateLimit(1, period=60))
+        api.add_resource('instances', InstancesOnlyResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def preflight(self, path, method):
+        return self._fetch(self.get_url(path), 'OPTIONS', headers={
+            'Origin': 'http://example.com',
+            'Access-Control-Request-Method': method,
+            'Access-Control-Request-Headers': 'Content-Type'})
+
+    def test_should_answer_the_preflight_of_the_collection(self):
+        response = self.preflight('/comments', 'POST')
+        assert_response_code(response, 204)
+        assert response.headers['Access-Control-Allow-Origin'] == '*'
+        assert response.headers['Access-Control-Allow-Methods'] == \
+                'GET, POST'
+        assert 'Content-Type' in \
+                response.headers['Access-Control-Allow-Headers']
+        assert 'X-Api-Key' in \
+                response.headers['Access-Control-Allow-Headers']
+        assert response.headers['Access-Control-Max-Age'] == '600'
+        assert CommentsResource.calls == 0
+
+    def test_should_answer_the_preflight_of_an_instance(self):
+        response = self.preflight('/comments/1', 'DELETE')
+        assert_response_code(response, 204)
+        assert response.headers['Access-Control-Allow-Methods'] == \
+                'DELETE, GET'
+        response = self.preflight('/comments/1.json', 'DELETE')
+        assert_response_code(response, 204)
+
+    def test_should_refuse_the_preflight_of_an_url_without_methods(self):
+        response = self.preflight('/instances', 'GET')
+        assert_response_code(response, 405)
+        assert_response_code(self.preflight('/instances/1', 'GET'), 204)
+
+    def test_should_expose_the_headers_of_the_responses(self):
+        response = self.post(self.get_url('/comments'), '{}')
+        assert_response_code(response, 201)
+        exposed = response.headers['Access-Control-Expose-Headers']
+        for name in ('Location', 'ETag', 'X-RateLimit-Remaining'):
+            assert name in exposed
+
+    def test_should_let_scripts_read_a_refusal_of_the_rate_limit(self):
+        assert_response_code(self.get('/comments'), 200)
+        response = self.get('/comments')
+        assert response.code in (429, 503)
+        assert response.headers['Access-Control-Allow-Origin'] == '*'
+        assert 'Retry-After' in \
+                response.headers['Access-Control-Expose-Headers']
+
+    def test_should_not_rate_limit_preflights(self):
+        for attempt in range(3):
+            assert_response_code(self.preflight('/comments', 'POST'), 204)
+        assert_response_code(self.get('/comments'), 200)
+
+
+class WithoutCrossOriginTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        api = TornadoRESTful()
+        api.add_resource('comments', CommentsResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_not_answer_preflights(self):
+        response = self._fetch(self.get_url('/comments'), 'OPTIONS')
+        assert_response_code(response, 405)
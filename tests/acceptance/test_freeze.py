@@ -0,0 +1,75 @@
+from json import loads
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+from schema import Use
+
+from tapioca import TornadoRESTful, ResourceHandler, APIFrozen, validate
+from tapioca.serializers import HtmlEncoder
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class FrozenResource(ResourceHandler):
+
+    @validate(querystring={'page': Use(int)})
+    def get_collection(self, callback):
+        callback([{'page': self.values['querystring']['page']}])
+
+    @validate(body=Use(loads))
+    def create_model(self, callback):
+        callback()
+
+
+class FreezeTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        self.api = TornadoRESTful(version='v1',
+                base_url='http://api.tapioca.com', discovery=True)
+        self.api.add_resource('comments', FrozenResource)
+        self.report = self.api.freeze()
+        return tornado.web.Application(self.api.get_url_mapping())
+
+    def test_should_report_what_was_prepared(self):
+        assert self.report['validators'] == 2
+        assert self.report['discovery_documents'] == 3
+        assert self.report['templates'] == [HtmlEncoder.template_name]
+        assert self.report['routes'] == 6
+        assert self.report['content_types'] > 0
+
+    def test_should_return_the_compiled_url_specs(self):
+        specs = self.api.get_url_mapping()
+        assert len(specs) == 6
+        assert all(isinstance(spec, tornado.web.URLSpec) for spec in specs)
+        assert HtmlEncoder.template_loaders
+
+    def test_should_refuse_new_resources(self):
+        try:
+            self.api.add_resource('others', FrozenResource)
+        except APIFrozen:
+            pass
+        else:
+            assert False, 'should raise APIFrozen'
+
+    def test_should_return_the_same_report_when_frozen_again(self):
+        assert self.api.freeze() is self.report
+
+    def test_should_serve_the_resources(self):
+        response = self.get('/comments.json?page=2')
+        assert_response_code(response, 200)
+        assert loads(response.body.decode('utf-8')) == [{'page': 2}]
+        assert_response_code(self.post(self.get_url('/comments'),
+            '{"text": "a"}'), 201)
+        response = self.get('/comments.html?page=1')
+        assert_response_code(response, 200)
+
+    def test_should_serve_the_prepared_discovery_documents(self):
+        response = self.get('/discovery.swagger')
+        assert_response_code(response, 200)
+        assert response.body.decode('utf-8') == \
+                self.api.discovery_documents[('swagger', None)]
+        response = self.get('/discovery/comments.swagger')
+        assert loads(response.body.decode('utf-8'))['resourcePath'] == \
+                '/comments'
+        response = self.get('/discovery.wadl')
+        assert 'application' in response.body.decode('utf-8')
@@ -0,0 +1,91 @@
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, RepresentationCache
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class CommentsResource(ResourceHandler):
+    comments = {}
+    reads = 0
+
+    def get_collection(self, callback):
+        CommentsResource.reads += 1
+        callback(list(self.comments.values()))
+
+    def get_model(self, key, callback):
+        CommentsResource.reads += 1
+        callback(self.comments[key])
+
+    def update_model(self, key, callback):
+        self.comments[key] = self.load_data()
+        callback()
+
+
+class HeadTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+    cache = None
+
+    def get_app(self):
+        CommentsResource.comments = {'1': {'text': 'first'}}
+        CommentsResource.reads = 0
+        api = TornadoRESTful(representation_cache=self.cache)
+        api.add_resource('comments', CommentsResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def head(self, path, headers=None):
+        return self._fetch(self.get_url(path), 'HEAD', headers=headers)
+
+    def test_should_return_the_headers_of_get_without_body(self):
+        get = self.get('/comments/1')
+        response = self.head('/comments/1')
+        assert_response_code(response, 200)
+        assert response.body == b''
+        assert response.headers['Etag'] == get.headers['Etag']
+        assert response.headers['Content-Length'] == \
+                get.headers['Content-Length']
+        assert response.headers['Content-Type'] == get.headers['Content-Type']
+
+    def test_should_handle_the_collection(self):
+        response = self.head('/comments.json')
+        assert_response_code(response, 200)
+        assert int(response.headers['Content-Length']) > 0
+
+
+class CachedHeadTestCase(HeadTestCase):
+
+    def setUp(self):
+        self.cache = RepresentationCache()
+        super(CachedHeadTestCase, self).setUp()
+
+    def test_should_answer_from_the_cache_without_running_the_resource(self):
+        get = self.get('/comments/1')
+        response = self.head('/comments/1')
+        assert_response_code(response, 200)
+        assert response.headers['Etag'] == get.headers['Etag']
+        assert response.headers['Content-Length'] == \
+                get.headers['Content-Length']
+        assert CommentsResource.reads == 1
+
+    def test_should_answer_not_modified(self):
+        etag = self.get('/comments/1').headers['Etag']
+        response = self.head('/comments/1', {'If-None-Match': etag})
+        assert_response_code(response, 304)
+        assert CommentsResource.reads == 1
+
+    def test_should_drop_the_cache_on_writes(self):
+        etag = self.get('/comments/1').headers['Etag']
+        assert_response_code(self.put(self.get_url('/comments/1'),
+                '{"text": "changed"}'),
+                204)
+        response = self.head('/comments/1')
+        assert response.headers['Etag'] != etag
+        assert CommentsResource.reads == 2
+        assert len(self.cache) == 1
+
+    def test_should_cache_by_content_type(self):
+        self.get('/comments/1')
+        response = self.head('/comments/1.js')
+        assert_response_code(response, 200)
+        assert 'javascript' in response.headers['Content-Type']
+        assert CommentsResource.reads == 2
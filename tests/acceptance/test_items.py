@@ -0,0 +1,53 @@
+from json import loads, dumps
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+from schema import Use
+
+from tapioca import TornadoRESTful, ResourceHandler, validate
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class ImportResource(ResourceHandler):
+    imported = []
+
+    @validate(items={'name': Use(str), 'score': Use(int)})
+    def create_model(self, callback):
+        count = 0
+        for item in self.values['items']:
+            self.imported.append(item)
+            count += 1
+        callback({'imported': count})
+
+
+class ItemsValidationTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        ImportResource.imported = []
+        api = TornadoRESTful()
+        api.add_resource('imports', ImportResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def post_json(self, body):
+        return self._fetch(self.get_url('/imports'), 'POST', body=body,
+                headers={'Content-Type': 'application/json'})
+
+    def test_should_feed_the_validated_items_to_the_handler(self):
+        response = self.post_json(dumps([{'name': 'a', 'score': '1'},
+            {'name': 'b', 'score': 2}]))
+        assert_response_code(response, 201)
+        assert loads(response.body.decode('utf-8')) == {'imported': 2}
+        assert ImportResource.imported == [{'name': 'a', 'score': 1},
+                {'name': 'b', 'score': 2}]
+
+    def test_should_refuse_an_invalid_item(self):
+        response = self.post_json(dumps([{'name': 'a', 'score': '1'},
+            {'name': 'b', 'score': 'many'}]))
+        assert_response_code(response, 400)
+        assert ImportResource.imported == [{'name': 'a', 'score': 1}]
+
+    def test_should_refuse_a_body_that_is_not_a_list(self):
+        assert_response_code(self.post_json('{"name": "a"}'), 400)
+        assert_response_code(self.post_json('[{"name": "a", "score": 1} '),
+                400)
@@ -0,0 +1,46 @@
+import time
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, LoopLagMonitor
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class BlockingResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        time.sleep(0.3)
+        callback([])
+
+
+class LoopLagMonitorTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        self.monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+        api = TornadoRESTful(metrics=True, lag_monitor=self.monitor)
+        api.add_resource('blocking', BlockingResource)
+        self.monitor.start(self.io_loop)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def tearDown(self):
+        self.monitor.stop()
+        super(LoopLagMonitorTestCase, self).tearDown()
+
+    def test_should_attribute_the_blocking_code_to_the_resource(self):
+        assert_response_code(self.get('/blocking'), 200)
+        assert len(self.monitor.reports) == 1
+        report = self.monitor.reports[0]
+        assert report['resource'] == 'blocking'
+        assert report['method'] == 'GET'
+        assert report['blocked'] > 0.1
+        assert 'get_collection' in ''.join(report['stack'])
+
+    def test_should_export_the_lag_histogram(self):
+        assert_response_code(self.get('/blocking'), 200)
+        self.io_loop.add_timeout(time.time() + 0.05, self.stop)
+        self.wait()
+        body = self.get('/metrics').body.decode('utf-8')
+        assert 'tapioca_ioloop_lag_seconds_bucket{le="0.25"}' in body
+        assert 'tapioca_ioloop_lag_seconds_count{} 0' not in body
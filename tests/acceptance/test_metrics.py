@@ -0,0 +1,44 @@
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, validate
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class MeasuredResource(ResourceHandler):
+
+    @validate(querystring={})
+    def get_collection(self, callback):
+        callback([{'id': 1}])
+
+
+class MetricsEndpointTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        api = TornadoRESTful(metrics=True)
+        api.add_resource('measured', MeasuredResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_expose_phases_by_resource_and_method(self):
+        assert_response_code(self.get('/measured'), 200)
+        response = self.get('/metrics')
+        assert_response_code(response, 200)
+        assert response.headers['Content-Type'].startswith('text/plain')
+        body = response.body.decode('utf-8')
+        for phase in ('negotiation', 'validation', 'handler', 'encode'):
+            assert 'resource="measured",method="GET",phase="{0}"'.format(
+                    phase) in body, phase
+        assert 'tapioca_request_duration_seconds_count{resource="measured",' \
+                'method="GET"} 1' in body
+
+
+class NoMetricsEndpointTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        api = TornadoRESTful()
+        api.add_resource('measured', MeasuredResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_not_expose_metrics_by_default(self):
+        assert_response_code(self.get('/metrics'), 404)
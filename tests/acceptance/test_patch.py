@@ -0,0 +1,97 @@
+from json import loads, dumps
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+from schema import Use
+
+from tapioca import TornadoRESTful, ResourceHandler, ResourceDoesNotExist, \
+        validate
+from tapioca.patch import MERGE_PATCH, JSON_PATCH
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class CommentsResource(ResourceHandler):
+    comments = {}
+
+    def get_model(self, key, callback):
+        callback(self.comments[key])
+
+    @validate(fields={'text': Use(str), 'score': Use(int)})
+    def patch_model(self, key, patch, callback):
+        self.comments[key] = patch.apply(self.comments[key])
+        callback()
+
+
+class DeferredCommentsResource(CommentsResource):
+
+    def patch_model(self, key, patch, callback):
+        def apply():
+            if key not in self.comments:
+                raise ResourceDoesNotExist()
+            self.comments[key] = patch.apply(self.comments[key])
+            callback()
+        self.request.connection.stream.io_loop.add_callback(apply)
+
+
+class PatchTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        CommentsResource.comments = {'1': {'text': 'first', 'score': 1}}
+        api = TornadoRESTful(discovery=True)
+        api.add_resource('comments', CommentsResource)
+        api.add_resource('deferred', DeferredCommentsResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def patch(self, path, document, content_type):
+        return self._fetch(self.get_url(path), 'PATCH', body=dumps(document),
+                headers={'Content-Type': content_type})
+
+    def test_should_apply_a_merge_patch(self):
+        response = self.patch('/comments/1', {'score': '5'}, MERGE_PATCH)
+        assert_response_code(response, 204)
+        assert CommentsResource.comments['1'] == {'text': 'first',
+                'score': 5}
+
+    def test_should_apply_a_json_patch(self):
+        response = self.patch('/comments/1', [
+            {'op': 'test', 'path': '/text', 'value': 'first'},
+            {'op': 'replace', 'path': '/score', 'value': '7'}], JSON_PATCH)
+        assert_response_code(response, 204)
+        assert CommentsResource.comments['1']['score'] == 7
+
+    def test_should_validate_only_the_changed_fields(self):
+        response = self.patch('/comments/1', {'score': 'many'}, MERGE_PATCH)
+        assert_response_code(response, 400)
+        response = self.patch('/comments/1', {'author': 'me'},
+                'application/json')
+        assert_response_code(response, 400)
+        assert CommentsResource.comments['1']['score'] == 1
+
+    def test_should_answer_conflicts(self):
+        response = self.patch('/comments/1', [
+            {'op': 'test', 'path': '/text', 'value': 'other'}], JSON_PATCH)
+        assert_response_code(response, 409)
+
+    def test_should_answer_errors_raised_after_the_patch_returned(self):
+        response = self.patch('/deferred/1', [
+            {'op': 'test', 'path': '/text', 'value': 'other'}], JSON_PATCH)
+        assert_response_code(response, 409)
+        response = self.patch('/deferred/2', {'score': 2}, MERGE_PATCH)
+        assert_response_code(response, 404)
+        response = self.patch('/deferred/1', {'score': 2}, MERGE_PATCH)
+        assert_response_code(response, 204)
+
+    def test_should_refuse_other_content_types(self):
+        assert_response_code(self.patch('/comments/1', {}, 'text/plain'),
+                415)
+
+    def test_should_not_patch_the_collection(self):
+        assert_response_code(self.patch('/comments', {}, MERGE_PATCH), 405)
+
+    def test_should_list_patch_in_discovery(self):
+        response = self.get('/discovery/comments.swagger')
+        content = loads(response.body.decode('utf-8'))
+        methods = [operation['httpMethod']
+                for api in content['apis'] for operation in api['operations']]
+        assert 'PATCH' in methods
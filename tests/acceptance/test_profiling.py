@@ -0,0 +1,79 @@
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, RequestProfiler
+
+from tests.support import assert_response_code
+
+
+def busy_function():
+    return sum(range(1000))
+
+
+class ProfiledResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        callback([busy_function()])
+
+
+class ProfilerTestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.profiler = RequestProfiler(sample_rate=0.0, token='s3cr3t')
+        api = TornadoRESTful(profiler=self.profiler)
+        api.add_resource('profiled', ProfiledResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def fetch_with_token(self, path):
+        return self.fetch(path, headers={'X-Profile-Token': 's3cr3t'})
+
+    def test_should_not_profile_requests_out_of_the_sample(self):
+        assert_response_code(self.fetch('/profiled'), 200)
+        assert self.profiler.stats == {}
+
+    def test_should_profile_requests_with_the_debug_token(self):
+        assert_response_code(self.fetch_with_token('/profiled'), 200)
+        assert_response_code(self.fetch_with_token('/profiled'), 200)
+        assert self.profiler.requests == {('profiled', 'GET'): 2}
+
+        response = self.fetch_with_token('/_admin/profile')
+        assert response.body.decode('utf-8') == 'profiled GET 2\n'
+
+    def test_should_return_the_hot_functions_as_pstats(self):
+        self.fetch_with_token('/profiled')
+        response = self.fetch_with_token(
+                '/_admin/profile?resource=profiled&method=GET&limit=50')
+        assert_response_code(response, 200)
+        assert 'busy_function' in response.body.decode('utf-8')
+
+    def test_should_return_the_hot_functions_as_collapsed_stacks(self):
+        self.fetch_with_token('/profiled')
+        response = self.fetch_with_token('/_admin/profile?resource=profiled'
+                '&method=GET&format=collapsed&limit=1000')
+        assert_response_code(response, 200)
+        lines = response.body.decode('utf-8').splitlines()
+        assert [line for line in lines if
+                'get_collection' in line and 'busy_function' in line]
+
+    def test_should_refuse_the_admin_endpoint_without_token(self):
+        assert_response_code(self.fetch('/_admin/profile'), 403)
+
+    def test_should_refuse_an_invalid_limit(self):
+        response = self.fetch_with_token(
+                '/_admin/profile?resource=profiled&limit=many')
+        assert_response_code(response, 400)
+
+    def test_should_return_not_found_for_unknown_resources(self):
+        response = self.fetch_with_token('/_admin/profile?resource=unknown')
+        assert_response_code(response, 404)
+
+
+class ProfilerWithoutTokenTestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        api = TornadoRESTful(profiler=RequestProfiler(sample_rate=1.0))
+        api.add_resource('profiled', ProfiledResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_not_mount_the_admin_endpoint(self):
+        assert_response_code(self.fetch('/_admin/profile'), 404)
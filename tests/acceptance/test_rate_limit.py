@@ -0,0 +1,65 @@
+from json import loads
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, RateLimit
+from tapioca.rate_limit import TOO_MANY_REQUESTS
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class LimitedResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        callback([])
+
+
+class RateLimitTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        api = TornadoRESTful(discovery=True)
+        api.add_resource('limited', LimitedResource,
+                rate_limit=RateLimit({'GET': 2}, period=60))
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_return_rate_limit_headers(self):
+        response = self.get('/limited')
+        assert_response_code(response, 200)
+        assert response.headers['X-RateLimit-Limit'] == '2'
+        assert response.headers['X-RateLimit-Remaining'] == '1'
+        assert 'X-RateLimit-Reset' in response.headers
+
+    def test_should_refuse_requests_over_the_limit(self):
+        self.get('/limited')
+        self.get('/limited')
+        response = self.get('/limited')
+        assert_response_code(response, TOO_MANY_REQUESTS)
+        assert response.headers['X-RateLimit-Remaining'] == '0'
+        assert 'Retry-After' in response.headers
+
+    def test_should_list_the_rate_limit_in_discovery(self):
+        response = self.get('/discovery/limited.swagger')
+        content = loads(response.body.decode('utf-8'))
+        operation = content['apis'][0]['operations'][0]
+        assert operation['rateLimit'] == {'requests': 2, 'period': 60}
+
+
+class SeveralRegistrationsTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        api = TornadoRESTful()
+        api.add_resource('limited', LimitedResource,
+                rate_limit=RateLimit(1, period=60))
+        api.add_resource('free', LimitedResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_keep_the_settings_of_each_registration(self):
+        assert_response_code(self.get('/limited'), 200)
+        assert_response_code(self.get('/limited'), TOO_MANY_REQUESTS)
+        for attempt in range(3):
+            response = self.get('/free')
+            assert_response_code(response, 200)
+            assert 'X-RateLimit-Limit' not in response.headers
+        assert LimitedResource.rate_limit is None
+        assert LimitedResource.resource_name is None
@@ -0,0 +1,56 @@
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, RawRepresentation
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+STORED = b'{"myText": "stored as JSON", "votes": [1, 2]}'
+
+
+class DocumentsResource(ResourceHandler):
+
+    def get_model(self, key, callback):
+        if key == 'csv':
+            callback(RawRepresentation(b'a,b\n1,2\n', 'text/csv'))
+        else:
+            callback(RawRepresentation(STORED,
+                'application/json; charset=utf-8'))
+
+    def create_model(self, callback):
+        callback(RawRepresentation(STORED), '/documents/1')
+
+
+class RawRepresentationTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        api = TornadoRESTful()
+        api.add_resource('documents', DocumentsResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_write_the_body_as_is(self):
+        response = self.get('/documents/1.json')
+        assert_response_code(response, 200)
+        assert response.body == STORED
+        assert response.headers['Content-Type'] == 'application/json'
+        assert 'Etag' in response.headers
+
+    def test_should_write_the_created_body_as_is(self):
+        response = self._fetch(self.get_url('/documents'), 'POST', body='{}',
+                headers={'Accept': 'application/json'})
+        assert_response_code(response, 201)
+        assert response.body == STORED
+
+    def test_should_wrap_json_in_the_callback(self):
+        response = self.get('/documents/1.js?callback=show')
+        assert_response_code(response, 200)
+        assert response.body == b'show(' + STORED + b');'
+
+    def test_should_transcode_to_other_types(self):
+        response = self.get('/documents/1.html')
+        assert_response_code(response, 200)
+        assert b'my_text' in response.body
+
+    def test_should_refuse_types_it_can_not_transcode(self):
+        assert_response_code(self.get('/documents/csv.json'), 406)
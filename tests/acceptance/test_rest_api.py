@@ -5,6 +5,7 @@ from xml.etree import ElementTree
 from unittest import TestCase
 
 import tornado.web
+from tornado import template
 from tornado.testing import AsyncHTTPTestCase
 
 from tapioca import TornadoRESTful, ResourceHandler, \
@@ -323,3 +324,46 @@ class ResourceHandlerWithoutImplementationTestCase(AsyncHTTPTestCase,\
     def test_try_to_delete_a_resource(self):
         response = self.delete(self.get_url('/api/1'))
         assert_response_code(response, 404)
+
+
+class MarkupResource(ResourceHandler):
+
+    def get_model(self, key, callback):
+        callback({'text': '<b>bold</b>'})
+
+
+class HtmlTemplateSettingsTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+    settings = {}
+
+    def get_app(self):
+        api = TornadoRESTful()
+        api.add_resource('markup', MarkupResource)
+        return tornado.web.Application(api.get_url_mapping(),
+                **self.settings)
+
+    def get_html(self):
+        response = self._fetch(self.get_url('/markup/1'), 'GET',
+                headers={'Accept': 'text/html'})
+        assert_response_code(response, 200)
+        return response.body.decode('utf-8')
+
+
+class DefaultTemplateSettingsTestCase(HtmlTemplateSettingsTestCase):
+
+    def test_should_escape_the_content(self):
+        assert '&lt;b&gt;bold' in self.get_html()
+
+
+class WithoutAutoescapeTestCase(HtmlTemplateSettingsTestCase):
+    settings = {'autoescape': None}
+
+    def test_should_follow_the_autoescape_setting(self):
+        assert '<b>bold</b>' in self.get_html()
+
+
+class WithTemplateLoaderTestCase(HtmlTemplateSettingsTestCase):
+    settings = {'template_loader': template.DictLoader({
+        'templates/tapioca/resource.html': 'custom {{ resource_content }}'})}
+
+    def test_should_use_the_template_loader_of_the_application(self):
+        assert self.get_html().startswith('custom {')
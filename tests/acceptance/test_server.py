@@ -0,0 +1,134 @@
+import os
+import time
+import random
+import signal
+import shutil
+import tempfile
+from unittest import TestCase
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tornado.ioloop import IOLoop
+
+from tapioca import TornadoRESTful, ResourceHandler, FileChangeLog, \
+        SlowRequestLog
+from tapioca.server import RequestCounter, drain, serve, reseed_random
+
+from tests.support import assert_response_code
+
+
+PENDING_CALLBACKS = []
+
+
+class WaitingResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        PENDING_CALLBACKS.append(callback)
+
+
+class GracefulDrainTestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        api = TornadoRESTful()
+        api.add_resource('waiting', WaitingResource)
+        self.counter = RequestCounter(
+                tornado.web.Application(api.get_url_mapping()))
+        return self.counter
+
+    def setUp(self, *args, **kw):
+        super(GracefulDrainTestCase, self).setUp(*args, **kw)
+        del PENDING_CALLBACKS[:]
+        self.responses = []
+        self.drained = []
+
+    def wait_until(self, condition):
+        while not condition():
+            self.io_loop.add_timeout(time.time() + 0.01, self.stop)
+            self.wait()
+
+    def test_should_count_requests_in_flight(self):
+        self.http_client.fetch(self.get_url('/waiting'), self.responses.append)
+        self.wait_until(lambda: PENDING_CALLBACKS)
+        assert self.counter.in_flight == 1
+
+        PENDING_CALLBACKS[0]([])
+        self.wait_until(lambda: self.responses)
+        assert_response_code(self.responses[0], 200)
+        assert self.counter.in_flight == 0
+
+    def test_should_wait_for_requests_in_flight_when_draining(self):
+        self.http_client.fetch(self.get_url('/waiting'), self.responses.append)
+        self.wait_until(lambda: PENDING_CALLBACKS)
+
+        drain(self.http_server, self.counter, self.io_loop, 10,
+                lambda: self.drained.append(True), interval=0.01)
+        self.io_loop.add_timeout(time.time() + 0.05, self.stop)
+        self.wait()
+        assert self.counter.in_flight == 1
+        assert not self.drained
+
+        PENDING_CALLBACKS[0]([])
+        self.wait_until(lambda: self.drained)
+        assert_response_code(self.responses[0], 200)
+
+    def test_should_give_up_waiting_after_the_timeout(self):
+        self.http_client.fetch(self.get_url('/waiting'), self.responses.append)
+        self.wait_until(lambda: PENDING_CALLBACKS)
+
+        drain(self.http_server, self.counter, self.io_loop, 0.05,
+                lambda: self.drained.append(True), interval=0.01)
+        self.wait_until(lambda: self.drained)
+        assert self.counter.in_flight == 1
+
+    def test_should_not_count_requests_whose_client_went_away(self):
+        self.http_client.fetch(self.get_url('/waiting'), self.responses.append,
+                request_timeout=0.05)
+        self.wait_until(lambda: PENDING_CALLBACKS)
+        assert self.counter.in_flight == 1
+
+        self.wait_until(lambda: self.responses)
+        self.wait_until(lambda: self.counter.in_flight == 0)
+        drain(self.http_server, self.counter, self.io_loop, 10,
+                lambda: self.drained.append(True), interval=0.01)
+        self.wait_until(lambda: self.drained)
+
+
+class ServeTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_refuse_a_file_change_log_with_several_workers(self):
+        change_log = FileChangeLog(os.path.join(self.directory, 'changes'))
+        api = TornadoRESTful(change_log=change_log)
+        self.assertRaises(ValueError, serve, api, processes=2)
+        change_log.close()
+
+    def test_should_close_the_observers_when_the_loop_stops(self):
+        change_log = FileChangeLog(os.path.join(self.directory, 'changes'))
+        slow_log = SlowRequestLog()
+        slow_log.records.append({'uri': '/'})
+        api = TornadoRESTful(change_log=change_log, slow_log=slow_log)
+        handlers = (signal.getsignal(signal.SIGTERM),
+                signal.getsignal(signal.SIGINT))
+        io_loop = IOLoop.instance()
+        io_loop.add_callback(io_loop.stop)
+        try:
+            serve(api, port=0, address='127.0.0.1', processes=1)
+        finally:
+            signal.signal(signal.SIGTERM, handlers[0])
+            signal.signal(signal.SIGINT, handlers[1])
+        assert change_log.file.closed
+        assert slow_log.writer is None
+        assert len(slow_log.records) == 0
+
+    def test_should_reseed_the_random_numbers(self):
+        random.seed(0)
+        drawn = random.random()
+        random.seed(0)
+        reseed_random()
+        assert random.random() != drawn
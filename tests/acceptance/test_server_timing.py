@@ -0,0 +1,53 @@
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler
+
+from tests.support import assert_response_code
+
+
+class TimedResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        callback([{'id': 1}])
+
+    def delete_model(self, cid, callback):
+        callback()
+
+
+class ServerTimingTestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        api = TornadoRESTful(server_timing=True)
+        api.add_resource('timed', TimedResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_return_the_phases_of_the_request(self):
+        response = self.fetch('/timed')
+        assert_response_code(response, 200)
+        header = response.headers['Server-Timing']
+        for phase in ('routing', 'negotiation', 'handler', 'encode', 'write'):
+            assert '{0};dur='.format(phase) in header, header
+
+    def test_should_return_the_phases_of_requests_without_body(self):
+        response = self.fetch('/timed/1', method='DELETE')
+        assert_response_code(response, 200)
+        assert 'handler;dur=' in response.headers['Server-Timing']
+
+
+class ServerTimingWithTokenTestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        api = TornadoRESTful(server_timing_token='s3cr3t')
+        api.add_resource('timed', TimedResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def test_should_not_return_timing_to_untrusted_requests(self):
+        response = self.fetch('/timed')
+        assert_response_code(response, 200)
+        assert 'Server-Timing' not in response.headers
+
+    def test_should_return_timing_when_the_token_is_sent(self):
+        response = self.fetch('/timed',
+                headers={'X-Server-Timing-Token': 's3cr3t'})
+        assert 'handler;dur=' in response.headers['Server-Timing']
@@ -0,0 +1,68 @@
+from json import loads, dumps
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, MemoryChangeLog, \
+        ResourceDoesNotExist
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class CommentsResource(ResourceHandler):
+    comments = {}
+
+    def get_collection(self, callback):
+        callback(sorted(self.comments.values(), key=lambda c: c['id']))
+
+    def get_model(self, key, callback):
+        if key not in self.comments:
+            raise ResourceDoesNotExist()
+        callback(self.comments[key])
+
+    def update_model(self, key, callback):
+        self.comments[key] = self.load_data()
+        callback()
+
+    def delete_model(self, key, callback):
+        del self.comments[key]
+        callback()
+
+
+class SinceTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        CommentsResource.comments = {'1': {'id': 1}, '2': {'id': 2}}
+        self.log = MemoryChangeLog()
+        api = TornadoRESTful(change_log=self.log)
+        api.add_resource('comments', CommentsResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def changes(self, token):
+        response = self.get('/comments?since={0}'.format(token))
+        assert_response_code(response, 200)
+        return loads(response.body.decode('utf-8'))
+
+    def test_should_return_only_the_changes_since_the_token(self):
+        token = self.get('/comments').headers['X-Since-Token']
+        self.put(self.get_url('/comments/3'), dumps({'id': 3}))
+        self.put(self.get_url('/comments/1'), dumps({'id': 1, 'text': 'a'}))
+        self.delete(self.get_url('/comments/2'))
+        changes = self.changes(token)
+        assert changes['items'] == [{'id': 3}, {'id': 1, 'text': 'a'}]
+        assert changes['deleted'] == ['2']
+        assert self.changes(changes['since']) == {'items': [],
+                'deleted': [], 'since': changes['since']}
+
+    def test_should_report_models_gone_since_as_deleted(self):
+        token = self.log.token()
+        self.put(self.get_url('/comments/3'), dumps({'id': 3}))
+        del CommentsResource.comments['3']
+        changes = self.changes(token)
+        assert changes['items'] == []
+        assert changes['deleted'] == ['3']
+
+    def test_should_refuse_unknown_tokens(self):
+        assert_response_code(self.get('/comments?since=garbage'), 400)
+        assert_response_code(self.get('/comments?since={0}'.format(
+            MemoryChangeLog().token())), 410)
@@ -0,0 +1,137 @@
+import json
+import time
+import logging
+import threading
+from unittest import TestCase
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, SlowRequestLog
+
+from tests.support import assert_response_code
+from tests.unit.test_compression import gzipped
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class SlowResource(ResourceHandler):
+
+    def get_collection(self, callback):
+        time.sleep(0.02)
+        callback([{'id': 1}])
+
+    def get_model(self, cid, callback):
+        callback({'id': cid})
+
+    def create_model(self, callback):
+        time.sleep(0.02)
+        callback()
+
+
+class SlowRequestLogTestCase(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.log_handler = ListHandler()
+        logger = logging.getLogger('tests.slow_requests')
+        logger.addHandler(self.log_handler)
+        self.slow_log = SlowRequestLog(threshold=0.01, logger=logger,
+                flush_interval=0.05, io_loop=self.io_loop)
+        api = TornadoRESTful(slow_log=self.slow_log)
+        api.add_resource('slow', SlowResource)
+        return tornado.web.Application(api.get_url_mapping())
+
+    def tearDown(self):
+        self.slow_log.close()
+        logging.getLogger('tests.slow_requests').removeHandler(
+                self.log_handler)
+        super(SlowRequestLogTestCase, self).tearDown()
+
+    def wait_for_flush(self):
+        self.io_loop.add_timeout(time.time() + 0.15, self.stop)
+        self.wait()
+
+    def test_should_log_requests_over_the_threshold(self):
+        assert_response_code(self.fetch('/slow'), 200)
+        self.wait_for_flush()
+        assert len(self.log_handler.messages) == 1
+        record = json.loads(self.log_handler.messages[0])
+        assert record['resource'] == 'slow'
+        assert record['method'] == 'GET'
+        assert record['encoder'] == 'JsonEncoder'
+        assert record['handler'] >= 0.02
+        assert record['encode'] is not None
+        assert record['request_size'] == 0
+        assert record['response_size'] == len(b'[{"id": 1}]')
+
+    def test_should_log_the_size_of_the_body_as_it_was_received(self):
+        body = gzipped(b'{"text": "' + b'a' * 1000 + b'"}')
+        assert_response_code(self.fetch('/slow', method='POST', body=body,
+            headers={'Content-Type': 'application/json',
+                'Content-Encoding': 'gzip'}), 201)
+        self.slow_log.close()
+        record = json.loads(self.log_handler.messages[0])
+        assert record['request_size'] == len(body)
+
+    def test_should_not_log_fast_requests(self):
+        assert_response_code(self.fetch('/slow/1'), 200)
+        self.wait_for_flush()
+        assert self.log_handler.messages == []
+
+    def test_should_buffer_records_until_the_flush(self):
+        assert_response_code(self.fetch('/slow'), 200)
+        assert len(self.slow_log.records) == 1
+        assert self.log_handler.messages == []
+
+    def test_should_write_the_buffered_records_on_close(self):
+        assert_response_code(self.fetch('/slow'), 200)
+        self.slow_log.close()
+        assert len(self.log_handler.messages) == 1
+        assert self.slow_log.writer is None
+
+    def test_should_redact_the_sensitive_arguments(self):
+        assert_response_code(self.fetch('/slow?api_key=s3cret&page=2'), 200)
+        self.slow_log.close()
+        record = json.loads(self.log_handler.messages[0])
+        assert record['uri'] == '/slow?api_key=REDACTED&page=2'
+
+
+class BlockingHandler(ListHandler):
+
+    def __init__(self):
+        ListHandler.__init__(self)
+        self.writing = threading.Event()
+        self.unblocked = threading.Event()
+
+    def emit(self, record):
+        self.writing.set()
+        self.unblocked.wait(5)
+        ListHandler.emit(self, record)
+
+
+class SlowRequestLogQueueTestCase(TestCase):
+
+    def test_should_drop_the_batches_the_writer_can_not_keep_up_with(self):
+        log_handler = BlockingHandler()
+        logger = logging.getLogger('tests.blocked_slow_requests')
+        logger.addHandler(log_handler)
+        slow_log = SlowRequestLog(logger=logger, max_batches=1)
+        try:
+            for batch in range(3):
+                slow_log.records.append({'batch': batch})
+                slow_log.flush()
+                log_handler.writing.wait(5)
+            assert slow_log.dropped == 1
+        finally:
+            log_handler.unblocked.set()
+            slow_log.close(5)
+            logger.removeHandler(log_handler)
+        assert len(log_handler.messages) == 2
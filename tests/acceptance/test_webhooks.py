@@ -0,0 +1,206 @@
+import os
+import time
+import hmac
+import shutil
+import hashlib
+import tempfile
+from json import loads, dumps
+from unittest import TestCase
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase
+
+from tapioca import TornadoRESTful, ResourceHandler, WebhookDispatcher, \
+        Subscriber
+from tapioca.webhooks import SubscriberQueue, OverflowFile
+
+from tests.support import AsyncHTTPClientMixin, assert_response_code
+
+
+class CommentsResource(ResourceHandler):
+
+    def update_model(self, key, callback):
+        self.change_content = self.load_data()
+        if self.change_content.get('text') == 'unserializable':
+            self.change_content = object()
+        callback()
+
+    def delete_model(self, key, callback):
+        callback()
+
+
+class ReceiverHandler(tornado.web.RequestHandler):
+
+    def initialize(self, test):
+        self.test = test
+
+    def post(self):
+        self.test.received.append((self.request.headers,
+            loads(self.request.body.decode('utf-8'))['events']))
+        self.set_status(self.test.statuses.pop(0) if self.test.statuses
+                else 200)
+        self.test.on_receive()
+
+
+class WebhooksTestCase(AsyncHTTPTestCase, AsyncHTTPClientMixin):
+
+    def get_app(self):
+        self.received = []
+        self.statuses = []
+        self.expected = None
+        self.dispatcher = WebhookDispatcher(
+                [Subscriber(self.get_url('/hook'), secret='s3cret')],
+                batch_size=2, batch_interval=0.05, retry_delay=0.01,
+                max_retries=2, io_loop=self.io_loop)
+        api = TornadoRESTful(webhooks=self.dispatcher)
+        api.add_resource('comments', CommentsResource)
+        return tornado.web.Application(api.get_url_mapping() + [
+            ('/hook', ReceiverHandler, {'test': self})])
+
+    def tearDown(self):
+        self.dispatcher.close()
+        super(WebhooksTestCase, self).tearDown()
+
+    def on_receive(self):
+        if len(self.received) == self.expected:
+            self.io_loop.add_callback(self.stop)
+
+    def wait_for(self, requests):
+        self.expected = requests
+        if len(self.received) < requests:
+            self.wait()
+
+    def stats(self):
+        return self.dispatcher.stats()[self.get_url('/hook')]
+
+    def wait_until(self, condition):
+        def check():
+            if condition():
+                self.stop()
+            else:
+                self.io_loop.add_timeout(time.time() + 0.01, check)
+        check()
+        self.wait()
+
+    def update(self, key, data):
+        response = self.put(self.get_url('/comments/{0}'.format(key)),
+                dumps(data))
+        assert_response_code(response, 204)
+
+    def test_should_deliver_the_writes_in_batches(self):
+        self.update(1, {'text': 'a'})
+        self.update(2, {'text': 'b'})
+        self.delete(self.get_url('/comments/1'))
+        self.wait_for(2)
+        events = [event for headers, batch in self.received
+                for event in batch]
+        assert [len(batch) for headers, batch in self.received] == [2, 1]
+        assert [(event['action'], event['key'], event['content'])
+                for event in events] == [('updated', '1', {'text': 'a'}),
+                        ('updated', '2', {'text': 'b'}),
+                        ('deleted', '1', None)]
+        self.wait_until(lambda: self.stats()['delivered'] == 3)
+        assert self.stats() == {'queued': 0, 'delivered': 3, 'failed': 0,
+                'dropped': 0}
+
+    def test_should_sign_the_batches(self):
+        self.update(1, {'text': 'a'})
+        self.wait_for(1)
+        headers, batch = self.received[0]
+        body = WebhookDispatcher([]).encoder.encode(
+                {'events': batch}).encode('utf-8')
+        assert headers['X-Webhook-Signature'] == 'sha256=' + hmac.new(
+                b's3cret', body, hashlib.sha256).hexdigest()
+
+    def test_should_retry_failed_deliveries(self):
+        self.statuses = [503, 503]
+        self.update(1, {'text': 'a'})
+        self.wait_for(3)
+        assert self.received[0][1] == self.received[2][1]
+        self.wait_until(lambda: self.stats()['delivered'] == 1)
+
+    def test_should_give_up_on_client_errors(self):
+        self.statuses = [400]
+        self.update(1, {'text': 'a'})
+        self.wait_until(lambda: self.stats()['failed'] == 1)
+        self.update(2, {'text': 'b'})
+        self.wait_until(lambda: self.stats()['delivered'] == 1)
+        assert len(self.received) == 2
+
+    def test_should_count_unserializable_changes_as_failed(self):
+        self.update(1, {'text': 'unserializable'})
+        self.update(2, {'text': 'b'})
+        self.wait_until(lambda: self.stats()['delivered'] == 1)
+        assert self.stats()['failed'] == 1
+        assert self.stats()['queued'] == 0
+        assert [event['key'] for event in self.received[0][1]] == ['2']
+
+
+class SubscriberQueueTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_drop_the_oldest_events_without_overflow(self):
+        queue = SubscriberQueue(Subscriber('http://localhost/'), 2)
+        for event in range(3):
+            queue.append(event)
+        assert queue.take(10) == [1, 2]
+        assert queue.dropped == 1
+
+    def test_should_overflow_the_events_over_the_limit_in_order(self):
+        overflow = OverflowFile(self.directory)
+        queue = SubscriberQueue(Subscriber('http://localhost/'), 2, overflow)
+        for event in range(7):
+            queue.append(str(event))
+        assert len(queue) == 7
+        queue.write_overflow()
+        assert overflow.count == 5
+        assert queue.take(3) == ['0', '1', '2']
+        queue.append('7')
+        assert queue.take(10) == ['3', '4', '5']
+        assert queue.take(10) == ['6', '7']
+        assert len(queue) == 0
+        overflow.close()
+
+    def test_should_create_the_overflow_file_of_each_process(self):
+        overflow = OverflowFile(self.directory)
+        assert overflow.path is None
+        overflow.append(['"a"'])
+        parent_path = overflow.path
+        overflow.pid = -1
+        assert overflow.read(10) == []
+        overflow.append(['"b"'])
+        assert overflow.path != parent_path
+        assert overflow.read(10) == ['"b"']
+        child_path = overflow.path
+        overflow.close()
+        assert not os.path.exists(child_path)
+        assert os.path.exists(parent_path)
+
+    def test_should_give_each_dispatcher_its_own_overflow_files(self):
+        subscribers = [Subscriber('http://localhost/')]
+        first = WebhookDispatcher(subscribers,
+                overflow_directory=self.directory)
+        second = WebhookDispatcher(subscribers,
+                overflow_directory=self.directory, overflow_prefix='other-')
+        first.queues[0].overflow.append(['"a"'])
+        second.queues[0].overflow.append(['"a"'])
+        first_path = first.queues[0].overflow.path
+        second_path = second.queues[0].overflow.path
+        assert first_path != second_path
+        assert os.path.basename(second_path).startswith('other-0-')
+        first.close()
+        assert not os.path.exists(first_path)
+        assert os.path.exists(second_path)
+        second.close()
+
+    def test_should_filter_resources_and_actions(self):
+        subscriber = Subscriber('http://localhost/', resources=['comments'],
+                actions=['deleted'])
+        assert subscriber.wants('comments', 'deleted')
+        assert not subscriber.wants('comments', 'created')
+        assert not subscriber.wants('users', 'deleted')
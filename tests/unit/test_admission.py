@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from tapioca.admission import AdmissionControl
+
+
+class AdmissionControlTestCase(TestCase):
+
+    def setUp(self):
+        self.control = AdmissionControl(2, max_queue=1)
+        self.called = []
+
+    def test_should_acquire_until_the_limit(self):
+        assert self.control.acquire('GET')
+        assert self.control.acquire('GET')
+        assert not self.control.acquire('GET')
+        assert self.control.in_flight_count('GET') == 2
+
+    def test_should_limit_each_method_separately(self):
+        control = AdmissionControl({'POST': 1})
+        assert control.acquire('POST')
+        assert not control.acquire('POST')
+        assert control.acquire('GET')
+        assert control.acquire('GET')
+
+    def test_should_refuse_to_enqueue_when_queue_is_full(self):
+        assert self.control.enqueue('GET', lambda: None)
+        assert not self.control.enqueue('GET', lambda: None)
+        assert self.control.queue_length('GET') == 1
+
+    def test_should_hand_the_slot_over_to_the_next_waiter(self):
+        self.control.acquire('GET')
+        self.control.acquire('GET')
+        self.control.enqueue('GET', lambda: self.called.append(True))
+        self.control.release('GET')
+        assert self.called == [True]
+        assert self.control.in_flight_count('GET') == 2
+        assert self.control.queue_length('GET') == 0
+
+    def test_should_free_the_slot_when_nobody_is_waiting(self):
+        self.control.acquire('GET')
+        self.control.release('GET')
+        assert self.control.in_flight_count('GET') == 0
+
+    def test_should_cancel_a_waiter(self):
+        waiter = lambda: self.called.append(True)
+        self.control.enqueue('GET', waiter)
+        assert self.control.cancel('GET', waiter)
+        assert not self.control.cancel('GET', waiter)
+        assert self.control.queue_length('GET') == 0
+
+    def test_should_report_stats_by_method(self):
+        self.control.acquire('GET')
+        self.control.enqueue('PUT', lambda: None)
+        stats = self.control.stats()
+        assert stats['GET'] == {'in_flight': 1, 'queued': 0}
+        assert stats['PUT'] == {'in_flight': 0, 'queued': 1}
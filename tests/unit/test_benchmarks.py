@@ -0,0 +1,75 @@
+from unittest import TestCase
+
+from benchmarks.run import compare, run_benchmark, measure_memory
+from benchmarks.loadtest import percentile, parse_mix
+
+
+def results(**timings):
+    return {'benchmarks': dict((name, {'best': best})
+        for name, best in timings.items())}
+
+
+class CompareBenchmarksTestCase(TestCase):
+
+    def test_should_flag_regressions_over_the_threshold(self):
+        lines, regression = compare(results(encode=1.0), results(encode=1.2),
+                threshold=0.1)
+        assert regression
+        assert lines[0].endswith('REGRESSION')
+
+    def test_should_not_flag_changes_under_the_threshold(self):
+        lines, regression = compare(results(encode=1.0), results(encode=1.05),
+                threshold=0.1)
+        assert not regression
+
+    def test_should_report_faster_benchmarks(self):
+        lines, regression = compare(results(encode=1.0), results(encode=0.5),
+                threshold=0.1)
+        assert not regression
+        assert lines[0].endswith('faster')
+
+    def test_should_ignore_benchmarks_missing_in_one_of_the_runs(self):
+        lines, regression = compare(results(encode=1.0), results(decode=2.0),
+                threshold=0.1)
+        assert lines == []
+
+
+class RunBenchmarkTestCase(TestCase):
+
+    def test_should_return_the_time_of_each_call(self):
+        result = run_benchmark(lambda: None, repeat=3, min_time=0.001)
+        assert result['repeat'] == 3
+        assert result['number'] >= 1
+        assert result['best'] <= result['median']
+
+    def test_should_measure_the_memory_allocated_by_each_call(self):
+        kept = []
+        result = measure_memory(lambda: kept.append(bytearray(1000)),
+                number=10)
+        if result is not None:
+            assert result['peak_bytes'] >= 1000
+            assert result['retained_bytes'] >= 1000
+
+
+class LoadTestTestCase(TestCase):
+
+    def test_should_return_the_nearest_rank_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile(values, 0.999) == 100
+
+    def test_should_return_none_without_values(self):
+        assert percentile([], 0.5) is None
+
+    def test_should_parse_the_mix_of_operations(self):
+        assert parse_mix('get=80,create=20') == [('get', 80.0),
+                ('create', 20.0)]
+
+    def test_should_refuse_unknown_operations(self):
+        try:
+            parse_mix('patch=10')
+        except ValueError:
+            pass
+        else:
+            assert False, 'should raise ValueError'
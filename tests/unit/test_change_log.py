@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from tapioca import MemoryChangeLog, FileChangeLog
+from tapioca.change_log import ChangesExpired, InvalidSinceToken
+
+
+class MemoryChangeLogTestCase(TestCase):
+
+    def test_should_return_the_last_action_of_each_key(self):
+        log = MemoryChangeLog()
+        token = log.token()
+        log('comments', 'created', '1')
+        log('comments', 'created', '2')
+        log('users', 'created', '1')
+        log('comments', 'deleted', '1')
+        log('comments', 'updated', '3')
+        changed, deleted, new_token = log.changes_since('comments', token)
+        assert changed == ['2', '3']
+        assert deleted == ['1']
+        assert log.changes_since('comments', new_token) == ([], [],
+                new_token)
+
+    def test_should_expire_tokens_of_truncated_changes(self):
+        log = MemoryChangeLog(max_entries=4)
+        token = log.token()
+        for key in range(5):
+            log('comments', 'created', str(key))
+        self.assertRaises(ChangesExpired, log.changes_since, 'comments',
+                token)
+        assert log.changes_since('comments', log.token(3))[0] == ['3', '4']
+
+    def test_should_expire_tokens_before_a_change_without_key(self):
+        log = MemoryChangeLog()
+        token = log.token()
+        log('comments', 'created', '1')
+        log('comments', 'deleted', None)
+        assert 'comments' not in log.entries
+        self.assertRaises(ChangesExpired, log.changes_since, 'comments',
+                token)
+        token = log.token()
+        log('comments', 'created', '2')
+        assert log.changes_since('comments', token)[0] == ['2']
+
+    def test_should_refuse_tokens_of_another_log(self):
+        log = MemoryChangeLog()
+        self.assertRaises(ChangesExpired, log.changes_since, 'comments',
+                MemoryChangeLog().token())
+        self.assertRaises(InvalidSinceToken, log.changes_since, 'comments',
+                'garbage')
+        self.assertRaises(InvalidSinceToken, log.changes_since, 'comments',
+                log.token(10))
+
+    def test_should_start_a_new_epoch_in_a_forked_process(self):
+        log = MemoryChangeLog()
+        log('comments', 'created', '1')
+        token = log.token(0)
+        log.pid = -1
+        self.assertRaises(ChangesExpired, log.changes_since, 'comments',
+                token)
+        assert log.token() != '{0}.1'.format(token.partition('.')[0])
+
+
+class FileChangeLogTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'changes.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_keep_the_tokens_across_restarts(self):
+        log = FileChangeLog(self.path)
+        token = log.token()
+        log('comments', 'created', '1')
+        log('comments', 'deleted', '2')
+        log.close()
+        with open(self.path, 'a') as cut:
+            cut.write('[3, "comm')
+        log = FileChangeLog(self.path)
+        assert log.changes_since('comments', token)[:2] == (['1'], ['2'])
+        log('comments', 'created', '3')
+        assert log.changes_since('comments', token)[0] == ['1', '3']
+        log.close()
+
+    def test_should_keep_the_expiration_of_changes_without_key(self):
+        log = FileChangeLog(self.path)
+        token = log.token()
+        log('comments', 'created', None)
+        log.close()
+        log = FileChangeLog(self.path)
+        self.assertRaises(ChangesExpired, log.changes_since, 'comments',
+                token)
+        log.close()
+
+    def test_should_not_reuse_seqs_of_changes_without_key(self):
+        log = FileChangeLog(self.path)
+        log('comments', 'created', '1')
+        log('comments', 'deleted', None)
+        log.close()
+        log = FileChangeLog(self.path)
+        log.close()
+        log = FileChangeLog(self.path)
+        assert log.last_seq == 2
+        token = log.token()
+        log('comments', 'created', '2')
+        assert log.changes_since('comments', token)[0] == ['2']
+        log.close()
+
+    def test_should_refuse_a_forked_process(self):
+        log = FileChangeLog(self.path)
+        log.pid = -1
+        self.assertRaises(RuntimeError, log, 'comments', 'created', '1')
+        log.close()
+
+    def test_should_rewrite_the_file_with_the_retained_changes(self):
+        log = FileChangeLog(self.path, max_entries=4)
+        for key in range(20):
+            log('comments', 'created', str(key))
+        log.close()
+        with open(self.path) as changes:
+            assert len(changes.readlines()) <= 1 + 4 + 4
+        log = FileChangeLog(self.path, max_entries=4)
+        self.assertRaises(ChangesExpired, log.changes_since, 'comments',
+                log.token(1))
+        assert log.changes_since('comments', log.token(18))[0] == ['18',
+                '19']
+        log.close()
@@ -0,0 +1,74 @@
+import zlib
+import gzip
+from io import BytesIO
+from unittest import TestCase
+
+from tapioca.compression import decompress, UnsupportedEncoding, \
+        DecompressedBodyTooLarge, InvalidCompressedBody
+
+
+def gzipped(data):
+    buffer = BytesIO()
+    compressed = gzip.GzipFile(fileobj=buffer, mode='wb')
+    compressed.write(data)
+    compressed.close()
+    return buffer.getvalue()
+
+
+def raw_deflated(data):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class DecompressTestCase(TestCase):
+
+    def test_should_decompress_gzip(self):
+        assert decompress(gzipped(b'{"a": 1}'), 'gzip') == b'{"a": 1}'
+
+    def test_should_decompress_deflate_with_or_without_header(self):
+        assert decompress(zlib.compress(b'abc'), 'deflate') == b'abc'
+        assert decompress(raw_deflated(b'abc'), 'deflate') == b'abc'
+
+    def test_should_undo_the_encodings_in_reverse_order(self):
+        body = gzipped(zlib.compress(b'abc'))
+        assert decompress(body, 'deflate, gzip') == b'abc'
+        assert decompress(b'abc', 'identity') == b'abc'
+
+    def test_should_refuse_an_unsupported_encoding(self):
+        self.assertRaises(UnsupportedEncoding, decompress, b'abc', 'br')
+        self.assertRaises(UnsupportedEncoding, decompress,
+                zlib.compress(b'abc'), 'deflate', encodings=('gzip',))
+
+    def test_should_refuse_an_invalid_body(self):
+        self.assertRaises(InvalidCompressedBody, decompress, b'abc', 'gzip')
+        self.assertRaises(InvalidCompressedBody, decompress, b'abc',
+                'deflate')
+
+    def test_should_refuse_a_truncated_body(self):
+        for body, encoding in ((gzipped(b'abc' * 100), 'gzip'),
+                (zlib.compress(b'abc' * 100), 'deflate'),
+                (raw_deflated(b'abc' * 100), 'deflate')):
+            self.assertRaises(InvalidCompressedBody, decompress, body[:-4],
+                    encoding)
+            self.assertRaises(InvalidCompressedBody, decompress, body[:-4],
+                    encoding, max_size=1000)
+
+    def test_should_limit_the_decompressed_size(self):
+        body = gzipped(b'a' * 1001)
+        self.assertRaises(DecompressedBodyTooLarge, decompress, body, 'gzip',
+                max_size=1000)
+        assert len(decompress(body, 'gzip', max_size=1001)) == 1001
+
+    def test_should_limit_the_compression_ratio(self):
+        body = gzipped(b'a' * 100000)
+        self.assertRaises(DecompressedBodyTooLarge, decompress, body, 'gzip',
+                max_ratio=100)
+        assert len(decompress(body, 'gzip', max_ratio=1000)) == 100000
+
+    def test_should_limit_the_ratio_against_the_received_body(self):
+        # each layer is under 1000:1, both together over 15000:1
+        body = gzipped(gzipped(b'a' * 1000000))
+        self.assertRaises(DecompressedBodyTooLarge, decompress, body,
+                'gzip, gzip', max_ratio=2000)
+        assert len(decompress(body, 'gzip, gzip', max_ratio=20000)) == \
+                1000000
@@ -0,0 +1,66 @@
+import os
+import gzip
+import json
+import shutil
+import tempfile
+from unittest import TestCase
+
+from tapioca import TornadoRESTful
+from tapioca.export import load_api, export, main
+
+from tests.support import ResourceWithDocumentation
+
+
+def build_api():
+    api = TornadoRESTful(version='v1', base_url='http://api.tapioca.com')
+    api.add_resource('comments', ResourceWithDocumentation)
+    return api
+
+
+api = build_api()
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name)) as document:
+            return document.read()
+
+    def test_should_load_an_api_instance(self):
+        assert load_api('tests.unit.test_export:api') is api
+
+    def test_should_load_an_api_from_a_factory(self):
+        assert isinstance(load_api('tests.unit.test_export:build_api'),
+                TornadoRESTful)
+
+    def test_should_write_the_documents_like_the_discovery_routes(self):
+        paths = export(api.get_spec(), self.directory)
+        assert [os.path.relpath(path, self.directory) for path in paths] == \
+                ['discovery.swagger', os.path.join('discovery',
+                    'comments.swagger'), 'discovery.wadl']
+        swagger = json.loads(self.read('discovery.swagger'))
+        assert swagger['apis'][0]['path'] == '/discovery/comments.swagger'
+        resource = json.loads(self.read('discovery/comments.swagger'))
+        assert resource['resourcePath'] == '/comments'
+        assert self.read('discovery.wadl').startswith('<application')
+
+    def test_should_write_gzipped_copies(self):
+        export(api.get_spec(), self.directory, compress=True)
+        document = gzip.open(os.path.join(self.directory,
+            'discovery.wadl.gz'))
+        try:
+            assert document.read().decode('utf-8') == \
+                    self.read('discovery.wadl')
+        finally:
+            document.close()
+
+    def test_should_run_from_the_command_line(self):
+        assert main(['tests.unit.test_export:api', '--output',
+            self.directory]) == 0
+        assert os.path.exists(os.path.join(self.directory, 'discovery.wadl'))
@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+from tapioca.metrics import Histogram, MetricsRegistry, PhaseTimings
+
+
+class HistogramTestCase(TestCase):
+
+    def test_should_count_values_in_buckets(self):
+        histogram = Histogram((0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(0.5)
+        histogram.observe(3)
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.count == 4
+        assert histogram.sum == 3.65
+
+    def test_should_return_cumulative_counts(self):
+        histogram = Histogram((0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        assert list(histogram.cumulative_counts()) == \
+                [(0.1, 1), (1.0, 2), ('+Inf', 2)]
+
+
+class PhaseTimingsTestCase(TestCase):
+
+    def test_should_add_durations_of_the_same_phase(self):
+        timings = PhaseTimings()
+        timings.add('encode', 0.5)
+        timings.add('encode', 0.25)
+        assert timings.get('encode') == 0.75
+        assert timings.get('handler') is None
+
+    def test_should_format_server_timing_in_milliseconds(self):
+        timings = PhaseTimings()
+        timings.add('encode', 0.002)
+        timings.add('routing', 0.0005)
+        timings.add('custom', 0.001)
+        assert timings.server_timing() == \
+                'routing;dur=0.500, encode;dur=2.000, custom;dur=1.000'
+
+
+class MetricsRegistryTestCase(TestCase):
+
+    def test_should_observe_each_phase_of_a_request(self):
+        registry = MetricsRegistry(buckets=(1.0,))
+        timings = PhaseTimings()
+        timings.add('handler', 0.5)
+        registry.observe_request('comments', 'GET', timings, 0.75)
+        assert len(registry.histograms) == 2
+
+    def test_should_export_prometheus_text(self):
+        registry = MetricsRegistry(buckets=(1.0,))
+        timings = PhaseTimings()
+        timings.add('handler', 0.5)
+        registry.observe_request('comments', 'GET', timings, 0.75)
+        text = registry.to_prometheus()
+        assert '# TYPE tapioca_request_phase_seconds histogram' in text
+        assert 'tapioca_request_phase_seconds_bucket{resource="comments",' \
+                'method="GET",phase="handler",le="1.0"} 1' in text
+        assert 'tapioca_request_phase_seconds_count{resource="comments",' \
+                'method="GET",phase="handler"} 1' in text
+        assert 'tapioca_request_duration_seconds_sum{resource="comments",' \
+                'method="GET"} 0.75' in text
@@ -0,0 +1,80 @@
+from unittest import TestCase
+
+from schema import Schema, Use, SchemaError
+
+from tapioca.patch import apply_merge_patch, MergePatch, JsonPatch, \
+        PatchError, PatchConflict
+
+
+class MergePatchTestCase(TestCase):
+
+    def test_should_merge_objects_and_remove_nulls(self):
+        target = {'a': 'b', 'c': {'d': 'e', 'f': 'g'}}
+        result = apply_merge_patch(target, {'a': 'z', 'c': {'f': None}})
+        assert result == {'a': 'z', 'c': {'d': 'e'}}
+        assert target == {'a': 'b', 'c': {'d': 'e', 'f': 'g'}}
+
+    def test_should_replace_lists(self):
+        assert apply_merge_patch({'a': [1, 2]}, {'a': [3]}) == {'a': [3]}
+
+    def test_should_refuse_a_patch_that_is_not_an_object(self):
+        self.assertRaises(PatchError, MergePatch, [1])
+
+    def test_should_validate_the_changed_fields(self):
+        schemas = {'score': Schema(Use(int)), 'text': Schema(str)}
+        patch = MergePatch({'score': '10', 'text': None}).validate(schemas)
+        assert patch.document == {'score': 10, 'text': None}
+        self.assertRaises(SchemaError, MergePatch({'other': 1}).validate,
+                schemas)
+
+
+class JsonPatchTestCase(TestCase):
+
+    def apply(self, target, operations):
+        return JsonPatch(operations).apply(target)
+
+    def test_should_apply_the_operations_in_order(self):
+        target = {'a': [1, 2], 'b': {'c': 1}}
+        result = self.apply(target, [
+            {'op': 'add', 'path': '/a/1', 'value': 5},
+            {'op': 'add', 'path': '/a/-', 'value': 6},
+            {'op': 'remove', 'path': '/b/c'},
+            {'op': 'replace', 'path': '/a/0', 'value': 0},
+            {'op': 'copy', 'from': '/a', 'path': '/d'},
+            {'op': 'move', 'from': '/d', 'path': '/b/e'},
+            {'op': 'test', 'path': '/b/e/1', 'value': 5},
+        ])
+        assert result == {'a': [0, 5, 2, 6], 'b': {'e': [0, 5, 2, 6]}}
+        assert target == {'a': [1, 2], 'b': {'c': 1}}
+
+    def test_should_unescape_the_paths(self):
+        assert self.apply({'a/b': 1, 'c~d': 2}, [
+            {'op': 'remove', 'path': '/a~1b'},
+            {'op': 'replace', 'path': '/c~0d', 'value': 3}]) == {'c~d': 3}
+
+    def test_should_refuse_malformed_operations(self):
+        self.assertRaises(PatchError, JsonPatch, {'op': 'add'})
+        self.assertRaises(PatchError, JsonPatch, [{'op': 'add',
+            'path': '/a'}])
+        self.assertRaises(PatchError, JsonPatch, [{'op': 'swap',
+            'path': '/a'}])
+        self.assertRaises(PatchError, JsonPatch, [{'op': 'remove',
+            'path': 'a'}])
+
+    def test_should_conflict_with_the_document(self):
+        self.assertRaises(PatchConflict, self.apply, {'a': 1},
+                [{'op': 'test', 'path': '/a', 'value': 2}])
+        self.assertRaises(PatchConflict, self.apply, {'a': 1},
+                [{'op': 'remove', 'path': '/b'}])
+        self.assertRaises(PatchConflict, self.apply, {'a': [1]},
+                [{'op': 'replace', 'path': '/a/1', 'value': 2}])
+        self.assertRaises(PatchConflict, self.apply, {'a': {}},
+                [{'op': 'move', 'from': '/a', 'path': '/a/b'}])
+
+    def test_should_translate_and_validate_the_fields(self):
+        schemas = {'my_score': Schema(Use(int))}
+        patch = JsonPatch([{'op': 'replace', 'path': '/myScore',
+            'value': '3'}], lambda token: token.replace('myS', 'my_s'))
+        assert patch.validate(schemas).operations[0]['value'] == 3
+        self.assertRaises(SchemaError, JsonPatch([{'op': 'remove',
+            'path': '/other'}]).validate, schemas)
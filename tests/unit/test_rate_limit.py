@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+from tapioca import RateLimit
+from tapioca.rate_limit import api_key
+
+
+class FakeRequest(object):
+    def __init__(self, method, remote_ip, headers=None):
+        self.method = method
+        self.remote_ip = remote_ip
+        self.headers = headers or {}
+
+
+class FakeHandler(object):
+    def __init__(self, method='GET', remote_ip='10.0.0.1', headers=None):
+        self.request = FakeRequest(method, remote_ip, headers)
+
+    def get_argument(self, name, default=None):
+        return default
+
+
+class RateLimitTestCase(TestCase):
+
+    def test_should_allow_requests_until_the_bucket_is_empty(self):
+        limit = RateLimit(2, period=60)
+        handler = FakeHandler()
+        assert limit.consume(handler, now=0) == (True, 2, 1, 30)
+        assert limit.consume(handler, now=0) == (True, 2, 0, 60)
+        assert limit.consume(handler, now=0)[0] is False
+
+    def test_should_refill_the_bucket_over_time(self):
+        limit = RateLimit(2, period=60)
+        handler = FakeHandler()
+        limit.consume(handler, now=0)
+        limit.consume(handler, now=0)
+        assert limit.consume(handler, now=30)[0] is True
+
+    def test_should_keep_a_bucket_for_each_client(self):
+        limit = RateLimit(1)
+        assert limit.consume(FakeHandler(remote_ip='10.0.0.1'), now=0)[0]
+        assert limit.consume(FakeHandler(remote_ip='10.0.0.2'), now=0)[0]
+
+    def test_should_keep_a_bucket_for_each_limited_method(self):
+        limit = RateLimit({'POST': 1, 'PUT': 1})
+        assert limit.consume(FakeHandler('POST'), now=0)[0]
+        assert limit.consume(FakeHandler('PUT'), now=0)[0]
+        assert not limit.consume(FakeHandler('POST'), now=0)[0]
+        assert limit.consume(FakeHandler('GET'), now=0) is None
+
+    def test_should_identify_clients_by_api_key(self):
+        limit = RateLimit(1, key=api_key())
+        handler = FakeHandler(headers={'X-Api-Key': 'abc'})
+        limit.consume(handler, now=0)
+        assert 'abc' in limit.buckets
+
+    def test_should_identify_unknown_api_keys_by_ip(self):
+        limit = RateLimit(1, key=api_key(validate=lambda key: key == 'abc'))
+        limit.consume(FakeHandler(headers={'X-Api-Key': 'abc'}), now=0)
+        limit.consume(FakeHandler(headers={'X-Api-Key': 'xyz'}), now=0)
+        assert sorted(limit.buckets.keys()) == ['10.0.0.1', 'abc']
+
+    def test_should_retry_when_the_bucket_has_a_token_again(self):
+        limit = RateLimit(10, period=60)
+        handler = FakeHandler()
+        for attempt in range(11):
+            allowed, capacity, remaining, reset = limit.consume(handler,
+                    now=0)
+        assert not allowed
+        assert reset == 60
+        assert limit.retry_after(handler) == 6
+
+    def test_should_evict_idle_buckets(self):
+        limit = RateLimit(2, period=60, sweep_interval=10)
+        limit.swept_at = 0
+        limit.consume(FakeHandler(remote_ip='10.0.0.1'), now=0)
+        limit.consume(FakeHandler(remote_ip='10.0.0.2'), now=50)
+        assert len(limit.buckets) == 2
+        limit.consume(FakeHandler(remote_ip='10.0.0.2'), now=60)
+        assert list(limit.buckets.keys()) == ['10.0.0.2']
+
+    def test_should_describe_the_limit_of_a_method(self):
+        limit = RateLimit({'POST': 10}, period=1)
+        assert limit.describe('POST') == {'requests': 10, 'period': 1}
+        assert limit.describe('GET') is None
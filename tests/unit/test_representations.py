@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from tapioca import RepresentationCache
+
+
+class RepresentationCacheTestCase(TestCase):
+
+    def test_should_drop_the_oldest_entries(self):
+        cache = RepresentationCache(max_entries=2)
+        cache.set('comments', '/comments/1', 'application/json', '"a"', 10)
+        cache.set('comments', '/comments/2', 'application/json', '"b"', 10)
+        cache.set('users', '/users/1', 'application/json', '"c"', 10)
+        assert cache.get('comments', '/comments/1', 'application/json') \
+                is None
+        assert cache.get('users', '/users/1', 'application/json') == \
+                ('"c"', 10)
+        assert len(cache) == 2
+
+    def test_should_invalidate_a_resource(self):
+        cache = RepresentationCache()
+        cache.set('comments', '/comments', 'application/json', '"a"', 10)
+        cache.set('users', '/users', 'application/json', '"b"', 10)
+        cache.invalidate('comments')
+        assert cache.get('comments', '/comments', 'application/json') is None
+        assert cache.get('users', '/users', 'application/json') == ('"b"', 10)
+        assert len(cache) == 1
+
+    def test_should_skip_invalidated_entries_when_dropping(self):
+        cache = RepresentationCache(max_entries=2)
+        cache.set('comments', '/comments/1', 'application/json', '"a"', 10)
+        cache.invalidate('comments')
+        cache.set('comments', '/comments/1', 'application/json', '"b"', 10)
+        cache.set('users', '/users/1', 'application/json', '"c"', 10)
+        assert cache.get('comments', '/comments/1', 'application/json') == \
+                ('"b"', 10)
+        cache.set('users', '/users/2', 'application/json', '"d"', 10)
+        assert cache.get('comments', '/comments/1', 'application/json') \
+                is None
+        assert len(cache) == 2
+
+    def test_should_compact_the_order_after_many_invalidations(self):
+        cache = RepresentationCache(max_entries=2)
+        for version in range(10):
+            cache.set('comments', '/comments', 'application/json',
+                    str(version), 10)
+            cache.invalidate('comments')
+        assert len(cache.order) <= 2 * 2 + 1
+        assert len(cache) == 0
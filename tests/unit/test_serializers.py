@@ -1,7 +1,12 @@
 import datetime
 from unittest import TestCase
 
-from tapioca import JsonEncoder
+import tornado.web
+from tornado.httputil import HTTPHeaders
+from tornado.httpserver import HTTPRequest
+
+from tapioca import JsonEncoder, JsonpEncoder, ResourceHandler
+from tapioca.serializers import iter_json_array
 
 
 class JsonEncoderTestCase(TestCase):
@@ -27,3 +32,65 @@ class JsonEncoderTestCase(TestCase):
         result = encoder.decode('{"myAge":{"thisOneIsGood":true}}')
         assert 'my_age' in result
         assert 'this_one_is_good' in result['my_age']
+
+    def test_should_not_share_translations_between_directions(self):
+        encoder = JsonEncoder(None)
+        assert encoder.decode('{"my_age": 25}') == {'my_age': 25}
+        assert 'myAge' in encoder.encode({'my_age': 25})
+
+
+class SharedEncodersTestCase(TestCase):
+
+    def build_handler(self, accept, handler_class=ResourceHandler):
+        application = tornado.web.Application()
+        request = HTTPRequest('GET', '/', headers=HTTPHeaders(
+            {'Accept': accept}))
+        return handler_class(application, request)
+
+    def test_should_share_stateless_encoders_between_requests(self):
+        first = self.build_handler('application/json')
+        second = self.build_handler('application/json')
+        encoder = first.get_encoder_for('application/json')
+        assert encoder is second.get_encoder_for('application/json')
+        assert encoder.handler is None
+
+    def test_should_build_encoders_that_use_the_handler_by_request(self):
+        handler = self.build_handler('text/javascript')
+        encoder = handler.get_encoder_for('text/javascript')
+        assert isinstance(encoder, JsonpEncoder)
+        assert encoder.handler is handler
+
+    def test_should_not_inherit_the_stateless_flag(self):
+        class HandlerAwareEncoder(JsonEncoder):
+            mimetype = 'application/vnd.tapioca+json'
+
+        class Resource(ResourceHandler):
+            encoders = (HandlerAwareEncoder,)
+
+        handler = self.build_handler('application/vnd.tapioca+json',
+                Resource)
+        encoder = handler.get_encoder_for('application/vnd.tapioca+json')
+        assert encoder.handler is handler
+
+
+class IterJsonArrayTestCase(TestCase):
+
+    def test_should_decode_one_item_at_a_time(self):
+        items = iter_json_array(' [ {"a": [1, 2]} ,"b", 3 ] ')
+        assert next(items) == {'a': [1, 2]}
+        assert list(items) == ['b', 3]
+
+    def test_should_decode_an_empty_array(self):
+        assert list(iter_json_array('[ ]')) == []
+
+    def test_should_refuse_what_is_not_an_array(self):
+        self.assertRaises(ValueError, list, iter_json_array('{"a": 1}'))
+
+    def test_should_refuse_a_malformed_array(self):
+        items = iter_json_array('[1 2]')
+        assert next(items) == 1
+        self.assertRaises(ValueError, next, items)
+
+    def test_should_decode_the_keys_of_each_item(self):
+        items = JsonEncoder(None).decode_items(b'[{"myAge": 1}]')
+        assert list(items) == [{'my_age': 1}]